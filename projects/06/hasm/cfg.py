@@ -0,0 +1,234 @@
+class BasicBlock():
+    """Straight line run of instructions with labels pointing at its start.
+    A block ends after a jump instruction or before the next label.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.labels = []
+        self.instructions = []
+
+    def jump(self):
+        """Returns the jump mnemonic ending the block, or None.
+        """
+        if len(self.instructions) == 0 or ";" not in self.instructions[-1]:
+            return None
+        return self.instructions[-1].split(";")[1]
+
+    def target(self):
+        """Returns the operand of the A-Instruction loading the jump target,
+        or None when the target is computed.
+        """
+        if self.jump() is None or len(self.instructions) < 2 or self.instructions[-2][0] != "@":
+            return None
+        # A jump that also writes A, such as `A=D;JMP`, goes to the new A.
+        computation = self.instructions[-1].split(";")[0]
+        if "=" in computation and "A" in computation.split("=")[0]:
+            return None
+        return self.instructions[-2][1:]
+
+
+class ControlFlowOptimizer():
+    """Jump threading and unreachable code removal on HACK assembly.
+
+    The program is split into basic blocks. A jump whose target is loaded by
+    the A-Instruction right before it has a known target, any other jump
+    (for example `A=M / 0;JMP` in a VM return) can reach every label whose
+    address is loaded for another purpose, so those labels are always kept.
+
+    1. A jump to a block that only holds `@L / 0;JMP` is redirected to L,
+       following chains of such blocks.
+    2. Blocks not reachable from the first instruction or from an address
+       taken label are removed.
+
+    Programs jumping to numeric addresses, variables or predefined symbols
+    depend on absolute addresses and are returned unchanged. So are programs
+    with computed jumps that also use numbers which may be addresses of
+    their instructions as data.
+    """
+
+    def __init__(self, lines, exported_labels=False):
+        """Constructor for ControlFlowOptimizer
+
+        Args:
+            lines (list): ASM source lines.
+            exported_labels (bool): Every label may be entered from another
+                module, so only code no label leads to can be removed.
+        """
+        self.exported_labels = exported_labels
+        self.blocks = []
+        self.trailing_labels = []
+        self.label_blocks = {}
+        self.threaded_jumps = 0
+        self.removed_instructions = 0
+        self.build_blocks(lines)
+
+    def build_blocks(self, lines):
+        """Splits the program into basic blocks, dropping comments.
+
+        Args:
+            lines (list): ASM source lines.
+        """
+        block = BasicBlock(0)
+        for line in lines:
+            comment_start = line.find("//")
+            if comment_start != -1:
+                line = line[0:comment_start]
+            line = line.strip().replace(" ", "").replace("\t", "")
+            if len(line) == 0:
+                continue
+
+            if line[0] == "(":
+                if len(block.instructions) != 0:
+                    self.blocks.append(block)
+                    block = BasicBlock(len(self.blocks))
+                block.labels.append(line[1:-1])
+                continue
+
+            block.instructions.append(line)
+            if ";" in line:
+                self.blocks.append(block)
+                block = BasicBlock(len(self.blocks))
+
+        if len(block.instructions) != 0:
+            self.blocks.append(block)
+        else:
+            # Labels after the last instruction do not name an address.
+            self.trailing_labels = block.labels
+
+        for block in self.blocks:
+            for label in block.labels:
+                self.label_blocks[label] = block
+
+    def has_absolute_jumps(self):
+        """Checks for jumps whose target is not a label of the program,
+        either loaded right before the jump or, for computed jumps, loaded
+        as data somewhere else.
+        """
+        computed_jumps = False
+        for block in self.blocks:
+            target = block.target()
+            if target is not None and target not in self.label_blocks:
+                return True
+            if target is None and block.jump() is not None:
+                computed_jumps = True
+        return computed_jumps and self.has_numeric_code_addresses()
+
+    def has_numeric_code_addresses(self):
+        """Checks for numbers that may be addresses of instructions and are
+        used as data, such as `@100 / D=A`, which a computed jump could go
+        to later. Numbers only used as RAM addresses, as in `@5 / D=M`, do
+        not count.
+        """
+        instructions = [instruction for block in self.blocks for instruction in block.instructions]
+        for instruction, following in zip(instructions, instructions[1:]):
+            if instruction[0] != "@" or not instruction[1:].isdigit() or following[0] == "@":
+                continue
+            if int(instruction[1:]) < len(instructions) and "A" in following.split(";")[0].split("=")[-1]:
+                return True
+        return False
+
+    def address_taken_labels(self):
+        """Returns labels loaded into A other than right before their jump.
+        """
+        labels = set()
+        for block in self.blocks:
+            for position, instruction in enumerate(block.instructions):
+                if instruction[0] != "@" or instruction[1:] not in self.label_blocks:
+                    continue
+                if position == len(block.instructions) - 2 and block.jump() is not None:
+                    continue
+                labels.add(instruction[1:])
+        return labels
+
+    def is_trampoline(self, block):
+        """A block that only moves on to a known label.
+        """
+        return (
+            len(block.instructions) == 2
+            and block.jump() == "JMP"
+            and "=" not in block.instructions[1]
+            and block.target() is not None
+        )
+
+    def resolve(self, label):
+        """Follows a chain of trampoline blocks.
+
+        Args:
+            label (str): Jump target.
+
+        Returns:
+            str: Final target.
+        """
+        seen = {label}
+        block = self.label_blocks[label]
+        while self.is_trampoline(block):
+            label = block.target()
+            if label in seen:
+                break
+            seen.add(label)
+            block = self.label_blocks[label]
+        return label
+
+    def thread_jumps(self):
+        """Redirects every known jump to the end of its trampoline chain.
+        """
+        for block in self.blocks:
+            target = block.target()
+            if target is None:
+                continue
+            resolved = self.resolve(target)
+            if resolved != target:
+                block.instructions[-2] = f"@{resolved}"
+                self.threaded_jumps = self.threaded_jumps + 1
+
+    def successors(self, block):
+        """Returns the blocks control can reach directly from a block.
+        """
+        successors = []
+        target = block.target()
+        if target is not None:
+            successors.append(self.label_blocks[target])
+        if block.jump() != "JMP" and block.index + 1 < len(self.blocks):
+            successors.append(self.blocks[block.index + 1])
+        return successors
+
+    def reachable_blocks(self):
+        """Returns the indices of blocks reachable from the entry point or
+        from an address taken label.
+        """
+        pending = [self.blocks[0]]
+        if self.exported_labels:
+            pending.extend(self.label_blocks.values())
+        else:
+            pending.extend(self.label_blocks[label] for label in self.address_taken_labels())
+        reachable = set()
+        while len(pending) != 0:
+            block = pending.pop()
+            if block.index in reachable:
+                continue
+            reachable.add(block.index)
+            pending.extend(self.successors(block))
+        return reachable
+
+    def optimize(self):
+        """Returns the optimized program.
+
+        Returns:
+            list: ASM lines.
+        """
+        if len(self.blocks) != 0 and not self.has_absolute_jumps():
+            self.thread_jumps()
+            reachable = self.reachable_blocks()
+        else:
+            reachable = {block.index for block in self.blocks}
+
+        lines = []
+        for block in self.blocks:
+            if block.index not in reachable:
+                self.removed_instructions = self.removed_instructions + len(block.instructions)
+                continue
+            lines.extend(f"({label})" for label in block.labels)
+            lines.extend(block.instructions)
+        lines.extend(f"({label})" for label in self.trailing_labels)
+        return lines
@@ -1,6 +1,13 @@
 #!/usr/bin/python3
 
+import contextlib
+import io
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from cfg import ControlFlowOptimizer
+from source_reader import SourceReader
+from source_reader import source_lines
 from symbol_table import SymbolTable
 
 COMP_MICROCODE = {
@@ -54,10 +61,74 @@ JMP_MICROCODE = {
     "JMP": "111"
 }
 
+# Encoding a line serially takes about 1us, handing it to a worker and its
+# machine code back about 0.65us, measured on Pong.asm repeated 10 times.
+# With fewer workers than PARALLEL_MIN_JOBS that overhead eats the gain,
+# and below PARALLEL_MIN_LINES starting the workers does.
+PARALLEL_MIN_JOBS = 4
+PARALLEL_MIN_LINES = 100000
+
+
+# Assembler and source lines of a worker process of parse_parallel, set by
+# init_worker.
+worker_assembler = None
+worker_lines = None
+
+
+def init_worker(table, lines):
+    """Initializer of the parse_parallel process pool. The symbol table and
+    the source are sent once per worker, inherited without copying where
+    workers are forked, and chunks are only passed as line ranges.
+
+    Args:
+        table (dict): Symbol table with labels and variables.
+        lines (list): (line number, line) pairs of lines with code, see
+            source_lines.
+    """
+    global worker_assembler
+    global worker_lines
+    worker_assembler = Assembler(None, None)
+    worker_assembler.sym_table.table = table
+    worker_lines = lines
+
+
+def encode_chunk(start, stop):
+    """Encodes consecutive source lines whose symbols are all in the
+    table of the worker.
+    Runs in the worker processes, so it only takes and returns picklable values.
+
+    Args:
+        start (int): First line to encode, an index into the lines of the
+            worker.
+        stop (int): End of the lines to encode.
+
+    Returns:
+        tuple: (machine code, error messages, True if errors were found)
+    """
+    assembler = worker_assembler
+    assembler.machine_code = []
+    assembler.error_found = False
+    errors = io.StringIO()
+    with contextlib.redirect_stderr(errors):
+        for line_num, line in worker_lines[start:stop]:
+            assembler.line_num = line_num
+            machine_instruction = assembler.parse_code(line)
+            if machine_instruction is not None:
+                assembler.machine_code.append(machine_instruction)
+    return (assembler.machine_code, errors.getvalue(), assembler.error_found)
+
+
 class Assembler():
     """Class for parsing and assembling HACK ASM files
     """
 
+    # Labels can only be jumped to from within the assembled file.
+    EXPORTS_LABELS = False
+
+    # Lines can be encoded independently once labels and variables are
+    # known, see parse_parallel.
+    PARALLEL_ENCODING = True
+
     def __init__(self, infile, outfile):
         """Constructor for Assembler objects.
 
@@ -75,10 +146,10 @@ class Assembler():
         self.variable_address = 16
 
     def setup_infile(self):
-        """Opens the provided file and stores the file object in infile_p attribute.
+        """Reads the provided file and stores the SourceReader in infile_p attribute.
         """
         try:
-            self.infile_p = open(self.infile_path, mode='r', encoding='UTF-8')
+            self.infile_p = SourceReader(self.infile_path)
         except Exception as any_exception:
             sys.stderr.write(f"Could not read input file {self.infile_path}\n")
             sys.stderr.write(f"Exception {any_exception}\n")
@@ -145,6 +216,19 @@ class Assembler():
         self.sym_table.add_entry("SCREEN", 16384)
         self.sym_table.add_entry("KBD", 24576)
 
+    def optimize_control_flow(self):
+        """Optional pass to be called before build_symbol_table.
+        Threads jump chains and removes unreachable code, see
+        ControlFlowOptimizer. The optimized program replaces the input, so
+        both passes and label addresses work on it unchanged. Line numbers
+        in error messages refer to the optimized program.
+        """
+        self._reset_inputfile()
+        optimizer = ControlFlowOptimizer(self.infile_p.readlines(), self.EXPORTS_LABELS)
+        lines = optimizer.optimize()
+        self.infile_p.close()
+        self.infile_p = io.StringIO("\n".join(lines) + "\n")
+
     def build_symbol_table(self):
         """
         First Pass on the input file.
@@ -157,12 +241,11 @@ class Assembler():
         # pointing to same address.
         unassigned_symbols = []
         address = 0
-        for line in self.infile_p.readlines():
+        for line in source_lines(self.infile_p):
             self.line_num = self.line_num + 1
-            line = line.strip()
 
             # Skip comments and empty lines
-            if len(line) == 0 or line[0:2] == '//':
+            if len(line) == 0:
                 continue
 
             # Collect unassigned symbols
@@ -187,12 +270,58 @@ class Assembler():
         """Iterates over the input file and parses it line by line.
         """
         self._reset_inputfile()
-        for line in self.infile_p.readlines():
+        for line in source_lines(self.infile_p):
             self.line_num = self.line_num + 1
-            machine_instruction = self.parse_line(line)
+            machine_instruction = self.parse_code(line)
             if machine_instruction is not None:
                 self.machine_code.append(machine_instruction)
 
+    def allocate_variables(self, lines):
+        """Assigns addresses to variables in order of their first use, as
+        parse would. To be called after build_symbol_table.
+
+        Args:
+            lines (list): (line number, line) pairs of lines with code.
+        """
+        for unused, line in lines:
+            if line[0] != "@":
+                continue
+            symbol = line[1:]
+            if not symbol.isnumeric() and not self.sym_table.contains(symbol):
+                self.sym_table.add_entry(symbol, self.variable_address)
+                self.variable_address = self.variable_address + 1
+
+    def parse_parallel(self, jobs=None):
+        """Same as parse, but encodes chunks of the file in a process pool.
+        Variables are allocated up front by allocate_variables, so every
+        chunk only looks symbols up and the chunks are joined in order.
+        Small files, fewer than PARALLEL_MIN_JOBS workers and assemblers
+        which cannot encode lines independently are parsed serially.
+
+        Args:
+            jobs (int): Worker processes, defaults to the number of CPUs.
+        """
+        jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+        self._reset_inputfile()
+        source = source_lines(self.infile_p)
+        lines = [(line_num, line) for line_num, line in enumerate(source, start=1) if len(line) != 0]
+        if not self.PARALLEL_ENCODING or jobs < PARALLEL_MIN_JOBS or len(lines) < PARALLEL_MIN_LINES:
+            self.parse()
+            return
+
+        self.allocate_variables(lines)
+        chunk_size = -(-len(lines) // jobs)
+        starts = range(0, len(lines), chunk_size)
+        with ProcessPoolExecutor(
+            max_workers=len(starts), initializer=init_worker, initargs=(self.sym_table.table, lines)
+        ) as pool:
+            results = list(pool.map(encode_chunk, starts, [start + chunk_size for start in starts]))
+        for machine_code, errors, error_found in results:
+            self.machine_code.extend(machine_code)
+            sys.stderr.write(errors)
+            self.error_found = self.error_found or error_found
+        self.line_num = len(source)
+
     def write_outfile(self):
         """Write to output file if there were no errors
         """
@@ -220,8 +349,18 @@ class Assembler():
         if comment_start != -1:
             line = line[0:comment_start]
 
-        line = line.strip()
+        return self.parse_code(line.strip())
 
+    def parse_code(self, line):
+        """Same as parse_line, for a line which is already without comments
+        and surrounding white space, as returned by source_lines.
+
+        Args:
+            line (str): line from source code file.
+
+        Returns:
+            str: Machine code translation of the input line.
+        """
         if len(line) == 0:
             return None
         elif line[0] == "(":
@@ -315,19 +454,28 @@ def print_help():
     usage = '''
     HACK Assembler
     Usage:
-        hasm.py <input file> <output file>
+        hasm.py <input file> <output file> [--optimize-cfg] [--parallel]
+
+    --optimize-cfg  thread jump chains and remove unreachable code
+    --parallel      encode large files in one process per CPU
     '''
     print(usage)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
+    options = sys.argv[3:]
+    if len(sys.argv) < 3 or not set(options) <= {"--optimize-cfg", "--parallel"}:
         print_help()
     else:
         assembler = Assembler(sys.argv[1], sys.argv[2])
         assembler.setup_infile()
+        if "--optimize-cfg" in options:
+            assembler.optimize_control_flow()
         assembler.seed_symbol_table()
         assembler.build_symbol_table()
-        assembler.parse()
+        if "--parallel" in options:
+            assembler.parse_parallel()
+        else:
+            assembler.parse()
         assembler.write_outfile()
     sys.exit(0)
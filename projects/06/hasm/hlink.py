@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+
+import sys
+from hobj import ObjectFile
+
+# A-Instructions carry a 15 bit value.
+MAX_ADDRESS = 32767
+
+
+class Linker():
+    """Links relocatable object files produced by hobj.py into a .hack file.
+
+    Modules are laid out in command line order. Labels defined in any module
+    are global, the remaining referenced symbols are variables and are
+    allocated from address 16 in order of first use, exactly as if the
+    modules had been concatenated and assembled together.
+    """
+
+    def __init__(self, infiles, outfile):
+        """Constructor for Linker objects.
+
+        Args:
+            infiles (list): Object file paths in link order.
+            outfile (str): Output .hack file.
+        """
+        self.infile_paths = infiles
+        self.outfile_path = outfile
+        self.objects = []
+        self.error_found = False
+        self.globals = {}
+        self.variable_address = 16
+        self.machine_code = []
+
+    def read_objects(self):
+        """Reads every input object file.
+        """
+        for path in self.infile_paths:
+            try:
+                with open(path, mode='r', encoding='UTF-8') as infile_p:
+                    self.objects.append(ObjectFile.read(infile_p))
+            except Exception as any_exception:
+                sys.stderr.write(f"Could not read object file {path}\n")
+                sys.stderr.write(f"Exception {any_exception}\n")
+                sys.exit(1)
+
+    def assign_addresses(self):
+        """Assigns a base address to every module and collects global labels.
+
+        Returns:
+            list: Base address of each module.
+        """
+        bases = []
+        base = 0
+        for index, obj in enumerate(self.objects):
+            bases.append(base)
+            for symbol, offset in obj.definitions.items():
+                if symbol in self.globals:
+                    self.error_found = True
+                    sys.stderr.write(f"FATAL {self._name(index)}: Duplicate label {symbol}\n")
+                else:
+                    self.globals[symbol] = base + offset
+            base = base + len(obj.code)
+
+        if base > MAX_ADDRESS + 1:
+            self.error_found = True
+            sys.stderr.write(f"FATAL: Program of {base} instructions does not fit in ROM\n")
+        return bases
+
+    def resolve(self, symbol):
+        """Returns the final address of a referenced symbol, allocating a
+        variable on first use.
+
+        Args:
+            symbol (str): Referenced symbol.
+
+        Returns:
+            int: Address.
+        """
+        address = self.globals.get(symbol)
+        if address is None:
+            address = self.variable_address
+            self.globals[symbol] = address
+            self.variable_address = self.variable_address + 1
+        return address
+
+    def link(self):
+        """Relocates and resolves every module into self.machine_code.
+        """
+        bases = self.assign_addresses()
+        for index, (obj, base) in enumerate(zip(self.objects, bases)):
+            code = list(obj.code)
+            for offset in obj.relocations:
+                try:
+                    code[offset] = f"{int(code[offset], 2) + base:016b}"
+                except (IndexError, ValueError):
+                    self.error_found = True
+                    sys.stderr.write(f"FATAL {self._name(index)}: Bad relocation at offset {offset}\n")
+
+            # Variables must be allocated in order of first use.
+            for offset, symbol in sorted(obj.references):
+                if not 0 <= offset < len(code):
+                    self.error_found = True
+                    sys.stderr.write(f"FATAL {self._name(index)}: Bad reference at offset {offset}\n")
+                    continue
+                code[offset] = f"{self.resolve(symbol):016b}"
+            self.machine_code.extend(code)
+
+    def write_outfile(self):
+        """Write to output file if there were no errors
+        """
+        if self.error_found is False:
+            try:
+                with open(self.outfile_path, mode='w', encoding='UTF-8') as outfile_p:
+                    for code in self.machine_code:
+                        outfile_p.write(f"{code}\n")
+            except Exception as any_exception:
+                sys.stderr.write(f"Could not open output file {self.outfile_path}\n")
+                sys.stderr.write(f"Exception {any_exception}\n")
+                sys.exit(1)
+
+    def _name(self, index):
+        if index < len(self.infile_paths):
+            return self.infile_paths[index]
+        return f"object {index}"
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Linker
+    Usage:
+        hlink.py <output .hack file> <input .hobj files...>
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print_help()
+    else:
+        linker = Linker(sys.argv[2:], sys.argv[1])
+        linker.read_objects()
+        linker.link()
+        linker.write_outfile()
+    sys.exit(0)
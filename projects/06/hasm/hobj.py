@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+
+import sys
+from hasm import Assembler
+from source_reader import source_lines
+
+OBJECT_MAGIC = "HOBJ 1"
+
+
+class ObjectFile():
+    """In memory representation of a relocatable HACK object file.
+
+    The on-disk format is line oriented text:
+        HOBJ 1
+        CODE <16 bit word>      one line per instruction, in order
+        DEF <symbol> <offset>   label defined at a module relative offset
+        RELOC <offset>          word holds a module relative code address
+        REF <offset> <symbol>   word holds the address of an undefined symbol,
+                                resolved by the linker to a label defined in
+                                another module or to a variable.
+    """
+
+    def __init__(self):
+        self.code = []
+        self.definitions = {}
+        self.relocations = []
+        self.references = []
+
+    def write(self, outfile_p):
+        """Writes the object file.
+
+        Args:
+            outfile_p (file): Opened output file.
+        """
+        outfile_p.write(f"{OBJECT_MAGIC}\n")
+        for word in self.code:
+            outfile_p.write(f"CODE {word}\n")
+        for symbol, offset in self.definitions.items():
+            outfile_p.write(f"DEF {symbol} {offset}\n")
+        for offset in self.relocations:
+            outfile_p.write(f"RELOC {offset}\n")
+        for offset, symbol in self.references:
+            outfile_p.write(f"REF {offset} {symbol}\n")
+
+    @staticmethod
+    def read(infile_p):
+        """Reads an object file.
+
+        Args:
+            infile_p (file): Opened input file.
+
+        Raises:
+            ValueError: If the file is not a valid object file.
+
+        Returns:
+            ObjectFile: Parsed object.
+        """
+        obj = ObjectFile()
+        lines = infile_p.read().splitlines()
+        if len(lines) == 0 or lines[0] != OBJECT_MAGIC:
+            raise ValueError("not a HACK object file")
+
+        for line_num, line in enumerate(lines[1:], start=2):
+            fields = line.split()
+            if len(fields) == 2 and fields[0] == "CODE":
+                obj.code.append(fields[1])
+            elif len(fields) == 3 and fields[0] == "DEF":
+                obj.definitions[fields[1]] = int(fields[2])
+            elif len(fields) == 2 and fields[0] == "RELOC":
+                obj.relocations.append(int(fields[1]))
+            elif len(fields) == 3 and fields[0] == "REF":
+                obj.references.append((int(fields[1]), fields[2]))
+            elif len(fields) != 0:
+                raise ValueError(f"line {line_num}: malformed entry {line}")
+        return obj
+
+
+class ObjectAssembler(Assembler):
+    """Assembles a single module into a relocatable ObjectFile instead of
+    final machine code. Labels are assigned module relative addresses and
+    every symbol which is neither predefined nor a local label is left for
+    the linker.
+    """
+
+    # Every label is a definition other modules may jump to.
+    EXPORTS_LABELS = True
+
+    # Relocations and references are recorded at the offset of each
+    # instruction as it is encoded.
+    PARALLEL_ENCODING = False
+
+    def __init__(self, infile, outfile):
+        super().__init__(infile, outfile)
+        self.obj = ObjectFile()
+        self.predefined = set()
+
+    def seed_symbol_table(self):
+        super().seed_symbol_table()
+        self.predefined = set(self.sym_table.table)
+
+    def build_symbol_table(self):
+        super().build_symbol_table()
+
+        # Labels at the end of the module are followed by no instruction, so
+        # the base pass leaves them out. They mark the end of the module's
+        # code, where the linker places the next module.
+        self._reset_inputfile()
+        lines = [line for line in source_lines(self.infile_p) if len(line) != 0]
+        size = sum(1 for line in lines if line[0] != "(")
+        for line in reversed(lines):
+            if line[0] != "(":
+                break
+            self.sym_table.add_entry(line[1:-1], size)
+
+        for symbol, address in self.sym_table.table.items():
+            if symbol not in self.predefined:
+                self.obj.definitions[symbol] = address
+
+    def process_a_instruction(self, line):
+        """Generates machine code of A-Instruction, recording a relocation or
+        an external reference for symbolic operands.
+
+        Args:
+            line (str): A-Instruction.
+        """
+        symbol = line[1:]
+        offset = len(self.machine_code)
+        if symbol.isnumeric():
+            address = int(symbol)
+        elif symbol in self.obj.definitions:
+            address = self.obj.definitions[symbol]
+            self.obj.relocations.append(offset)
+        elif self.sym_table.contains(symbol):
+            address = self.sym_table.get_address(symbol)
+        else:
+            address = 0
+            self.obj.references.append((offset, symbol))
+
+        return f"{address:016b}"
+
+    def write_outfile(self):
+        """Write the object file if there were no errors
+        """
+        if self.error_found is False:
+            self.setup_outfile()
+            self.obj.code = self.machine_code
+            self.obj.write(self.outfile_p)
+            self.outfile_p.flush()
+        self._clean_up()
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Assembler, relocatable object output
+    Usage:
+        hobj.py <input file> <output .hobj file> [--optimize-cfg]
+
+    --optimize-cfg  thread jump chains and remove unreachable code
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4) or (len(sys.argv) == 4 and sys.argv[3] != "--optimize-cfg"):
+        print_help()
+    else:
+        assembler = ObjectAssembler(sys.argv[1], sys.argv[2])
+        assembler.setup_infile()
+        if len(sys.argv) == 4:
+            assembler.optimize_control_flow()
+        assembler.seed_symbol_table()
+        assembler.build_symbol_table()
+        assembler.parse()
+        assembler.write_outfile()
+    sys.exit(0)
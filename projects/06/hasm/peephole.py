@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+
+import json
+import os
+import sys
+from superopt import TABLE_VERSION
+from superopt import canonicalize
+
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rewrite_table.json")
+
+
+class PeepholeOptimizer():
+    """Applies a rewrite table produced by superopt.py to HACK assembly.
+
+    Labels and jump instructions end a straight line block, rules are only
+    applied inside blocks. Every window of a block is canonicalized and
+    looked up in the table, longest window first, until no rule matches.
+    Comments and blank lines are dropped.
+    """
+
+    def __init__(self, table_path=DEFAULT_TABLE):
+        """Constructor for PeepholeOptimizer
+
+        Args:
+            table_path (str): Rewrite table written by superopt.py.
+        """
+        with open(table_path, mode='r', encoding='UTF-8') as table_p:
+            table = json.load(table_p)
+        if table["version"] != TABLE_VERSION:
+            raise ValueError(f"Unsupported rewrite table version {table['version']}")
+        self.rules = {
+            tuple(window.split("\n")): tuple(replacement.split("\n")) if len(replacement) != 0 else ()
+            for window, replacement in table["rules"].items()
+        }
+        self.max_window = max((len(window) for window in self.rules), default=0)
+        self.rewrites = 0
+
+    def rewrite_block(self, block):
+        """Rewrites a straight line block until no rule matches.
+
+        Args:
+            block (list): A- and C-Instructions.
+
+        Returns:
+            list: Rewritten instructions.
+        """
+        start = 0
+        while start < len(block):
+            for length in range(min(self.max_window, len(block) - start), 0, -1):
+                window, operands = canonicalize(block[start:start + length])
+                replacement = self.rules.get(window)
+                if replacement is None:
+                    continue
+                block[start:start + length] = [
+                    f"@{operands[instruction[1:]]}" if instruction[0] == "@" else instruction
+                    for instruction in replacement
+                ]
+                self.rewrites = self.rewrites + 1
+                # The replacement may complete a window that starts earlier.
+                start = max(start - self.max_window + 1, 0)
+                break
+            else:
+                start = start + 1
+        return block
+
+    def optimize(self, lines):
+        """Returns the optimized program.
+
+        Args:
+            lines (list): ASM lines.
+
+        Returns:
+            list: ASM lines.
+        """
+        optimized = []
+        block = []
+        for line in lines:
+            comment_start = line.find("//")
+            if comment_start != -1:
+                line = line[0:comment_start]
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            if line[0] == "(" or ";" in line:
+                optimized.extend(self.rewrite_block(block))
+                optimized.append(line)
+                block = []
+            else:
+                block.append(line)
+        optimized.extend(self.rewrite_block(block))
+        return optimized
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Peephole Optimizer
+    Rewrites .asm files with the table written by superopt.py
+    Usage:
+        peephole.py <input .asm file> <output .asm file> [rewrite table]
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4):
+        print_help()
+    else:
+        try:
+            with open(sys.argv[1], mode='r', encoding='UTF-8') as infile_p:
+                source = infile_p.read().splitlines()
+        except Exception as any_exception:
+            sys.stderr.write(f"Could not read input file {sys.argv[1]}\n")
+            sys.stderr.write(f"Exception {any_exception}\n")
+            sys.exit(1)
+        optimizer = PeepholeOptimizer(*sys.argv[3:])
+        optimized = optimizer.optimize(source)
+        with open(sys.argv[2], mode='w', encoding='UTF-8') as outfile_p:
+            for line in optimized:
+                outfile_p.write(f"{line}\n")
+        print(f"{optimizer.rewrites} rewrites")
+    sys.exit(0)
@@ -0,0 +1,75 @@
+import io
+import re
+
+COMMENT_RE = re.compile(r"//[^\r\n]*")
+
+
+class SourceReader():
+    """Source file read once and kept in memory.
+
+    The file is decoded when it is opened and its code lines are split out
+    the first time lines is called: comments are cut out with one regex
+    pass and what is left is split and stripped in one go. Later passes
+    over the source reuse the result instead of reading and stripping the
+    file again. Besides lines it offers the readlines, seek and close of an
+    open text file, so it can stand in for one as infile_p.
+    """
+
+    def __init__(self, path):
+        """Constructor for SourceReader
+
+        Args:
+            path (str): Source file.
+        """
+        self.path = path
+        self.code = None
+        # Line endings are kept as they are, like readlines of the file.
+        with open(path, mode='r', encoding='UTF-8', newline='') as infile_p:
+            self.text = infile_p.read()
+
+    def lines(self):
+        """Returns every line without comments and surrounding white space,
+        lines without code are empty.
+
+        Returns:
+            list: Lines as str, line n of the file at index n - 1.
+        """
+        if self.code is None:
+            text = self.text
+            if text.find("//") != -1:
+                text = COMMENT_RE.sub("", text)
+            if text.find("\r") != -1:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            self.code = list(map(str.strip, text.split("\n")))
+        return self.code
+
+    def readlines(self):
+        """Returns all lines, like readlines of a text file.
+        """
+        return io.StringIO(self.text, newline="").readlines()
+
+    def seek(self, offset):
+        """Every scan starts at the beginning of the file, so there is
+        nothing to rewind.
+        """
+        if offset != 0:
+            raise ValueError("SourceReader can only seek to the start")
+
+    def close(self):
+        self.text = ""
+
+
+def source_lines(infile_p):
+    """Returns the lines of a SourceReader or of an open text file, such as
+    the io.StringIO sources of hackd, without comments and surrounding
+    white space.
+
+    Args:
+        infile_p (SourceReader or file): Source.
+
+    Returns:
+        list: Lines as str, line n of the file at index n - 1.
+    """
+    if isinstance(infile_p, SourceReader):
+        return infile_p.lines()
+    return list(map(str.strip, COMMENT_RE.sub("", infile_p.read()).split("\n")))
@@ -0,0 +1,370 @@
+#!/usr/bin/python3
+
+import functools
+import json
+import os
+import random
+import sys
+from hasm import COMP_MICROCODE
+from hasm import DEST_MICROCODE
+
+HACKEMU_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools", "hackemu")
+sys.path.append(HACKEMU_DIR)
+
+from hackemu import alu
+
+# Sequences are canonical when instructions are written without spaces,
+# destinations are sorted, and the operands of A-Instructions are renamed
+# to s0, s1, ... in order of first appearance. Equivalence is checked for
+# all values of those symbols, so a rule is valid for any operand.
+SYMBOLS = ["s0", "s1"]
+
+C_INSTRUCTIONS = [
+    f"{dest}={comp}" for dest in sorted(DEST_MICROCODE) for comp in COMP_MICROCODE
+]
+
+# Machine states used to fingerprint candidates, and the larger set every
+# rule must pass before it is accepted.
+FINGERPRINT_TRIALS = 12
+VERIFY_TRIALS = 256
+
+TABLE_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def parse_instruction(instruction):
+    """Splits a jump free C-Instruction into its parts.
+
+    Args:
+        instruction (str): Canonical C-Instruction.
+
+    Returns:
+        tuple: (dest, reads M, zx nx zy ny f no bits of the ALU), dest may
+            be empty.
+    """
+    if "=" in instruction:
+        dest, comp = instruction.split("=")
+    else:
+        dest, comp = "", instruction
+    comp_bits = COMP_MICROCODE[comp]
+    return dest, comp_bits[0] == "1", int(comp_bits[1:], 2)
+
+
+def random_value(rng):
+    # Small values make A, D and the symbols alias each other and the
+    # RAM words they point to, which is where most wrong rules fail.
+    if rng.random() < 0.5:
+        return rng.randrange(4)
+    return rng.randrange(0x10000)
+
+
+@functools.lru_cache(maxsize=None)
+def initial_registers(seed):
+    """Returns (A, D, symbol values) of the initial state of a trial.
+
+    Args:
+        seed (int): Trial seed.
+    """
+    rng = random.Random(seed)
+    a = random_value(rng)
+    d = random_value(rng)
+    symbols = {symbol: random_value(rng) for symbol in SYMBOLS}
+    return a, d, symbols
+
+
+class MachineState():
+    """Lazily initialised Hack machine state for one trial.
+    Every RAM word not written yet reads a pseudo random value derived from
+    the trial seed, so both sides of a comparison see the same memory.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.a, self.d, self.symbols = initial_registers(seed)
+        self.written = {}
+
+    def symbol(self, name):
+        value = self.symbols.get(name)
+        if value is None:
+            # Only reached when checking windows wider than the table.
+            value = hash((self.seed, name)) & 0x7FFF
+        return value
+
+    def initial(self, address):
+        return hash((self.seed, address)) & 0xFFFF
+
+    def read(self, address):
+        value = self.written.get(address)
+        if value is None:
+            value = self.initial(address)
+        return value
+
+    def run(self, sequence):
+        """Executes a canonical sequence.
+
+        Args:
+            sequence (tuple): Canonical instructions.
+        """
+        for instruction in sequence:
+            if instruction[0] == "@":
+                self.a = self.symbol(instruction[1:])
+                continue
+            dest, reads_m, control = parse_instruction(instruction)
+            out = alu(control, self.d, self.read(self.a) if reads_m else self.a)
+            if "M" in dest:
+                self.written[self.a] = out
+            if "D" in dest:
+                self.d = out
+            if "A" in dest:
+                self.a = out
+
+    def outcome(self):
+        """Returns the observable result: registers and changed RAM words.
+        """
+        memory = tuple(sorted(
+            (address, value) for address, value in self.written.items()
+            if value != self.initial(address)
+        ))
+        return (self.a, self.d, memory)
+
+
+def behaviour(sequence, seeds):
+    """Returns the outcomes of a sequence over a list of trial seeds.
+
+    Args:
+        sequence (tuple): Canonical instructions.
+        seeds (range): Trial seeds.
+
+    Returns:
+        tuple: One outcome per trial.
+    """
+    outcomes = []
+    for seed in seeds:
+        state = MachineState(seed)
+        state.run(sequence)
+        outcomes.append(state.outcome())
+    return tuple(outcomes)
+
+
+def canonicalize(instructions):
+    """Returns the canonical form of a jump free window and the mapping from
+    canonical symbols back to the original operands.
+
+    Args:
+        instructions (list): A- and C-Instructions without labels or jumps.
+
+    Returns:
+        tuple: (canonical tuple or None, dict symbol -> operand). None when the
+            window has more distinct operands than SYMBOLS or unknown parts.
+    """
+    canonical = []
+    operands = {}
+    for instruction in instructions:
+        instruction = instruction.replace(" ", "").replace("\t", "")
+        if instruction[0] == "@":
+            operand = instruction[1:]
+            if operand not in operands:
+                if len(operands) == len(SYMBOLS):
+                    return None, None
+                operands[operand] = SYMBOLS[len(operands)]
+            canonical.append(f"@{operands[operand]}")
+            continue
+
+        if ";" in instruction:
+            return None, None
+        if "=" in instruction:
+            dest, comp = instruction.split("=")
+            dest = "".join(sorted(dest))
+            if dest not in DEST_MICROCODE:
+                return None, None
+            instruction = f"{dest}={comp}"
+        else:
+            comp = instruction
+        if comp not in COMP_MICROCODE:
+            return None, None
+        canonical.append(instruction)
+    return tuple(canonical), {symbol: operand for operand, symbol in operands.items()}
+
+
+def enumerate_sequences(max_length, canonical=True):
+    """Yields every sequence of up to max_length instructions.
+
+    Args:
+        max_length (int): Longest sequence.
+        canonical (bool): Only yield canonical sequences, otherwise symbols
+            may appear in any order.
+    """
+    yield ()
+    frontier = [((), 0)]
+    for _ in range(max_length):
+        next_frontier = []
+        for sequence, symbol_count in frontier:
+            alphabet = [(f"@{SYMBOLS[index]}", symbol_count) for index in range(symbol_count)]
+            if symbol_count < len(SYMBOLS):
+                alphabet.append((f"@{SYMBOLS[symbol_count]}", symbol_count + 1))
+            if not canonical:
+                alphabet.extend((f"@{symbol}", symbol_count) for symbol in SYMBOLS[symbol_count + 1:])
+            alphabet.extend((instruction, symbol_count) for instruction in C_INSTRUCTIONS)
+            for instruction, new_count in alphabet:
+                extended = sequence + (instruction,)
+                next_frontier.append((extended, new_count))
+                yield extended
+        frontier = next_frontier
+
+
+class Superoptimizer():
+    """Finds the shortest equivalent replacement of instruction windows.
+
+    Every sequence of up to max_length instructions is fingerprinted by its
+    behaviour on FINGERPRINT_TRIALS machine states. A window is rewritten to
+    the shortest enumerated sequence with the same fingerprint, once that
+    candidate also agrees on VERIFY_TRIALS further states. Replacements
+    preserve A, D and memory exactly, so a rule is valid whatever follows.
+    """
+
+    def __init__(self, max_length):
+        """Constructor for Superoptimizer
+
+        Args:
+            max_length (int): Longest enumerated sequence.
+        """
+        self.max_length = max_length
+        self.fingerprint_seeds = range(FINGERPRINT_TRIALS)
+        self.verify_seeds = range(FINGERPRINT_TRIALS, FINGERPRINT_TRIALS + VERIFY_TRIALS)
+        self.candidates = {}
+        self.fingerprints = {}
+        self.rules = {}
+
+    def fingerprint(self, sequence):
+        fingerprint = self.fingerprints.get(sequence)
+        if fingerprint is None:
+            fingerprint = behaviour(sequence, self.fingerprint_seeds)
+        return fingerprint
+
+    def build_candidates(self):
+        """Indexes every enumerated sequence by fingerprint, keeping the
+        shortest (first enumerated) sequence for each behaviour.
+        """
+        for sequence in enumerate_sequences(self.max_length, canonical=False):
+            fingerprint = behaviour(sequence, self.fingerprint_seeds)
+            self.fingerprints[sequence] = fingerprint
+            if fingerprint not in self.candidates:
+                self.candidates[fingerprint] = sequence
+
+    def optimize(self, window):
+        """Returns a verified shorter replacement for a canonical window.
+
+        Args:
+            window (tuple): Canonical instructions.
+
+        Returns:
+            tuple: Replacement, or None if none was found.
+        """
+        candidate = self.candidates.get(self.fingerprint(window))
+        if candidate is None or len(candidate) >= len(window):
+            return None
+        # The replacement can only name operands the window provides.
+        if not {instruction for instruction in candidate if instruction[0] == "@"} <= set(window):
+            return None
+        if behaviour(candidate, self.verify_seeds) != behaviour(window, self.verify_seeds):
+            return None
+        return candidate
+
+    def is_minimal(self, window):
+        """A window only needs a rule of its own when none of its proper
+        sub-windows can be rewritten already.
+        """
+        for length in range(1, len(window)):
+            for start in range(0, len(window) - length + 1):
+                if window[start:start + length] in self.rules:
+                    return False
+        return True
+
+    def add_window(self, window):
+        if window in self.rules or not self.is_minimal(window):
+            return
+        replacement = self.optimize(window)
+        if replacement is not None:
+            self.rules[window] = replacement
+
+    def search(self, corpus_windows=()):
+        """Builds the rule set from every enumerated sequence and from the
+        given windows, shortest first so that minimality can be checked.
+
+        Args:
+            corpus_windows (iterable): Extra canonical windows to optimize.
+        """
+        self.build_candidates()
+        windows = set(enumerate_sequences(self.max_length))
+        windows.update(corpus_windows)
+        for window in sorted(windows, key=lambda window: (len(window), window)):
+            if len(window) != 0:
+                self.add_window(window)
+
+    def save(self, path):
+        table = {
+            "version": TABLE_VERSION,
+            "max_length": self.max_length,
+            "rules": {"\n".join(window): "\n".join(replacement) for window, replacement in sorted(self.rules.items())}
+        }
+        with open(path, mode='w', encoding='UTF-8') as table_p:
+            json.dump(table, table_p, indent=1)
+            table_p.write("\n")
+
+
+def corpus_windows(paths, window_length):
+    """Collects canonical straight line windows from .asm files.
+
+    Args:
+        paths (list): .asm files.
+        window_length (int): Longest window.
+
+    Returns:
+        set: Canonical windows.
+    """
+    windows = set()
+    for path in paths:
+        with open(path, mode='r', encoding='UTF-8') as asm_p:
+            block = []
+            for line in asm_p.read().splitlines():
+                comment_start = line.find("//")
+                if comment_start != -1:
+                    line = line[0:comment_start]
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                if line[0] == "(" or ";" in line:
+                    block = []
+                    continue
+                block.append(line)
+                for length in range(2, min(window_length, len(block)) + 1):
+                    window, operands = canonicalize(block[-length:])
+                    if window is not None:
+                        windows.add(window)
+    return windows
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Superoptimizer
+    Enumerates instruction sequences and writes a rewrite table for peephole.py
+    Usage:
+        superopt.py <output table> <max length> [window length <.asm files>...]
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or not sys.argv[2].isnumeric() or (len(sys.argv) > 3 and not sys.argv[3].isnumeric()):
+        print_help()
+    else:
+        windows = set()
+        if len(sys.argv) > 3:
+            windows = corpus_windows(sys.argv[4:], int(sys.argv[3]))
+        superoptimizer = Superoptimizer(int(sys.argv[2]))
+        superoptimizer.search(windows)
+        superoptimizer.save(sys.argv[1])
+        print(f"{len(superoptimizer.rules)} rules")
+    sys.exit(0)
@@ -0,0 +1,118 @@
+import io
+import unittest
+from cfg import ControlFlowOptimizer
+from hasm import Assembler
+from hobj import ObjectAssembler
+
+
+def optimize(source, exported_labels=False):
+    optimizer = ControlFlowOptimizer(source.splitlines(), exported_labels)
+    return optimizer.optimize(), optimizer
+
+
+class TestControlFlowOptimizer(unittest.TestCase):
+
+    def test_jump_threading(self):
+        lines, optimizer = optimize("""
+            @x
+            D=M
+            @FIRST
+            D;JGT       // conditional jump into a chain
+            @SECOND
+            0;JMP
+            (FIRST)
+            @SECOND
+            0;JMP
+            (SECOND)
+            @END
+            0;JMP
+            (END)
+            @END
+            0;JMP
+        """)
+        self.assertEqual(lines, ["@x", "D=M", "@END", "D;JGT", "@END", "0;JMP", "(END)", "@END", "0;JMP"])
+        self.assertEqual(optimizer.threaded_jumps, 3)
+        self.assertEqual(optimizer.removed_instructions, 4)
+
+    def test_unreachable_code(self):
+        lines, optimizer = optimize("""
+            @LOOP
+            0;JMP
+            D=D+1       // no label leads here
+            @R0
+            (LOOP)
+            @RETURN
+            D=A
+            @R15
+            M=D
+            @LOOP
+            0;JMP
+            (DEAD)
+            M=0
+            (RETURN)    // only reached through an address
+            D=0
+            @R15
+            A=M
+            0;JMP
+        """)
+        self.assertNotIn("(DEAD)", lines)
+        self.assertNotIn("D=D+1", lines)
+        self.assertIn("(RETURN)", lines)
+        self.assertEqual(optimizer.removed_instructions, 3)
+
+    def test_jump_writing_a(self):
+        # The jumps go to the address written to A, not to the label loaded
+        # before them, so neither is threaded through the trampoline.
+        for jump in ("A=D;JMP", "AM=M-1;JMP"):
+            source = f"@R15\nD=M\n@TRAMPOLINE\n{jump}\n(TRAMPOLINE)\n@END\n0;JMP\n(END)\n@END\n0;JMP\n"
+            lines, optimizer = optimize(source)
+            self.assertIn("@TRAMPOLINE", lines)
+            self.assertEqual(optimizer.threaded_jumps, 0)
+
+    def test_unchanged_programs(self):
+        # A jump to a numeric address relies on the layout of the program.
+        source = "@2\n0;JMP\nD=0\n"
+        lines, optimizer = optimize(source)
+        self.assertEqual(lines, ["@2", "0;JMP", "D=0"])
+
+        # The address of DEAD is only loaded as a number and jumped to later.
+        source = "@{}\nD={}\n@R5\nM=D\n{}\n0;JMP\n(END)\n@END\n0;JMP\n(DEAD)\nD=0\n"
+        lines, optimizer = optimize(source.format(9, "A", "@R5\nA=M"))
+        self.assertIn("(DEAD)", lines)
+        self.assertEqual(optimizer.removed_instructions, 0)
+        # Numbers in programs without computed jumps, used as RAM addresses
+        # or past the end of the program do not stop the optimization.
+        for number, computation, jump in ((9, "A", "@END"), (9, "M", "@R5\nA=M"), (100, "A", "@R5\nA=M")):
+            lines, optimizer = optimize(source.format(number, computation, jump))
+            self.assertNotIn("(DEAD)", lines)
+
+        # In an object file every label can be entered from another module.
+        source = "@END\n0;JMP\n(Foo.bar)\nD=0\n(END)\n@END\n0;JMP\n"
+        lines, optimizer = optimize(source, exported_labels=True)
+        self.assertIn("(Foo.bar)", lines)
+        lines, optimizer = optimize(source)
+        self.assertNotIn("(Foo.bar)", lines)
+
+    def test_assembler_labels(self):
+        source = "@SKIP\n0;JMP\n(UNUSED)\n@SKIP\n0;JMP\n(SKIP)\n@SKIP\n0;JMP\n"
+
+        assembler = Assembler(None, None)
+        assembler.infile_p = io.StringIO(source)
+        assembler.optimize_control_flow()
+        assembler.seed_symbol_table()
+        assembler.build_symbol_table()
+        assembler.parse()
+        self.assertFalse(assembler.sym_table.contains("UNUSED"))
+        self.assertEqual(assembler.sym_table.get_address("SKIP"), 2)
+        self.assertEqual(len(assembler.machine_code), 4)
+
+        assembler = ObjectAssembler(None, None)
+        assembler.infile_p = io.StringIO(source)
+        assembler.optimize_control_flow()
+        assembler.seed_symbol_table()
+        assembler.build_symbol_table()
+        self.assertEqual(assembler.obj.definitions, {"UNUSED": 2, "SKIP": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
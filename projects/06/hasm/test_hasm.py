@@ -1,6 +1,12 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
+import hasm
 from hasm import Assembler
 
+PONG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pong", "Pong.asm")
+
 class TestAssembler(unittest.TestCase):
 
     def test_a_instruction(self):
@@ -42,5 +48,36 @@ class TestAssembler(unittest.TestCase):
         self.assertEqual(a.process_a_instruction(asm_code_1), "0000000000000011")
         self.assertEqual(a.process_a_instruction(asm_code_2), None)
 
+    def test_parse_parallel(self):
+        with open(PONG, mode='r', encoding='UTF-8') as asm_p:
+            source = asm_p.read()
+        fd, path = tempfile.mkstemp(suffix=".asm")
+        with os.fdopen(fd, mode='w', encoding='UTF-8') as asm_p:
+            asm_p.write(source + "@new_variable\nM=D\n")
+
+        try:
+            assemblers = []
+            for jobs in (None, 3):
+                a = Assembler(path, None)
+                a.setup_infile()
+                a.seed_symbol_table()
+                a.build_symbol_table()
+                if jobs is None:
+                    a.parse()
+                else:
+                    # Pong is below the size worth encoding in parallel.
+                    with mock.patch.object(hasm, "PARALLEL_MIN_JOBS", 2), mock.patch.object(hasm, "PARALLEL_MIN_LINES", 0):
+                        a.parse_parallel(jobs)
+                a._clean_up()
+                assemblers.append(a)
+        finally:
+            os.remove(path)
+
+        serial, parallel = assemblers
+        self.assertEqual(parallel.machine_code, serial.machine_code)
+        self.assertEqual(parallel.sym_table.table, serial.sym_table.table)
+        self.assertEqual(parallel.variable_address, serial.variable_address)
+        self.assertFalse(parallel.error_found)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import io
+import os
+import unittest
+from unittest import mock
+from hobj import ObjectAssembler
+from hobj import ObjectFile
+from hlink import Linker
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def assemble_object(source):
+    assembler = ObjectAssembler(None, None)
+    assembler.infile_p = io.StringIO(source)
+    assembler.seed_symbol_table()
+    assembler.build_symbol_table()
+    assembler.parse()
+    assembler.obj.code = assembler.machine_code
+
+    # Round trip through the on-disk format.
+    buffer = io.StringIO()
+    assembler.obj.write(buffer)
+    buffer.seek(0)
+    return ObjectFile.read(buffer)
+
+
+def link(objects):
+    linker = Linker([], None)
+    linker.objects = objects
+    linker.link()
+    return linker
+
+
+class TestLinker(unittest.TestCase):
+
+    def test_object_entries(self):
+        obj = assemble_object("(START)\n@x\nM=0\n@START\n0;JMP\n@SCREEN\n@other\n")
+
+        self.assertEqual(obj.definitions, {"START": 0})
+        self.assertEqual(obj.relocations, [2])
+        self.assertEqual(obj.references, [(0, "x"), (5, "other")])
+        self.assertEqual(obj.code[4], f"{16384:016b}")
+
+    def test_cross_module_symbols(self):
+        main = assemble_object("@x\nM=1\n@FUNC\n0;JMP\n(END)\n@END\n0;JMP\n")
+        func = assemble_object("(FUNC)\n@y\nM=0\n@x\nM=0\n@END\n0;JMP\n")
+        linker = link([main, func])
+
+        self.assertFalse(linker.error_found)
+        code = [int(word, 2) for word in linker.machine_code]
+        self.assertEqual(code[0], 16)       # x
+        self.assertEqual(code[2], 6)        # FUNC, base of second module
+        self.assertEqual(code[4], 4)        # END, relocated local label
+        self.assertEqual(code[6], 17)       # y
+        self.assertEqual(code[8], 16)       # x is shared
+        self.assertEqual(code[10], 4)       # END, external reference
+
+    def test_label_ending_a_module(self):
+        first = assemble_object("@NEXT\n0;JMP\n(NEXT)\n")
+        self.assertEqual(first.definitions, {"NEXT": 2})
+        self.assertEqual(first.references, [])
+
+        second = assemble_object("D=0\n@NEXT\n0;JMP\n")
+        linker = link([first, second])
+        self.assertFalse(linker.error_found)
+        code = [int(word, 2) for word in linker.machine_code]
+        self.assertEqual(code[0], 2)        # NEXT, start of the second module
+        self.assertEqual(code[3], 2)        # NEXT, external reference
+
+    def test_corrupt_relocation(self):
+        obj = assemble_object("(START)\n@START\n0;JMP\n")
+        obj.code[0] = "junk"
+        obj.relocations.append(7)
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.assertTrue(link([obj]).error_found)
+        self.assertIn("Bad relocation at offset 0", stderr.getvalue())
+        self.assertIn("Bad relocation at offset 7", stderr.getvalue())
+
+    def test_duplicate_label(self):
+        first = assemble_object("(LOOP)\n@LOOP\n0;JMP\n")
+        second = assemble_object("(LOOP)\n@LOOP\n0;JMP\n")
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            self.assertTrue(link([first, second]).error_found)
+
+    def test_split_program_matches_whole_program(self):
+        with open(os.path.join(PROJECT_DIR, "pong", "Pong.asm"), encoding='UTF-8') as asm_file:
+            lines = asm_file.readlines()
+        with open(os.path.join(PROJECT_DIR, "pong", "Pong.hack"), encoding='UTF-8') as hack_file:
+            expected = hack_file.read().split()
+
+        # Split right after labels too, so that labels end modules.
+        cuts = [0]
+        for fraction in (0.25, 0.5, 0.75):
+            cut = int(len(lines) * fraction)
+            while not lines[cut - 1].startswith("("):
+                cut = cut + 1
+            cuts.append(cut)
+        cuts.append(len(lines))
+
+        objects = [assemble_object("".join(lines[start:end])) for start, end in zip(cuts, cuts[1:])]
+        self.assertEqual(link(objects).machine_code, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import io
+import os
+import tempfile
+import unittest
+from source_reader import SourceReader
+from source_reader import source_lines
+
+SOURCE = "// Header\r\n@2\r\n\r\n  D=A  // two\r\n(LOOP)\n\t0;JMP\n// End"
+
+
+class TestSourceReader(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".asm")
+        with os.fdopen(fd, mode='wb') as source_p:
+            source_p.write(SOURCE.encode("UTF-8"))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_lines(self):
+        reader = SourceReader(self.path)
+        lines = source_lines(reader)
+        self.assertEqual(lines, ["", "@2", "", "D=A", "(LOOP)", "0;JMP", ""])
+        self.assertIs(source_lines(reader), lines)
+        self.assertEqual(reader.readlines(), io.StringIO(SOURCE, newline="").readlines())
+        reader.close()
+
+        # Text files give the same lines, as hackd passes io.StringIO.
+        self.assertEqual(source_lines(io.StringIO(SOURCE.replace("\r\n", "\n"))), lines)
+
+    def test_empty_file(self):
+        with open(self.path, mode='wb'):
+            pass
+        reader = SourceReader(self.path)
+        self.assertEqual(source_lines(reader), [""])
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
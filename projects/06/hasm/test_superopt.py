@@ -0,0 +1,91 @@
+import os
+import unittest
+from peephole import PeepholeOptimizer
+from superopt import Superoptimizer
+from superopt import alu
+from superopt import behaviour
+from superopt import canonicalize
+from superopt import parse_instruction
+from hasm import COMP_MICROCODE
+
+VM2ASM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "07", "vm2asm")
+
+VERIFY_SEEDS = range(1000, 1512)
+
+
+def blocks(lines):
+    """Splits ASM lines into straight line blocks and the lines ending them."""
+    current = []
+    for line in lines:
+        if line[0] == "(" or ";" in line:
+            yield current, line
+            current = []
+        else:
+            current.append(line)
+    yield current, None
+
+
+def normalize(line, rename):
+    if line[0] == "@":
+        return rename[line]
+    return canonicalize([line])[0][0]
+
+
+class TestSuperoptimizer(unittest.TestCase):
+
+    def test_alu(self):
+        # The superoptimizer evaluates instructions with the emulator's ALU.
+        self.assertEqual(parse_instruction("DM=M-D"), ("DM", True, int(COMP_MICROCODE["M-D"][1:], 2)))
+        self.assertEqual(alu(parse_instruction("D+A")[2], 5, 7), 12)
+        self.assertEqual(alu(parse_instruction("M-D")[2], 5, 3), 0xFFFE)
+        self.assertEqual(alu(parse_instruction("!D")[2], 0, 0), 0xFFFF)
+        self.assertEqual(alu(parse_instruction("D|M")[2], 0b1010, 0b0101), 0b1111)
+
+    def test_canonicalize(self):
+        window, operands = canonicalize(["@SP", "MD = M-1", "@LCL", "A=M", "@SP"])
+        self.assertEqual(window, ("@s0", "DM=M-1", "@s1", "A=M", "@s0"))
+        self.assertEqual(operands, {"s0": "SP", "s1": "LCL"})
+
+        self.assertEqual(canonicalize(["@R1", "@R2", "@R3"]), (None, None))
+        self.assertEqual(canonicalize(["D;JGT"]), (None, None))
+
+    def test_search(self):
+        superoptimizer = Superoptimizer(1)
+        superoptimizer.search([("@s0", "@s1"), ("M=M+1", "M=M-1"), ("D=0", "D=D+1"), ("@s0", "D=M", "@s1", "M=D")])
+        rules = superoptimizer.rules
+
+        self.assertEqual(rules[("D=D",)], ())
+        self.assertEqual(rules[("@s0", "@s1")], ("@s1",))
+        self.assertEqual(rules[("M=M+1", "M=M-1")], ())
+        self.assertEqual(rules[("D=0", "D=D+1")], ("D=1",))
+        # A copy between two operands has no shorter form.
+        self.assertNotIn(("@s0", "D=M", "@s1", "M=D"), rules)
+
+    def test_peephole_preserves_behaviour(self):
+        with open(os.path.join(VM2ASM_DIR, "os", "Math.asm"), mode='r', encoding='UTF-8') as asm_p:
+            source = asm_p.read().splitlines()
+        source.extend(["@SP", "M=M-1", "@SP", "A=M", "D=M", "@SP", "M=M+1", "@SP", "M=M-1"])
+
+        optimizer = PeepholeOptimizer()
+        optimized = optimizer.optimize(source)
+        self.assertGreater(optimizer.rewrites, 0)
+        self.assertEqual(optimized[-4:], ["@SP", "AM=M-1", "D=M", "@SP"])
+
+        original = [line.split("//")[0].strip() for line in source]
+        original_blocks = list(blocks([line for line in original if len(line) != 0]))
+        optimized_blocks = list(blocks(optimized))
+        self.assertEqual([end for block, end in original_blocks], [end for block, end in optimized_blocks])
+        for (before, end), (after, unused) in zip(original_blocks, optimized_blocks):
+            # Blocks with many operands are checked with every operand renamed
+            # to a symbol of its own, which is exactly what the rules assume.
+            operands = sorted({line[1:] for line in before if line[0] == "@"})
+            rename = {f"@{operand}": f"@s{index}" for index, operand in enumerate(operands)}
+            before = tuple(normalize(line, rename) for line in before)
+            after = tuple(normalize(line, rename) for line in after)
+            with self.subTest(end=end):
+                self.assertLessEqual(len(after), len(before))
+                self.assertEqual(behaviour(after, VERIFY_SEEDS), behaviour(before, VERIFY_SEEDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,22 @@ FUNCTION_COMMANDS = {
     "function", "call", "return"
 }
 
+# Operations applied in place on the second stack slot, D holds the top.
+IN_PLACE_OPERATIONS = {
+    "add": "M=D+M",
+    "sub": "M=M-D",
+    "and": "M=D&M",
+    "or": "M=D|M",
+    "neg": "M=-M",
+    "not": "M=!M"
+}
+
+COMPARE_JUMPS = {
+    "lt": "JLT",
+    "eq": "JEQ",
+    "gt": "JGT"
+}
+
 DYNAMIC_ADDRESS_SEGMENTS = {
     "local": "LCL",
     "argument": "ARG",
@@ -28,6 +44,68 @@ FIXED_ADDRESS_SEGMENTS = {
     "constant": 0
 }
 
+# Instruction counts of the sequences load_actual_address can emit, as a
+# function of the segment index.
+#   direct      @addr                                 temp, pointer, static
+#   indirect    @SEG, A=M or A=M+1, A=A+1 ...         dynamic segments
+#   computed    @SEG, D=M, @i, A=D+A                  dynamic segments, clobbers D
+LOAD_ADDRESS_COSTS = {
+    "direct": lambda index: 1,
+    "indirect": lambda index: 2 + max(index - 1, 0),
+    "computed": lambda index: 4
+}
+
+# Instruction counts of the sequences handle_pop can emit.
+#   direct      @SP, AM=M-1, D=M, @addr, M=D
+#   indirect    @SP, AM=M-1, D=M, @SEG, A=M or A=M+1, A=A+1 ..., M=D
+#   computed    @SEG, D=M, @i, D=D+A, @SP, AM=M-1, D=D+M, A=D-M, M=D-A
+# computed keeps address + value in D and separates them again with A=D-M
+# and M=D-A, so no pop ever needs to park the target address in R13.
+POP_COSTS = {
+    "direct": lambda index: 5,
+    "indirect": lambda index: 6 + max(index - 1, 0),
+    "computed": lambda index: 9
+}
+
+
+# With track_sp the stack pointer in RAM may lag the VM stack top by up to
+# this many slots before the difference is written back mid-block.
+SP_OFFSET_LIMIT = 3
+
+
+def instruction_count(instructions):
+    """Returns the number of machine instructions in a list of ASM lines,
+    comments and label declarations excluded.
+
+    Args:
+        instructions (list): List of ASM lines.
+
+    Returns:
+        int: Instruction count.
+    """
+    return sum(
+        1 for instruction in instructions
+        if len(instruction) != 0 and instruction[0] != "(" and instruction[0:2] != "//"
+    )
+
+
+def addressing_strategy(segment, index, costs):
+    """Returns the cheapest addressing strategy for a segment and index.
+    On a tie indirect wins over computed since it leaves D untouched.
+
+    Args:
+        segment (str): Memory segment, other than constant.
+        index (int): Index within the segment.
+        costs (dict): LOAD_ADDRESS_COSTS or POP_COSTS.
+
+    Returns:
+        str: direct, indirect or computed.
+    """
+    if DYNAMIC_ADDRESS_SEGMENTS.get(segment) is None:
+        return "direct"
+    return min(("indirect", "computed"), key=lambda strategy: costs[strategy](index))
+
+
 class ASMCodeGenException(Exception):
     """Exception class for raising all sorts of error occurring during the 
     translation process
@@ -47,11 +125,21 @@ class ASMCodeGenException(Exception):
 
 class ASMCode():
     """Class implementing the code generation logic.
+
+    With track_sp the stack pointer is tracked statically within a basic
+    block: sp_offset holds the distance between the VM stack top and M[SP],
+    stack slots are addressed as M[SP] + k, and the net adjustment is only
+    written to SP at labels, jumps, calls and returns (see commit_sp).
     """
 
-    def __init__(self, vmfile_name):
+    def __init__(self, vmfile_name, track_sp=False):
         self.label_count = 0
         self.vmfile_name = vmfile_name
+        self.current_function = None
+        self.defined_functions = set()
+        self.called_functions = set()
+        self.track_sp = track_sp
+        self.sp_offset = 0
 
     def get_label(self):
         """Returns a label which can be used for 
@@ -111,14 +199,14 @@ class ASMCode():
                 elif not args[1].isnumeric():
                     raise ASMCodeGenException(f"{command} should have a valid variable count\n")
                 else:
-                    return self.handle_function(args[0], args[1])
+                    return self.handle_function(args[0], int(args[1]))
             elif command == "call":
                 if len(args) != 2:
                     raise ASMCodeGenException(f"{command} should have exactly 2 arguments\n")
                 elif not args[1].isnumeric():
                     raise ASMCodeGenException(f"{command} should have a valid argument count\n")
                 else:
-                    return self.handle_function(args[0], args[1])
+                    return self.handle_call(args[0], int(args[1]))
             elif command == "return":
                 return self.handle_return()            
         else:
@@ -135,6 +223,9 @@ class ASMCode():
         Returns:
             (list): List of ASM instructions.
         """
+        if self.track_sp:
+            return self.tracked_push(segment, index)
+
         if segment == "constant":
             instructions = self.load_constant(index, "D")
             instructions.extend(self.push("D"))
@@ -147,8 +238,9 @@ class ASMCode():
             return instructions
 
     def handle_pop(self, segment, index):
-        """Generates code for push command.
-        push command pushes the value stored in segment[address] in the stack.
+        """Generates code for pop command.
+        pop command pops the top of the stack and stores it in segment[address].
+        The sequence is picked by POP_COSTS, see addressing_strategy.
 
         Args:
             segment (str): Memory segment.
@@ -157,22 +249,186 @@ class ASMCode():
         Returns:
             (list): List of ASM instructions.
         """
-        instructions = self.load_actual_address(segment, index)
-        instructions.extend([
+        if segment == "constant":
+            raise ASMCodeGenException("cannot pop to the constant segment\n")
+
+        if self.track_sp:
+            return self.tracked_pop(segment, index)
+
+        strategy = addressing_strategy(segment, index, POP_COSTS)
+        if strategy == "computed":
+            segment_symbol = DYNAMIC_ADDRESS_SEGMENTS.get(segment)
+            return [
+                f"@{segment_symbol}",
+                "D=M",
+                f"@{index}",
+                "D=D+A",
+                "// POP FROM STACK",
+                "@SP",
+                "AM=M-1",
+                "D=D+M",       # D = address + value
+                "A=D-M",       # A = address
+                "M=D-A"        # M = value
+            ]
+
+        instructions = [
+            "// POP FROM STACK",
+            "@SP",
+            "AM=M-1",
+            "D=M"
+        ]
+        if strategy == "indirect":
+            instructions.extend(self.indirect_address(segment, index))
+        else:
+            instructions.extend(self.load_actual_address(segment, index))
+        instructions.append("M=D")
+        return instructions
+
+    def stack_address(self, offset):
+        """Generates instructions which load M[SP] + offset into A, leaving
+        D intact.
+
+        Args:
+            offset (int): Slot relative to M[SP].
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        if offset == 0:
+            return ["@SP", "A=M"]
+        if offset > 0:
+            return ["@SP", "A=M+1"] + ["A=A+1"] * (offset - 1)
+        return ["@SP", "A=M-1"] + ["A=A-1"] * (-offset - 1)
+
+    def commit_sp(self, preserve_d=False):
+        """Writes the tracked stack pointer offset back to SP.
+
+        Args:
+            preserve_d (bool): D holds a live value.
+
+        Returns:
+            (list): List of ASM instructions, empty if SP is up to date.
+        """
+        offset = self.sp_offset
+        self.sp_offset = 0
+        if offset == 0:
+            return []
+        if preserve_d or abs(offset) <= 2:
+            step = "M=M+1" if offset > 0 else "M=M-1"
+            return ["// COMMIT SP", "@SP"] + [step] * abs(offset)
+        return [
+            "// COMMIT SP",
+            f"@{abs(offset)}",
             "D=A",
-            "@R13",
-            "M=D"
-        ])
-        instructions.extend(self.pop("D"))
-        instructions.extend([
-            "@R13",
-            "A=M",
-            "M=D"
-        ])
+            "@SP",
+            "M=D+M" if offset > 0 else "M=M-D"
+        ]
+
+    def limit_sp_offset(self):
+        """Commits the offset between two commands once addressing the
+        stack top would take more instructions than writing SP back.
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        if abs(self.sp_offset) >= SP_OFFSET_LIMIT:
+            return self.commit_sp()
+        return []
+
+    def tracked_push(self, segment, index):
+        """Generates code for push command with a tracked stack pointer.
+
+        Args:
+            segment (str): Memory segment.
+            index (int): Index within the memory segment.
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        instructions = self.limit_sp_offset()
+        if segment == "constant" and index in (0, 1):
+            instructions.extend(self.stack_address(self.sp_offset))
+            instructions.append(f"M={index}")
+        else:
+            if segment == "constant":
+                instructions.extend(self.load_constant(index, "D"))
+            else:
+                instructions.extend(self.load_actual_address(segment, index))
+                instructions.append("D=M")
+            instructions.extend(self.stack_address(self.sp_offset))
+            instructions.append("M=D")
+        self.sp_offset = self.sp_offset + 1
+        return instructions
+
+    def tracked_pop(self, segment, index):
+        """Generates code for pop command with a tracked stack pointer.
+        The sequence is picked by POP_COSTS like handle_pop.
+
+        Args:
+            segment (str): Memory segment.
+            index (int): Index within the memory segment.
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        instructions = self.limit_sp_offset()
+        self.sp_offset = self.sp_offset - 1
+        strategy = addressing_strategy(segment, index, POP_COSTS)
+        if strategy == "computed":
+            instructions.extend([
+                f"@{DYNAMIC_ADDRESS_SEGMENTS.get(segment)}",
+                "D=M",
+                f"@{index}",
+                "D=D+A"
+            ])
+            instructions.extend(self.stack_address(self.sp_offset))
+            instructions.extend([
+                "D=D+M",       # D = address + value
+                "A=D-M",       # A = address
+                "M=D-A"        # M = value
+            ])
+            return instructions
+
+        instructions.extend(self.stack_address(self.sp_offset))
+        instructions.append("D=M")
+        if strategy == "indirect":
+            instructions.extend(self.indirect_address(segment, index))
+        else:
+            instructions.extend(self.load_actual_address(segment, index))
+        instructions.append("M=D")
+        return instructions
+
+    def finish(self):
+        """Returns the instructions ending a translation unit, so that SP is
+        up to date when the last command falls off the end.
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        return self.commit_sp()
+
+    def indirect_address(self, segment, index):
+        """Generates instructions which load the address of a dynamic segment
+        entry by following the segment pointer and stepping A, leaving D intact.
+
+        Args:
+            segment (str): Dynamic segment.
+            index (int): Index within the segment.
+
+        Returns:
+            (list): List of ASM instructions.
+        """
+        instructions = [
+            f"@{DYNAMIC_ADDRESS_SEGMENTS.get(segment)}",
+            "A=M" if index == 0 else "A=M+1"
+        ]
+        instructions.extend(["A=A+1"] * max(index - 1, 0))
         return instructions
 
     def load_actual_address(self, segment, index):
         """Generates instructions to load the actual address for a given segment and index.
+        The sequence is picked by LOAD_ADDRESS_COSTS, see addressing_strategy.
+        Only the computed sequence modifies D.
 
         Args:
             segment (str): Segment
@@ -204,12 +460,16 @@ class ASMCode():
             
         if DYNAMIC_ADDRESS_SEGMENTS.get(segment) is not None:
             segment_symbol = DYNAMIC_ADDRESS_SEGMENTS.get(segment)
-            instructions = [
-                f"@{segment_symbol}",
-                "D=M",
-                f"@{index}",
-                "A=A+D"
-            ]
+            strategy = addressing_strategy(segment, index, LOAD_ADDRESS_COSTS)
+            if strategy == "indirect":
+                instructions = self.indirect_address(segment, index)
+            else:
+                instructions = [
+                    f"@{segment_symbol}",
+                    "D=M",
+                    f"@{index}",
+                    "A=D+A"
+                ]
             return instructions
         return instructions
 
@@ -279,6 +539,9 @@ class ASMCode():
         Returns:
             (list): List of instructions.
         """
+        if self.track_sp:
+            return self.tracked_arithmetic_logical_2args(command)
+
         instructions = [f"// PROCESS COMMAND {command}"]
         fetch_arg_1 = self.pop("D")
         fetch_arg_2 = self.pop("M")
@@ -287,16 +550,16 @@ class ASMCode():
         operations = [] # D=D op M
 
         if command == "add":
-            operations = ["D=M+D"]
+            operations = ["D=D+M"]
 
         elif command == "sub":
             operations = ["D=M-D"]
 
         elif command == "and":
-            operations = ["D=M&D"]
+            operations = ["D=D&M"]
 
         elif command == "or":
-            operations = ["D=M|D"]
+            operations = ["D=D|M"]
 
         elif command == "lt":
             settrue_label = f"SETTRUE_{self.get_label()}"
@@ -352,6 +615,38 @@ class ASMCode():
         instructions.extend(store_result)
         return instructions
 
+    def tracked_arithmetic_logical_2args(self, command):
+        """Generates code for Arithmetic-Logical 2 Argument commands with a
+        tracked stack pointer. The result overwrites the second operand.
+
+        Returns:
+            (list): List of instructions.
+        """
+        instructions = self.limit_sp_offset()
+        instructions.append(f"// PROCESS COMMAND {command}")
+        instructions.extend(self.stack_address(self.sp_offset - 1))
+        instructions.extend(["D=M", "A=A-1"])
+        if command in COMPARE_JUMPS:
+            settrue_label = f"SETTRUE_{self.get_label()}"
+            jump_end_label = f"JUMP_END_{self.get_label()}"
+            instructions.extend([
+                "D=M-D",
+                f"@{settrue_label}",
+                f"D;{COMPARE_JUMPS[command]}",
+                "D=0",
+                f"@{jump_end_label}",
+                "0;JMP",
+                f"({settrue_label})",
+                "D=-1",
+                f"({jump_end_label})"
+            ])
+            instructions.extend(self.stack_address(self.sp_offset - 2))
+            instructions.append("M=D")
+        else:
+            instructions.append(IN_PLACE_OPERATIONS[command])
+        self.sp_offset = self.sp_offset - 1
+        return instructions
+
     def arithmetic_logical_1_arg(self, command):
         """Generates code for Arithmetic-Logical 2 Argument commands.
 
@@ -361,6 +656,13 @@ class ASMCode():
         Returns:
             (list): List of instructions.
         """
+        if self.track_sp:
+            instructions = self.limit_sp_offset()
+            instructions.append(f"// PROCESS COMMAND {command}")
+            instructions.extend(self.stack_address(self.sp_offset - 1))
+            instructions.append(IN_PLACE_OPERATIONS[command])
+            return instructions
+
         instructions = [f"// PROCESS COMMAND {command}"]
         fetch_arg_1 = self.pop("D")
         store_result = self.push("D")
@@ -377,6 +679,20 @@ class ASMCode():
         instructions.extend(store_result)
         return instructions
 
+    def scoped_label(self, label):
+        """Returns the assembly label for a VM label. Labels inside a function
+        are scoped as function$label so that functions can reuse label names.
+
+        Args:
+            label (str): VM label.
+
+        Returns:
+            str: Assembly label.
+        """
+        if self.current_function is None:
+            return label
+        return f"{self.current_function}${label}"
+
     def handle_label(self, label):
         """Generate instructions for VM command `label`
 
@@ -386,9 +702,8 @@ class ASMCode():
         Returns:
             (list): List of instructions.
         """
-        instructions = [
-            f"({label})"
-        ]
+        instructions = self.commit_sp()
+        instructions.append(f"({self.scoped_label(label)})")
         return instructions
 
     def handle_goto(self, label):
@@ -400,10 +715,11 @@ class ASMCode():
         Returns:
             (list): List of instructions.
         """
-        instructions = [
-            f"@{label}",
+        instructions = self.commit_sp()
+        instructions.extend([
+            f"@{self.scoped_label(label)}",
             "0;JMP"
-        ]
+        ])
         return instructions
 
     def handle_if_goto(self, label):
@@ -416,9 +732,15 @@ class ASMCode():
             (list): List of instructions.
         """
         instructions = ["// IF-GOTO"]
-        instructions.extend(self.pop("D"))
+        if self.track_sp:
+            self.sp_offset = self.sp_offset - 1
+            instructions.extend(self.stack_address(self.sp_offset))
+            instructions.append("D=M")
+            instructions.extend(self.commit_sp(preserve_d=True))
+        else:
+            instructions.extend(self.pop("D"))
         instructions.extend([
-            f"@{label}",
+            f"@{self.scoped_label(label)}",
             "D;JNE"
         ])
         instructions.extend(["// END IF-GOTO"])
@@ -432,16 +754,168 @@ class ASMCode():
             var_count (int): Count of local variables.
 
         Returns:
-            _type_: _description_
+            (list): List of instructions.
+        """
+        self.current_function = function_name
+        self.defined_functions.add(function_name)
+        instructions = self.commit_sp()
+        instructions.append(f"({function_name})")
+        if self.track_sp:
+            # Zero the locals walking A up the stack, then set SP once.
+            if var_count != 0:
+                instructions.extend(["@SP", "A=M", "M=0"])
+                instructions.extend(["A=A+1", "M=0"] * (var_count - 1))
+                instructions.extend(["D=A+1", "@SP", "M=D"])
+            return instructions
+        for _ in range(var_count):
+            instructions.extend(self.push("0"))
+        return instructions
+
+    def handle_call(self, function_name, arg_count):
+        """Generates instructions for function call.
+        Saves the return address and the caller's frame, repositions ARG and LCL
+        and jumps to the function.
+
+        Args:
+            function_name (str): Function name.
+            arg_count (int): Count of arguments already pushed by the caller.
+
+        Returns:
+            (list): List of instructions.
         """
+        self.called_functions.add(function_name)
+        return_label = f"RETURN_{self.get_label()}"
+        if self.track_sp:
+            return self.tracked_call(function_name, arg_count, return_label)
+
         instructions = [
-            f"{function_name}",
+            f"// CALL {function_name} {arg_count}",
+            f"@{return_label}",
+            "D=A"
         ]
-        instructions.extend(["push 0"] * var_count)
+        instructions.extend(self.push("D"))
+        for segment_symbol in ("LCL", "ARG", "THIS", "THAT"):
+            instructions.extend([
+                f"@{segment_symbol}",
+                "D=M"
+            ])
+            instructions.extend(self.push("D"))
+
+        instructions.extend([
+            # ARG = SP - 5 - arg_count
+            "@SP",
+            "D=M",
+            f"@{5 + arg_count}",
+            "D=D-A",
+            "@ARG",
+            "M=D",
+            # LCL = SP
+            "@SP",
+            "D=M",
+            "@LCL",
+            "M=D",
+            f"@{function_name}",
+            "0;JMP",
+            f"({return_label})"
+        ])
         return instructions
 
-    def handle_call(self, function_name, arg_count):
-        return []
+    def tracked_call(self, function_name, arg_count, return_label):
+        """Generates instructions for function call with a tracked stack
+        pointer. The frame is written above M[SP] and SP is set once.
+
+        Args:
+            function_name (str): Function name.
+            arg_count (int): Count of arguments already pushed by the caller.
+            return_label (str): Label of the return address.
+
+        Returns:
+            (list): List of instructions.
+        """
+        instructions = self.commit_sp()
+        instructions.extend([
+            f"// CALL {function_name} {arg_count}",
+            f"@{return_label}",
+            "D=A"
+        ])
+        instructions.extend(self.stack_address(0))
+        instructions.append("M=D")
+        for offset, segment_symbol in enumerate(("LCL", "ARG", "THIS", "THAT"), start=1):
+            instructions.extend([
+                f"@{segment_symbol}",
+                "D=M"
+            ])
+            instructions.extend(self.stack_address(offset))
+            instructions.append("M=D")
+
+        instructions.extend([
+            # SP = LCL = SP + 5
+            "@SP",
+            "D=M",
+            "@5",
+            "D=D+A",
+            "@SP",
+            "M=D",
+            "@LCL",
+            "M=D",
+            # ARG = SP - 5 - arg_count
+            f"@{5 + arg_count}",
+            "D=D-A",
+            "@ARG",
+            "M=D",
+            f"@{function_name}",
+            "0;JMP",
+            f"({return_label})"
+        ])
+        return instructions
 
     def handle_return(self):
-        return []
+        """Generates instructions for return.
+        R13 holds the frame pointer and R14 the return address.
+
+        Returns:
+            (list): List of instructions.
+        """
+        instructions = [
+            "// RETURN",
+            "@LCL",
+            "D=M",
+            "@R13",
+            "M=D",
+            "@5",
+            "A=D-A",
+            "D=M",
+            "@R14",
+            "M=D"
+        ]
+        if self.track_sp:
+            # SP is reset from ARG below, the offset is simply dropped.
+            instructions.extend(self.stack_address(self.sp_offset - 1))
+            instructions.append("D=M")
+            self.sp_offset = 0
+        else:
+            instructions.extend(self.pop("D"))
+        instructions.extend([
+            # *ARG = return value, SP = ARG + 1
+            "@ARG",
+            "A=M",
+            "M=D",
+            "@ARG",
+            "D=M+1",
+            "@SP",
+            "M=D"
+        ])
+        for segment_symbol in ("THAT", "THIS", "ARG", "LCL"):
+            instructions.extend([
+                "@R13",
+                "AM=M-1",
+                "D=M",
+                f"@{segment_symbol}",
+                "M=D"
+            ])
+        instructions.extend([
+            "@R14",
+            "A=M",
+            "0;JMP"
+        ])
+        return instructions
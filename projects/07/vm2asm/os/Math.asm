@@ -0,0 +1,198 @@
+// Native Math library.
+
+// Math.multiply(x, y): shift-and-add over the bits of y, stops as soon
+// as no set bits of y remain above the current mask.
+(Math.multiply)
+@ARG
+A=M
+D=M
+@OS.mul.x
+M=D
+@ARG
+A=M+1
+D=M
+@OS.mul.y
+M=D
+@OS.mul.sum
+M=0
+@OS.mul.mask
+M=1
+(OS.mul.LOOP)
+@OS.mul.mask
+D=M
+@OS.mul.y
+D=D&M
+@OS.mul.SKIP
+D;JEQ
+@OS.mul.x
+D=M
+@OS.mul.sum
+M=D+M
+(OS.mul.SKIP)
+@OS.mul.x
+D=M
+M=D+M
+@OS.mul.mask
+D=M
+MD=D+M
+@OS.mul.END
+D;JEQ
+// -mask has every bit at and above mask set
+D=-D
+@OS.mul.y
+D=D&M
+@OS.mul.LOOP
+D;JNE
+(OS.mul.END)
+@OS.mul.sum
+D=M
+@OS$RETURN
+0;JMP
+
+// Math.divide(x, y): unsigned restoring division of |x| by |y|, one
+// quotient bit per iteration, sign applied at the end. Division by
+// zero returns 0.
+(Math.divide)
+@OS.div.neg
+M=0
+@ARG
+A=M
+D=M
+@OS.div.x
+M=D
+@OS.div.XPOS
+D;JGE
+@OS.div.x
+M=-D
+@OS.div.neg
+M=!M
+(OS.div.XPOS)
+@ARG
+A=M+1
+D=M
+@OS.div.y
+M=D
+@OS.div.ZERO
+D;JEQ
+@OS.div.YPOS
+D;JGT
+@OS.div.y
+M=-D
+@OS.div.neg
+M=!M
+(OS.div.YPOS)
+@OS.div.q
+M=0
+@OS.div.r
+M=0
+@16
+D=A
+@OS.div.n
+M=D
+(OS.div.LOOP)
+// r = 2r + top bit of x, x = 2x, q = 2q
+@OS.div.r
+D=M
+M=D+M
+@OS.div.x
+D=M
+@OS.div.NOBIT
+D;JGE
+@OS.div.r
+M=M+1
+(OS.div.NOBIT)
+@OS.div.x
+D=M
+M=D+M
+@OS.div.q
+D=M
+M=D+M
+// if r >= y (unsigned) then r = r - y, q = q + 1
+@OS.div.r
+D=M
+@OS.div.SUB
+D;JLT
+@OS.div.y
+D=D-M
+@OS.div.NEXT
+D;JLT
+(OS.div.SUB)
+@OS.div.y
+D=M
+@OS.div.r
+M=M-D
+@OS.div.q
+M=M+1
+(OS.div.NEXT)
+@OS.div.n
+MD=M-1
+@OS.div.LOOP
+D;JGT
+@OS.div.neg
+D=M
+@OS.div.POS
+D;JEQ
+@OS.div.q
+M=-M
+(OS.div.POS)
+@OS.div.q
+D=M
+@OS$RETURN
+0;JMP
+(OS.div.ZERO)
+D=0
+@OS$RETURN
+0;JMP
+
+// Math.abs(x)
+(Math.abs)
+@ARG
+A=M
+D=M
+@OS$RETURN
+D;JGE
+D=-D
+@OS$RETURN
+0;JMP
+
+// Math.min(x, y)
+(Math.min)
+@ARG
+A=M+1
+D=M
+A=A-1
+D=M-D
+@OS.min.Y
+D;JGT
+@ARG
+A=M
+D=M
+@OS$RETURN
+0;JMP
+(OS.min.Y)
+@ARG
+A=M+1
+D=M
+@OS$RETURN
+0;JMP
+
+// Math.max(x, y)
+(Math.max)
+@ARG
+A=M+1
+D=M
+A=A-1
+D=M-D
+@OS.max.Y
+D;JLT
+@ARG
+A=M
+D=M
+@OS$RETURN
+0;JMP
+(OS.max.Y)
+@ARG
+A=M+1
+D=M
+@OS$RETURN
+0;JMP
@@ -0,0 +1,165 @@
+// Native Memory library.
+// The heap (2048..16383) is a first-fit free list. A free block holds its
+// size (header included) at block[0] and the next free block at block[1].
+// An allocated block keeps its size at block[0], the caller gets block+1.
+// The list is set up by the first Memory.alloc call.
+
+// Memory.peek(address)
+(Memory.peek)
+@ARG
+A=M
+A=M
+D=M
+@OS$RETURN
+0;JMP
+
+// Memory.poke(address, value)
+(Memory.poke)
+@ARG
+A=M+1
+D=M
+@ARG
+A=M
+A=M
+M=D
+D=0
+@OS$RETURN
+0;JMP
+
+// Memory.alloc(size)
+(Memory.alloc)
+@OS.mem.ready
+D=M
+@OS.mem.READY
+D;JNE
+@2048
+D=A
+@OS.mem.free
+M=D
+@14336
+D=A
+@2048
+M=D
+@2049
+M=0
+@OS.mem.ready
+M=1
+(OS.mem.READY)
+// need = max(size + 1, 2), a freed block must hold size and next
+@ARG
+A=M
+D=M+1
+@OS.mem.need
+M=D
+@2
+D=D-A
+@OS.mem.NEED_OK
+D;JGE
+@2
+D=A
+@OS.mem.need
+M=D
+(OS.mem.NEED_OK)
+@OS.mem.prev
+M=0
+@OS.mem.free
+D=M
+@OS.mem.cur
+M=D
+(OS.mem.SEARCH)
+@OS.mem.cur
+D=M
+@OS.mem.FAIL
+D;JEQ
+A=D
+D=M
+@OS.mem.need
+D=D-M
+@OS.mem.NEXT
+D;JLT
+@2
+D=D-A
+@OS.mem.TAKE
+D;JLT
+// Split: carve need words off the end of the current block.
+@OS.mem.need
+D=M
+@OS.mem.cur
+A=M
+M=M-D
+D=M
+@OS.mem.cur
+D=D+M
+@OS.mem.blk
+M=D
+@OS.mem.need
+D=M
+@OS.mem.blk
+A=M
+M=D
+D=A+1
+@OS$RETURN
+0;JMP
+// Remainder too small to split: unlink the whole block.
+(OS.mem.TAKE)
+@OS.mem.cur
+A=M+1
+D=M
+@OS.mem.next
+M=D
+@OS.mem.prev
+D=M
+@OS.mem.UNLINK_HEAD
+D;JEQ
+@OS.mem.next
+D=M
+@OS.mem.prev
+A=M+1
+M=D
+@OS.mem.TAKEN
+0;JMP
+(OS.mem.UNLINK_HEAD)
+@OS.mem.next
+D=M
+@OS.mem.free
+M=D
+(OS.mem.TAKEN)
+@OS.mem.cur
+D=M+1
+@OS$RETURN
+0;JMP
+(OS.mem.NEXT)
+@OS.mem.cur
+D=M
+@OS.mem.prev
+M=D
+A=D+1
+D=M
+@OS.mem.cur
+M=D
+@OS.mem.SEARCH
+0;JMP
+(OS.mem.FAIL)
+D=0
+@OS$RETURN
+0;JMP
+
+// Memory.deAlloc(object): pushes the block on the front of the free list.
+(Memory.deAlloc)
+@ARG
+A=M
+D=M-1
+@OS.mem.blk
+M=D
+@OS.mem.free
+D=M
+@OS.mem.blk
+A=M+1
+M=D
+@OS.mem.blk
+D=M
+@OS.mem.free
+M=D
+D=0
+@OS$RETURN
+0;JMP
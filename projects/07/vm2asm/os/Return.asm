@@ -0,0 +1,48 @@
+// Shared return sequence of the native OS library.
+// Library functions jump here with their return value in D. The frame
+// was built by a regular VM `call`, so this restores it exactly like
+// the code generated for the VM `return` command.
+(OS$RETURN)
+@R13
+M=D
+@LCL
+D=M
+@5
+A=D-A
+D=M
+@R14
+M=D
+@R13
+D=M
+@ARG
+A=M
+M=D
+@ARG
+D=M+1
+@SP
+M=D
+@LCL
+D=M
+@R13
+AM=D-1
+D=M
+@THAT
+M=D
+@R13
+AM=M-1
+D=M
+@THIS
+M=D
+@R13
+AM=M-1
+D=M
+@ARG
+M=D
+@R13
+AM=M-1
+D=M
+@LCL
+M=D
+@R14
+A=M
+0;JMP
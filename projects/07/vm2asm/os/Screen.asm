@@ -0,0 +1,272 @@
+// Native Screen library.
+// OS.scr.white is 0 while the color is black, so the default color is
+// black as in the Jack OS.
+
+// Screen.setColor(b)
+(Screen.setColor)
+@ARG
+A=M
+D=M
+@OS.scr.white
+M=-1
+@OS.scr.SET_WHITE
+D;JEQ
+@OS.scr.white
+M=0
+(OS.scr.SET_WHITE)
+D=0
+@OS$RETURN
+0;JMP
+
+// Screen.clearScreen()
+(Screen.clearScreen)
+@SCREEN
+D=A
+@OS.scr.addr
+M=D
+(OS.scr.CLEAR)
+@OS.scr.addr
+A=M
+M=0
+@OS.scr.addr
+MD=M+1
+@KBD
+D=D-A
+@OS.scr.CLEAR
+D;JLT
+D=0
+@OS$RETURN
+0;JMP
+
+// Screen.drawRectangle(x1, y1, x2, y2), x1 <= x2 and y1 <= y2.
+// Masks and word columns are computed once, then every row sets its
+// partial edge words through a mask and fills the words between them
+// one whole word at a time.
+(Screen.drawRectangle)
+@ARG
+A=M
+D=M
+@OS.scr.x1
+M=D
+@ARG
+A=M+1
+D=M
+@OS.scr.y1
+M=D
+@ARG
+D=M
+@2
+A=D+A
+D=M
+@OS.scr.x2
+M=D
+@ARG
+D=M
+@3
+A=D+A
+D=M
+@OS.scr.y1
+D=D-M
+@OS.scr.rows
+M=D+1
+// row = SCREEN + 32 * y1
+@OS.scr.y1
+D=M
+D=D+M
+@OS.scr.row
+M=D
+D=D+M
+M=D
+D=D+M
+M=D
+D=D+M
+M=D
+D=D+M
+@SCREEN
+D=D+A
+@OS.scr.row
+M=D
+// w1 = x1 / 16, lmask = -(1 << (x1 % 16))
+@OS.scr.w1
+M=0
+@OS.scr.x1
+D=M
+(OS.scr.DIV1)
+@16
+D=D-A
+@OS.scr.DIV1_END
+D;JLT
+@OS.scr.w1
+M=M+1
+@OS.scr.DIV1
+0;JMP
+(OS.scr.DIV1_END)
+@16
+D=D+A
+@OS.scr.k
+M=D
+@OS.scr.lmask
+M=1
+(OS.scr.LSHIFT)
+@OS.scr.k
+MD=M-1
+@OS.scr.LSHIFT_END
+D;JLT
+@OS.scr.lmask
+D=M
+M=D+M
+@OS.scr.LSHIFT
+0;JMP
+(OS.scr.LSHIFT_END)
+@OS.scr.lmask
+M=-M
+// w2 = x2 / 16, rmask = (1 << (x2 % 16 + 1)) - 1
+@OS.scr.w2
+M=0
+@OS.scr.x2
+D=M
+(OS.scr.DIV2)
+@16
+D=D-A
+@OS.scr.DIV2_END
+D;JLT
+@OS.scr.w2
+M=M+1
+@OS.scr.DIV2
+0;JMP
+(OS.scr.DIV2_END)
+@17
+D=D+A
+@OS.scr.k
+M=D
+@OS.scr.rmask
+M=1
+(OS.scr.RSHIFT)
+@OS.scr.k
+MD=M-1
+@OS.scr.RSHIFT_END
+D;JLT
+@OS.scr.rmask
+D=M
+M=D+M
+@OS.scr.RSHIFT
+0;JMP
+(OS.scr.RSHIFT_END)
+@OS.scr.rmask
+M=M-1
+// fill = word written between the edges
+@OS.scr.white
+D=!M
+@OS.scr.fill
+M=D
+// A single column rectangle uses both masks on one word.
+@OS.scr.w1
+D=M
+@OS.scr.w2
+D=D-M
+@OS.scr.ROW
+D;JNE
+@OS.scr.rmask
+D=M
+@OS.scr.lmask
+M=D&M
+(OS.scr.ROW)
+@OS.scr.row
+D=M
+@OS.scr.w1
+D=D+M
+@OS.scr.addr
+M=D
+@OS.scr.lmask
+D=M
+@OS.scr.mask
+M=D
+@OS.scr.w1
+D=M
+@OS.scr.w2
+D=D-M
+@OS.scr.MIDDLE
+D;JNE
+@OS.scr.ROW_NEXT
+D=A
+@OS.scr.ret
+M=D
+@OS.scr.APPLY
+0;JMP
+(OS.scr.MIDDLE)
+@OS.scr.ROW_EDGE
+D=A
+@OS.scr.ret
+M=D
+@OS.scr.APPLY
+0;JMP
+(OS.scr.ROW_EDGE)
+@OS.scr.w2
+D=M
+@OS.scr.w1
+D=D-M
+D=D-1
+@OS.scr.n
+M=D
+(OS.scr.FILL)
+@OS.scr.n
+MD=M-1
+@OS.scr.FILL_END
+D;JLT
+@OS.scr.fill
+D=M
+@OS.scr.addr
+AM=M+1
+M=D
+@OS.scr.FILL
+0;JMP
+(OS.scr.FILL_END)
+@OS.scr.addr
+M=M+1
+@OS.scr.rmask
+D=M
+@OS.scr.mask
+M=D
+@OS.scr.ROW_NEXT
+D=A
+@OS.scr.ret
+M=D
+@OS.scr.APPLY
+0;JMP
+(OS.scr.ROW_NEXT)
+@32
+D=A
+@OS.scr.row
+M=D+M
+@OS.scr.rows
+MD=M-1
+@OS.scr.ROW
+D;JGT
+D=0
+@OS$RETURN
+0;JMP
+
+// Sets (black) or clears (white) the bits of OS.scr.mask in the word at
+// OS.scr.addr, then jumps to OS.scr.ret.
+(OS.scr.APPLY)
+@OS.scr.white
+D=M
+@OS.scr.APPLY_WHITE
+D;JNE
+@OS.scr.mask
+D=M
+@OS.scr.addr
+A=M
+M=D|M
+@OS.scr.ret
+A=M
+0;JMP
+(OS.scr.APPLY_WHITE)
+@OS.scr.mask
+D=!M
+@OS.scr.addr
+A=M
+M=D&M
+@OS.scr.ret
+A=M
+0;JMP
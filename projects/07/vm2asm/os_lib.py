@@ -0,0 +1,96 @@
+import os
+
+OS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "os")
+
+# OS classes with a native implementation, one .asm file per class.
+OS_CLASSES = ["Math", "Memory", "Screen"]
+
+# Shared return sequence used by every native function.
+RETURN_UNIT = "Return"
+
+
+class OSLibrary():
+    """Hand written HACK assembly implementations of Jack OS functions.
+
+    Native functions are entered through the regular VM `call` sequence and
+    leave through the same frame restore as the VM `return` command, so calls
+    to them are translated exactly like calls to compiled functions.
+
+    A class is linked as a whole, only when the program calls at least one of
+    its functions, calls nothing the native version lacks, and does not define
+    any function of that class itself. Native classes keep their own state, so
+    mixing them with a compiled version of the same class is never safe.
+    """
+
+    def __init__(self, os_dir=OS_DIR):
+        """Constructor for OSLibrary
+
+        Args:
+            os_dir (str): Directory holding the native .asm files.
+        """
+        self.os_dir = os_dir
+        self.units = {}
+
+    def load_unit(self, name):
+        """Returns the lines of a native .asm file and the functions it
+        defines, reading the file on first use.
+
+        Args:
+            name (str): OS class name.
+
+        Returns:
+            tuple: (list of ASM lines, set of function names)
+        """
+        if name not in self.units:
+            path = os.path.join(self.os_dir, f"{name}.asm")
+            with open(path, mode='r', encoding='UTF-8') as unit_p:
+                lines = unit_p.read().splitlines()
+            functions = {
+                line[1:-1] for line in lines
+                if line.startswith(f"({name}.") and line.endswith(")")
+            }
+            self.units[name] = (lines, functions)
+        return self.units[name]
+
+    def select(self, defined_functions, called_functions):
+        """Returns the OS classes to be linked.
+
+        Args:
+            defined_functions (set): Functions defined by the program.
+            called_functions (set): Functions called by the program.
+
+        Returns:
+            list: OS class names.
+        """
+        selected = []
+        for name in OS_CLASSES:
+            prefix = f"{name}."
+            calls = {function for function in called_functions if function.startswith(prefix)}
+            if len(calls) == 0:
+                continue
+            if any(function.startswith(prefix) for function in defined_functions):
+                continue
+            lines, functions = self.load_unit(name)
+            if calls <= functions:
+                selected.append(name)
+        return selected
+
+    def link(self, defined_functions, called_functions):
+        """Returns the native code needed by a program.
+
+        Args:
+            defined_functions (set): Functions defined by the program.
+            called_functions (set): Functions called by the program.
+
+        Returns:
+            list: ASM lines, empty if nothing is linked.
+        """
+        selected = self.select(defined_functions, called_functions)
+        if len(selected) == 0:
+            return []
+
+        instructions = []
+        for name in selected + [RETURN_UNIT]:
+            lines, functions = self.load_unit(name)
+            instructions.extend(lines)
+        return instructions
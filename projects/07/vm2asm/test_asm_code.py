@@ -0,0 +1,142 @@
+import os
+import unittest
+from asm_code import ASMCode
+from asm_code import DYNAMIC_ADDRESS_SEGMENTS
+from asm_code import LOAD_ADDRESS_COSTS
+from asm_code import POP_COSTS
+from asm_code import addressing_strategy
+from asm_code import instruction_count
+from test_vm2asm import HALT
+from test_vm2asm import assemble
+from test_vm2asm import run_hack
+from test_vm2asm import run_vm
+from test_vm2asm import translate
+
+SEGMENTS = ["local", "argument", "this", "that", "temp", "pointer", "static"]
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+class CountingRAM(list):
+    """RAM counting the writes to SP."""
+
+    sp_writes = 0
+
+    def __setitem__(self, address, value):
+        if address == 0:
+            self.sp_writes = self.sp_writes + 1
+        super().__setitem__(address, value)
+
+
+class TestASMCode(unittest.TestCase):
+
+    def test_cost_table_matches_output(self):
+        code = ASMCode("Test")
+        for segment in SEGMENTS:
+            for index in range(9):
+                if segment == "pointer" and index > 1 or segment == "temp" and index > 7:
+                    continue
+                with self.subTest(segment=segment, index=index):
+                    strategy = addressing_strategy(segment, index, LOAD_ADDRESS_COSTS)
+                    instructions = code.load_actual_address(segment, index)
+                    self.assertEqual(instruction_count(instructions), LOAD_ADDRESS_COSTS[strategy](index))
+
+                    strategy = addressing_strategy(segment, index, POP_COSTS)
+                    instructions = code.handle_pop(segment, index)
+                    candidates = ["indirect", "computed"] if segment in DYNAMIC_ADDRESS_SEGMENTS else ["direct"]
+                    cheapest = min(POP_COSTS[candidate](index) for candidate in candidates)
+                    self.assertEqual(instruction_count(instructions), POP_COSTS[strategy](index))
+                    self.assertEqual(instruction_count(instructions), cheapest)
+                    self.assertNotIn("@R13", instructions)
+
+    def test_strategies(self):
+        self.assertEqual(addressing_strategy("temp", 6, POP_COSTS), "direct")
+        self.assertEqual(addressing_strategy("local", 0, POP_COSTS), "indirect")
+        self.assertEqual(addressing_strategy("local", 3, POP_COSTS), "indirect")
+        self.assertEqual(addressing_strategy("local", 5, POP_COSTS), "computed")
+        self.assertEqual(addressing_strategy("that", 2, LOAD_ADDRESS_COSTS), "indirect")
+        self.assertEqual(addressing_strategy("that", 4, LOAD_ADDRESS_COSTS), "computed")
+
+        code = ASMCode("Test")
+        self.assertEqual(instruction_count(code.handle_pop("static", 3)), 5)
+        self.assertEqual(code.load_actual_address("argument", 1), ["@ARG", "A=M+1"])
+
+    def test_push_pop_round_trip(self):
+        source = []
+        expected = {}
+        value = 100
+        for segment in ["local", "argument", "this", "that", "temp"]:
+            for index in range(7):
+                source.extend([f"push constant {value}", f"pop {segment} {index}"])
+                expected[(segment, index)] = value
+                value = value + 1
+        for index in range(2):
+            source.extend([f"push constant {value}", f"pop static {index}"])
+            expected[("static", index)] = value
+            value = value + 1
+
+        # Copy everything back through the stack into the that segment at 5000.
+        keys = list(expected)
+        for key in keys:
+            source.append(f"push {key[0]} {key[1]}")
+        source.extend(["push constant 5000", "pop pointer 1"])
+        for position in reversed(range(len(keys))):
+            source.append(f"pop that {position}")
+
+        ram = run_vm("\n".join(source) + "\n" + HALT, registers=(256, 1000, 1100, 3000, 4000))
+        self.assertEqual(ram[5000:5000 + len(keys)], [expected[key] for key in keys])
+        self.assertEqual(ram[0], 256)
+
+    def test_tracked_sp_matches(self):
+        programs = [
+            "push constant 7\npush constant 8\nadd\npush constant 3\nsub\nneg\nnot\npop temp 0\n" + HALT,
+            "push constant 5\npush constant 5\neq\npush constant 9\npush constant 3\ngt\n"
+            "push constant 9\npush constant 3\nlt\nand\nor\npush constant 1\npush constant 2\n"
+            "push constant 3\npush constant 4\npush constant 5\npush constant 6\nadd\nadd\nadd\n" + HALT,
+            "push constant 3\ncall Main.sum 1\npop static 0\n" + HALT + "function Main.sum 3\n"
+            "push argument 0\npop local 2\npush local 2\npush local 2\nadd\npush constant 1\nadd\nreturn\n",
+            "push constant 4\nlabel LOOP\npush constant 1\nsub\npush constant 0\npush local 0\n"
+            "push constant 1\nadd\npop local 0\npop temp 1\nlabel TEST\npush local 0\npush constant 10\n"
+            "lt\nif-goto LOOP\n" + HALT,
+        ]
+        for source in programs:
+            with self.subTest(source=source):
+                expected = run_vm(source, registers=(256, 1000, 1100, 3000, 4000))
+                tracked = run_vm(source, registers=(256, 1000, 1100, 3000, 4000), track_sp=True)
+                # Temporaries and the dead area above the stack top may differ.
+                self.assertEqual(tracked[0:13], expected[0:13])
+                self.assertEqual(tracked[16:expected[0]], expected[16:expected[0]])
+                self.assertEqual(tracked[1000:4096], expected[1000:4096])
+
+        # A unit falling off its end leaves SP up to date.
+        code = ASMCode("Test", track_sp=True)
+        code.handle_push("constant", 2)
+        code.handle_push("constant", 3)
+        self.assertEqual(code.sp_offset, 2)
+        self.assertEqual(code.finish(), ["// COMMIT SP", "@SP", "M=M+1", "M=M+1"])
+
+    def test_tracked_sp_fibonacci_series(self):
+        path = os.path.join(PROJECT_DIR, "08", "ProgramFlow", "FibonacciSeries", "FibonacciSeries.vm")
+        with open(path, mode='r', encoding='UTF-8') as vm_p:
+            source = vm_p.read()
+
+        results = []
+        for track_sp in (False, True):
+            ram = CountingRAM([0] * 32768)
+            ram[0:3] = [256, 300, 400]
+            ram[400:402] = [20, 3000]
+            words = assemble(translate(source + HALT, "FibonacciSeries", track_sp=track_sp).generated_code)
+            steps = run_hack(words, ram)
+            results.append((ram[3000:3020], ram[0], steps, ram.sp_writes, len(words)))
+
+        untracked, tracked = results
+        self.assertEqual(tracked[0], untracked[0])
+        self.assertEqual(tracked[0][19], 4181)
+        self.assertEqual(tracked[1], untracked[1])
+        self.assertLess(tracked[2], untracked[2] * 2 // 3)
+        self.assertLess(tracked[3], untracked[3] // 10)
+        self.assertLess(tracked[4], untracked[4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import os
+import sys
+import unittest
+from vm2asm import VM2ASM
+
+HASM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "06", "hasm")
+HACKEMU_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools", "hackemu")
+sys.path.append(HASM_DIR)
+sys.path.append(HACKEMU_DIR)
+
+from hasm import Assembler
+from hackemu import HackEmulator
+
+
+def run_hack(words, ram, max_steps=2000000):
+    """Runs machine code on HackEmulator with ram as its RAM until it
+    halts, returns the number of instructions executed."""
+    emulator = HackEmulator(words)
+    emulator.ram = ram
+    executed = emulator.run(max_steps)
+    assert emulator.halted and emulator.fault is None, "program did not halt"
+    return executed
+
+
+def translate(source, name="Test", link_os=False, track_sp=False):
+    translator = VM2ASM(f"{name}.vm", None, link_os=link_os, track_sp=track_sp)
+    translator.infile_p = io.StringIO(source)
+    translator.setup_codegen()
+    translator.parse()
+    translator.link_os_library()
+    return translator
+
+
+def assemble(asm_lines):
+    assembler = Assembler(None, None)
+    assembler.infile_p = io.StringIO("\n".join(asm_lines))
+    assembler.seed_symbol_table()
+    assembler.build_symbol_table()
+    assembler.parse()
+    assert assembler.error_found is False
+    return assembler.machine_code
+
+
+def run_vm(source, link_os=False, registers=(256, 256, 256, 3000, 4000), track_sp=False):
+    """Translates, assembles and runs VM code, registers sets SP, LCL, ARG,
+    THIS and THAT."""
+    ram = [0] * 32768
+    ram[0:5] = registers
+    run_hack(assemble(translate(source, link_os=link_os, track_sp=track_sp).generated_code), ram)
+    return ram
+
+
+def signed(value):
+    return value - 0x10000 if value & 0x8000 else value
+
+
+HALT = "label HALT\ngoto HALT\n"
+
+
+class TestVM2ASM(unittest.TestCase):
+
+    def test_call_and_return(self):
+        ram = run_vm("push constant 12\ncall Main.fibonacci 1\npop temp 0\n" + HALT + """
+            function Main.fibonacci 0
+            push argument 0
+            push constant 2
+            lt
+            if-goto IF_TRUE
+            goto IF_FALSE
+            label IF_TRUE
+            push argument 0
+            return
+            label IF_FALSE
+            push argument 0
+            push constant 2
+            sub
+            call Main.fibonacci 1
+            push argument 0
+            push constant 1
+            sub
+            call Main.fibonacci 1
+            add
+            return
+        """)
+        self.assertEqual(ram[5], 144)
+        self.assertEqual(ram[0:5], [256, 256, 256, 3000, 4000])
+
+    def test_os_selection(self):
+        translator = translate("call Math.multiply 2\ncall Screen.drawLine 4\n", link_os=True)
+        self.assertIn("(Math.multiply)", translator.generated_code)
+        self.assertNotIn("(Screen.drawRectangle)", translator.generated_code)
+
+        # A program providing its own Math class keeps it.
+        translator = translate("function Math.multiply 0\ncall Math.divide 2\n", link_os=True)
+        self.assertNotIn("(Math.divide)", translator.generated_code)
+
+        translator = translate("call Math.multiply 2\n")
+        self.assertNotIn("(Math.multiply)", translator.generated_code)
+
+    def test_native_math(self):
+        cases = [(300, -7), (-1000, 7), (0, 5), (181, 181), (-32767, 1), (12345, -1), (-1, -1), (255, 257)]
+        source = []
+        for index, (x, y) in enumerate(cases):
+            for function_name in ("multiply", "divide", "min", "max"):
+                source.append(f"push constant {abs(x)}")
+                if x < 0:
+                    source.append("neg")
+                source.append(f"push constant {abs(y)}")
+                if y < 0:
+                    source.append("neg")
+                source.append(f"call Math.{function_name} 2")
+            # Results come off the stack in reverse order.
+            source.extend([f"pop static {index * 4 + offset}" for offset in range(4)])
+        ram = run_vm("\n".join(source) + "\n" + HALT, link_os=True)
+
+        for index, (x, y) in enumerate(cases):
+            product = signed((x * y) & 0xFFFF)
+            quotient = signed(int(x / y) & 0xFFFF)
+            statics = [signed(value) for value in ram[16 + index * 4:20 + index * 4]]
+            self.assertEqual(statics, [max(x, y), min(x, y), quotient, product], (x, y))
+
+    def test_native_memory_and_screen(self):
+        ram = run_vm("""
+            push constant 10
+            call Memory.alloc 1
+            pop temp 0
+            push constant 5
+            call Memory.alloc 1
+            pop temp 1
+            push temp 0
+            call Memory.deAlloc 1
+            pop temp 7
+            push constant 10
+            call Memory.alloc 1
+            pop temp 2
+            push constant 3
+            push constant 1
+            push constant 40
+            push constant 2
+            call Screen.drawRectangle 4
+            pop temp 7
+            push constant 0
+            call Screen.setColor 1
+            pop temp 7
+            push constant 20
+            push constant 2
+            push constant 24
+            push constant 2
+            call Screen.drawRectangle 4
+            pop temp 7
+        """ + HALT, link_os=True)
+
+        first, second, reused = ram[5:8]
+        self.assertTrue(2048 <= first < 16384 and 2048 <= second < 16384)
+        self.assertTrue(second + 5 <= first - 1 or first + 10 <= second - 1)
+        self.assertEqual(reused, first)
+
+        screen = [signed(word) for word in ram[16384:16384 + 96]]
+        self.assertEqual(screen[0:3], [0, 0, 0])
+        self.assertEqual(screen[32:35], [-8, -1, 511])
+        self.assertEqual(screen[64:67], [-8, -1 & ~(0b11111 << 4), 511])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,21 +1,28 @@
 #!/usr/bin/python3
 
 import os
+import re
 import sys
 from asm_code import ASMCode
 from asm_code import ASMCodeGenException
+from os_lib import OSLibrary
+
+COMMENT_RE = re.compile(r"//[^\n]*")
 
 class VM2ASM():
     """VM2ASM Class
        1. Implements File I/O and Parsing
     """
 
-    def __init__(self, infile, outfile):
+    def __init__(self, infile, outfile, link_os=False, track_sp=False):
         """Constructor for VM2ASM
 
         Args:
             infile (str): Input .vm file
             outfile (str): Output .asm file
+            link_os (bool): Link native implementations of called OS functions.
+            track_sp (bool): Track the stack pointer within basic blocks,
+                see ASMCode.
         """
 
         self.infile_path = infile
@@ -26,6 +33,8 @@ class VM2ASM():
         self.asm_code = None
         self.error_found = False
         self.generated_code = []
+        self.link_os = link_os
+        self.track_sp = track_sp
 
 
     def setup_infile(self):
@@ -43,7 +52,7 @@ class VM2ASM():
         """Setups up code generator object.
         """
         vmfile_name = os.path.basename(self.infile_path).split(".")[0]
-        self.asm_code = ASMCode(vmfile_name)
+        self.asm_code = ASMCode(vmfile_name, track_sp=self.track_sp)
 
 
     def setup_outfile(self):
@@ -93,29 +102,45 @@ class VM2ASM():
         """Reads the input line by line and uses ASMCode module to
         generate Assembly code.
         """
-        self.setup_infile()
-        for line in self.infile_p.readlines():
-            # Remove inline comments
-            comment_start = line.find("//")
-
-            if comment_start != -1:
-                line = line[0:comment_start]
-
-            line = line.strip()
+        if self.infile_p is None:
+            self.setup_infile()
+        # Comments are cut out of the whole source with one regex pass, and
+        # the lines are split and stripped in one go.
+        for line in map(str.strip, COMMENT_RE.sub("", self.infile_p.read()).split("\n")):
             self.line_num = self.line_num + 1
-            if len(line) == 0 or line[0:2] == "//":
+            if len(line) == 0:
                 continue
-            else:
-                tokens = line.split(" ")
-                command = tokens[0]
-                args = tokens[1:]
-                try:
-                    code = self.asm_code.generate(command, args)
-                    # sys.stdout.write(f"{code}\n")
-                    self.generated_code.extend(code)
-                except ASMCodeGenException as e:
-                    self.error_found = True
-                    sys.stderr.write(f"FATAL {self.line_num} : {e.message}")
+            tokens = line.split(" ")
+            command = tokens[0]
+            args = tokens[1:]
+            try:
+                code = self.asm_code.generate(command, args)
+                # sys.stdout.write(f"{code}\n")
+                self.generated_code.extend(code)
+            except ASMCodeGenException as e:
+                self.error_found = True
+                sys.stderr.write(f"FATAL {self.line_num} : {e.message}")
+        self.generated_code.extend(self.asm_code.finish())
+
+
+    def link_os_library(self):
+        """Appends native OS functions called by the program, see OSLibrary.
+        The program is closed with an endless loop first, so that running
+        past its last command never falls into library code.
+        """
+        if self.link_os is False or self.error_found is True:
+            return
+        library_code = OSLibrary().link(
+            self.asm_code.defined_functions, self.asm_code.called_functions
+        )
+        if len(library_code) != 0:
+            self.generated_code.extend([
+                "// END OF PROGRAM",
+                "(VM2ASM$END)",
+                "@VM2ASM$END",
+                "0;JMP"
+            ])
+            self.generated_code.extend(library_code)
 
 
 def print_help():
@@ -125,19 +150,29 @@ def print_help():
     VM2ASM 
     Generates ASM code for .vm file
     Usage
-    ./vm2asm.py <input .vm file> <out .asm file>
+    ./vm2asm.py <input .vm file> <out .asm file> [--link-os] [--track-sp]
+
+    --link-os   link native implementations of the Math, Memory and
+                Screen OS classes called by the program
+    --track-sp  track the stack pointer within basic blocks and write it
+                back only at labels, jumps, calls and returns
 
     '''
     sys.stdout.write(help_message)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
+    options = sys.argv[3:]
+    if len(sys.argv) < 3 or not set(options) <= {"--link-os", "--track-sp"}:
         print_help()
     else:
-        assembler = VM2ASM(sys.argv[1], sys.argv[2])
+        assembler = VM2ASM(
+            sys.argv[1], sys.argv[2],
+            link_os="--link-os" in options, track_sp="--track-sp" in options
+        )
         assembler.setup_infile()
         assembler.setup_codegen()
         assembler.parse()
+        assembler.link_os_library()
         assembler.write_outfile()
     sys.exit(0)
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+
+import os
+import sys
+from jack_parser import JackParser
+from jack_tokenizer import JackSyntaxError
+from jack_xml import JackXMLWriter
+from jack_xml import tokens_to_xml
+
+
+class JackAnalyzer():
+    """Tokenizes and parses .jack files and writes the token (XxxT.xml) and
+    parse tree (Xxx.xml) listings.
+    """
+
+    def __init__(self, inpath, outdir):
+        """Constructor for JackAnalyzer
+
+        Args:
+            inpath (str): A .jack file or a directory of .jack files.
+            outdir (str): Directory for the generated XML files.
+        """
+        self.inpath = inpath
+        self.outdir = outdir
+        self.error_found = False
+
+    def source_files(self):
+        """Returns the .jack files to be analyzed.
+
+        Returns:
+            list: Paths of .jack files.
+        """
+        if os.path.isdir(self.inpath):
+            return sorted(
+                os.path.join(self.inpath, name)
+                for name in os.listdir(self.inpath) if name.endswith(".jack")
+            )
+        return [self.inpath]
+
+    def analyze_file(self, path):
+        """Analyzes a single file.
+
+        Args:
+            path (str): .jack file.
+
+        Returns:
+            tuple: (token XML lines, parse tree XML lines)
+        """
+        with open(path, mode='r', encoding='UTF-8') as infile_p:
+            source = infile_p.read()
+        parser = JackParser(source)
+        # The token listing excludes the parser's end of file sentinel.
+        token_xml = tokens_to_xml(parser.tokens[:-1])
+        tree_xml = JackXMLWriter().write_class(parser.parse())
+        return token_xml, tree_xml
+
+    def run(self):
+        """Analyzes every input file, writing outputs only for files without errors.
+        """
+        for path in self.source_files():
+            try:
+                token_xml, tree_xml = self.analyze_file(path)
+            except JackSyntaxError as e:
+                self.error_found = True
+                sys.stderr.write(f"FATAL {path}:{e.message}")
+                continue
+            except Exception as any_exception:
+                self.error_found = True
+                sys.stderr.write(f"Could not read input file {path}\n")
+                sys.stderr.write(f"Exception {any_exception}\n")
+                continue
+
+            name = os.path.splitext(os.path.basename(path))[0]
+            self.write_lines(os.path.join(self.outdir, f"{name}T.xml"), token_xml)
+            self.write_lines(os.path.join(self.outdir, f"{name}.xml"), tree_xml)
+
+    def write_lines(self, path, lines):
+        try:
+            with open(path, mode='w', encoding='UTF-8') as outfile_p:
+                outfile_p.write("\n".join(lines))
+                outfile_p.write("\n")
+        except Exception as any_exception:
+            sys.stderr.write(f"Could not open output file {path}\n")
+            sys.stderr.write(f"Exception {any_exception}\n")
+            sys.exit(1)
+
+
+def print_help():
+    """Prints help message.
+    """
+    help_message = '''
+    Jack Analyzer
+    Writes token and parse tree XML for .jack files
+    Usage
+    ./jack_analyzer.py <input .jack file or directory> <output directory>
+
+    '''
+    sys.stdout.write(help_message)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print_help()
+    else:
+        analyzer = JackAnalyzer(sys.argv[1], sys.argv[2])
+        analyzer.run()
+    sys.exit(0)
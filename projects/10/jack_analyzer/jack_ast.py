@@ -0,0 +1,157 @@
+"""AST node classes produced by JackParser.
+
+Nodes only hold data, every class uses __slots__ to keep large trees compact.
+Types are stored as strings, names of primitive types are in PRIMITIVE_TYPES.
+"""
+
+PRIMITIVE_TYPES = frozenset(["int", "char", "boolean", "void"])
+
+
+class ClassNode():
+    __slots__ = ("name", "class_var_decs", "subroutine_decs")
+
+    def __init__(self, name, class_var_decs, subroutine_decs):
+        self.name = name
+        self.class_var_decs = class_var_decs
+        self.subroutine_decs = subroutine_decs
+
+
+class ClassVarDec():
+    """kind is "static" or "field"."""
+    __slots__ = ("kind", "type", "names")
+
+    def __init__(self, kind, var_type, names):
+        self.kind = kind
+        self.type = var_type
+        self.names = names
+
+
+class SubroutineDec():
+    """kind is "constructor", "function" or "method". parameters is a list of
+    (type, name) tuples."""
+    __slots__ = ("kind", "return_type", "name", "parameters", "var_decs", "statements")
+
+    def __init__(self, kind, return_type, name, parameters, var_decs, statements):
+        self.kind = kind
+        self.return_type = return_type
+        self.name = name
+        self.parameters = parameters
+        self.var_decs = var_decs
+        self.statements = statements
+
+
+class VarDec():
+    __slots__ = ("type", "names")
+
+    def __init__(self, var_type, names):
+        self.type = var_type
+        self.names = names
+
+
+class LetStatement():
+    """index is None unless the target is an array element."""
+    __slots__ = ("name", "index", "value")
+
+    def __init__(self, name, index, value):
+        self.name = name
+        self.index = index
+        self.value = value
+
+
+class IfStatement():
+    """else_statements is None when there is no else branch."""
+    __slots__ = ("condition", "statements", "else_statements")
+
+    def __init__(self, condition, statements, else_statements):
+        self.condition = condition
+        self.statements = statements
+        self.else_statements = else_statements
+
+
+class WhileStatement():
+    __slots__ = ("condition", "statements")
+
+    def __init__(self, condition, statements):
+        self.condition = condition
+        self.statements = statements
+
+
+class DoStatement():
+    __slots__ = ("call",)
+
+    def __init__(self, call):
+        self.call = call
+
+
+class ReturnStatement():
+    """value is None for a bare return."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Expression():
+    """term followed by a list of (op, term) tuples, evaluated left to right."""
+    __slots__ = ("term", "operations")
+
+    def __init__(self, term, operations):
+        self.term = term
+        self.operations = operations
+
+
+class IntegerConstant():
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class StringConstant():
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class KeywordConstant():
+    """value is one of true, false, null and this."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class VarRef():
+    """index is None unless the variable is subscripted."""
+    __slots__ = ("name", "index")
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+
+class SubroutineCall():
+    """receiver is None for foo(), otherwise the class or variable name in
+    receiver.foo()."""
+    __slots__ = ("receiver", "name", "arguments")
+
+    def __init__(self, receiver, name, arguments):
+        self.receiver = receiver
+        self.name = name
+        self.arguments = arguments
+
+
+class UnaryOp():
+    __slots__ = ("op", "term")
+
+    def __init__(self, op, term):
+        self.op = op
+        self.term = term
+
+
+class ParenExpression():
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
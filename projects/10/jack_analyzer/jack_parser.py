@@ -0,0 +1,307 @@
+from jack_ast import ClassNode
+from jack_ast import ClassVarDec
+from jack_ast import DoStatement
+from jack_ast import Expression
+from jack_ast import IfStatement
+from jack_ast import IntegerConstant
+from jack_ast import KeywordConstant
+from jack_ast import LetStatement
+from jack_ast import ParenExpression
+from jack_ast import ReturnStatement
+from jack_ast import StringConstant
+from jack_ast import SubroutineCall
+from jack_ast import SubroutineDec
+from jack_ast import UnaryOp
+from jack_ast import VarDec
+from jack_ast import VarRef
+from jack_ast import WhileStatement
+from jack_tokenizer import JackSyntaxError
+from jack_tokenizer import Token
+from jack_tokenizer import line_number
+from jack_tokenizer import tokenize
+
+BINARY_OPS = frozenset("+-*/&|<>=")
+UNARY_OPS = frozenset("-~")
+KEYWORD_CONSTANTS = frozenset(["true", "false", "null", "this"])
+TYPE_KEYWORDS = frozenset(["int", "char", "boolean"])
+
+
+class JackParser():
+    """Recursive descent parser for the Jack grammar.
+    Each parse_* method consumes one grammar rule and returns its AST node.
+    """
+
+    def __init__(self, source):
+        """Constructor for JackParser
+
+        Args:
+            source (str): Contents of a .jack file.
+        """
+        self.source = source
+        self.tokens = tokenize(source)
+        # Sentinel, so lookahead never runs past the end of the list.
+        self.tokens.append(Token("eof", "", len(source)))
+        self.pos = 0
+
+    def error(self, expected):
+        """Builds a syntax error for the current token.
+
+        Args:
+            expected (str): Description of what was expected.
+
+        Returns:
+            JackSyntaxError: Exception to be raised.
+        """
+        token = self.tokens[self.pos]
+        line = line_number(self.source, token.position)
+        found = "end of file" if token.kind == "eof" else f"{token.kind} {token.value!r}"
+        return JackSyntaxError(f"{line}: expected {expected}, found {found}\n")
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def advance(self):
+        token = self.tokens[self.pos]
+        self.pos = self.pos + 1
+        return token
+
+    def expect_symbol(self, symbol):
+        token = self.tokens[self.pos]
+        if token.kind != "symbol" or token.value != symbol:
+            raise self.error(f"'{symbol}'")
+        self.pos = self.pos + 1
+
+    def expect_identifier(self):
+        token = self.tokens[self.pos]
+        if token.kind != "identifier":
+            raise self.error("identifier")
+        self.pos = self.pos + 1
+        return token.value
+
+    def at_symbol(self, symbol):
+        token = self.tokens[self.pos]
+        return token.kind == "symbol" and token.value == symbol
+
+    def at_keyword(self, *keywords):
+        token = self.tokens[self.pos]
+        return token.kind == "keyword" and token.value in keywords
+
+    def parse(self):
+        """Parses the whole file, which must contain exactly one class.
+
+        Returns:
+            ClassNode: Root of the AST.
+        """
+        try:
+            class_node = self.parse_class()
+        except RecursionError:
+            # Every nested expression or statement is a level of recursion.
+            line = line_number(self.source, self.tokens[self.pos].position)
+            raise JackSyntaxError(f"{line}: expression nested too deeply\n") from None
+        if self.peek().kind != "eof":
+            raise self.error("end of file")
+        return class_node
+
+    def parse_class(self):
+        if not self.at_keyword("class"):
+            raise self.error("'class'")
+        self.advance()
+        name = self.expect_identifier()
+        self.expect_symbol("{")
+
+        class_var_decs = []
+        while self.at_keyword("static", "field"):
+            class_var_decs.append(self.parse_class_var_dec())
+
+        subroutine_decs = []
+        while self.at_keyword("constructor", "function", "method"):
+            subroutine_decs.append(self.parse_subroutine_dec())
+
+        self.expect_symbol("}")
+        return ClassNode(name, class_var_decs, subroutine_decs)
+
+    def parse_type(self, allow_void=False):
+        token = self.peek()
+        if token.kind == "identifier" or (token.kind == "keyword" and token.value in TYPE_KEYWORDS):
+            self.pos = self.pos + 1
+            return token.value
+        if allow_void and token.kind == "keyword" and token.value == "void":
+            self.pos = self.pos + 1
+            return token.value
+        raise self.error("type")
+
+    def parse_names(self):
+        """Parses varName (',' varName)* ';'
+        """
+        names = [self.expect_identifier()]
+        while self.at_symbol(","):
+            self.advance()
+            names.append(self.expect_identifier())
+        self.expect_symbol(";")
+        return names
+
+    def parse_class_var_dec(self):
+        kind = self.advance().value
+        var_type = self.parse_type()
+        return ClassVarDec(kind, var_type, self.parse_names())
+
+    def parse_subroutine_dec(self):
+        kind = self.advance().value
+        return_type = self.parse_type(allow_void=True)
+        name = self.expect_identifier()
+
+        self.expect_symbol("(")
+        parameters = []
+        if not self.at_symbol(")"):
+            parameters.append((self.parse_type(), self.expect_identifier()))
+            while self.at_symbol(","):
+                self.advance()
+                parameters.append((self.parse_type(), self.expect_identifier()))
+        self.expect_symbol(")")
+
+        self.expect_symbol("{")
+        var_decs = []
+        while self.at_keyword("var"):
+            self.advance()
+            var_type = self.parse_type()
+            var_decs.append(VarDec(var_type, self.parse_names()))
+        statements = self.parse_statements()
+        self.expect_symbol("}")
+        return SubroutineDec(kind, return_type, name, parameters, var_decs, statements)
+
+    def parse_statements(self):
+        statements = []
+        while True:
+            token = self.peek()
+            if token.kind != "keyword":
+                return statements
+            if token.value == "let":
+                statements.append(self.parse_let())
+            elif token.value == "if":
+                statements.append(self.parse_if())
+            elif token.value == "while":
+                statements.append(self.parse_while())
+            elif token.value == "do":
+                statements.append(self.parse_do())
+            elif token.value == "return":
+                statements.append(self.parse_return())
+            else:
+                return statements
+
+    def parse_block(self):
+        """Parses '{' statements '}'
+        """
+        self.expect_symbol("{")
+        statements = self.parse_statements()
+        self.expect_symbol("}")
+        return statements
+
+    def parse_let(self):
+        self.advance()
+        name = self.expect_identifier()
+        index = None
+        if self.at_symbol("["):
+            self.advance()
+            index = self.parse_expression()
+            self.expect_symbol("]")
+        self.expect_symbol("=")
+        value = self.parse_expression()
+        self.expect_symbol(";")
+        return LetStatement(name, index, value)
+
+    def parse_condition(self):
+        self.expect_symbol("(")
+        condition = self.parse_expression()
+        self.expect_symbol(")")
+        return condition
+
+    def parse_if(self):
+        self.advance()
+        condition = self.parse_condition()
+        statements = self.parse_block()
+        else_statements = None
+        if self.at_keyword("else"):
+            self.advance()
+            else_statements = self.parse_block()
+        return IfStatement(condition, statements, else_statements)
+
+    def parse_while(self):
+        self.advance()
+        condition = self.parse_condition()
+        return WhileStatement(condition, self.parse_block())
+
+    def parse_do(self):
+        self.advance()
+        name = self.expect_identifier()
+        call = self.parse_subroutine_call(name)
+        self.expect_symbol(";")
+        return DoStatement(call)
+
+    def parse_return(self):
+        self.advance()
+        value = None
+        if not self.at_symbol(";"):
+            value = self.parse_expression()
+        self.expect_symbol(";")
+        return ReturnStatement(value)
+
+    def parse_expression(self):
+        term = self.parse_term()
+        operations = []
+        token = self.peek()
+        while token.kind == "symbol" and token.value in BINARY_OPS:
+            self.pos = self.pos + 1
+            operations.append((token.value, self.parse_term()))
+            token = self.peek()
+        return Expression(term, operations)
+
+    def parse_term(self):
+        token = self.advance()
+        kind = token.kind
+        if kind == "integerConstant":
+            return IntegerConstant(int(token.value))
+        elif kind == "stringConstant":
+            return StringConstant(token.value)
+        elif kind == "keyword" and token.value in KEYWORD_CONSTANTS:
+            return KeywordConstant(token.value)
+        elif kind == "identifier":
+            if self.at_symbol("["):
+                self.advance()
+                index = self.parse_expression()
+                self.expect_symbol("]")
+                return VarRef(token.value, index)
+            elif self.at_symbol("(") or self.at_symbol("."):
+                return self.parse_subroutine_call(token.value)
+            return VarRef(token.value, None)
+        elif kind == "symbol" and token.value == "(":
+            expression = self.parse_expression()
+            self.expect_symbol(")")
+            return ParenExpression(expression)
+        elif kind == "symbol" and token.value in UNARY_OPS:
+            return UnaryOp(token.value, self.parse_term())
+
+        self.pos = self.pos - 1
+        raise self.error("term")
+
+    def parse_subroutine_call(self, name):
+        """Parses the rest of a subroutine call whose first identifier has
+        already been consumed.
+
+        Args:
+            name (str): First identifier of the call.
+        """
+        receiver = None
+        if self.at_symbol("."):
+            self.advance()
+            receiver = name
+            name = self.expect_identifier()
+
+        self.expect_symbol("(")
+        arguments = []
+        if not self.at_symbol(")"):
+            arguments.append(self.parse_expression())
+            while self.at_symbol(","):
+                self.advance()
+                arguments.append(self.parse_expression())
+        self.expect_symbol(")")
+        return SubroutineCall(receiver, name, arguments)
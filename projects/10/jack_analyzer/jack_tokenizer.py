@@ -0,0 +1,112 @@
+import re
+
+KEYWORDS = frozenset([
+    "class", "constructor", "function", "method", "field", "static", "var",
+    "int", "char", "boolean", "void", "true", "false", "null", "this",
+    "let", "do", "if", "else", "while", "return"
+])
+
+MAX_INTEGER = 32767
+
+# One master pattern for the whole buffer. Every match consumes the
+# whitespace and comments in front of a token, so each token costs a single
+# match. Alternatives are tried in order, so an opening "/*" or '"' only
+# reaches the unterminated group when the comment or string could not be
+# closed. The "." alternative makes every position match, which means
+# finditer never silently skips input, and the empty alternative consumes
+# trailing whitespace at the end of the buffer.
+TOKEN_RE = re.compile(r"""
+    (?:\s+|//[^\n]*|/\*.*?\*/)*
+    (?:
+        (?P<integerConstant>\d+)
+      | "(?P<stringConstant>[^"\n]*)"
+      | (?P<identifier>[A-Za-z_]\w*)
+      | (?P<unterminated>/\*|")
+      | (?P<symbol>[{}()\[\].,;+\-*/&|<>=~])
+      | (?P<invalid>.)
+      | \Z
+    )
+""", re.VERBOSE | re.DOTALL | re.ASCII)
+
+
+class JackSyntaxError(Exception):
+    """Exception class for lexical and syntax errors in Jack source.
+
+    Args:
+        Exception (class): Python base class for exception
+    """
+
+    def __init__(self, message):
+        """Constructor
+
+        Args:
+            message (str): error message.
+        """
+        self.message = message
+
+
+class Token():
+    """A single Jack token.
+    kind is one of keyword, symbol, integerConstant, stringConstant and
+    identifier. position is the offset of the token in the source buffer.
+    """
+    __slots__ = ("kind", "value", "position")
+
+    def __init__(self, kind, value, position):
+        self.kind = kind
+        self.value = value
+        self.position = position
+
+
+def line_number(source, position):
+    """Returns the 1-based line number of an offset in source. Only used for
+    error messages so the scan is not repeated for every token.
+
+    Args:
+        source (str): Jack source.
+        position (int): Offset in source.
+
+    Returns:
+        int: Line number.
+    """
+    return source.count("\n", 0, position) + 1
+
+
+def tokenize(source):
+    """Splits Jack source into tokens.
+
+    Args:
+        source (str): Contents of a .jack file.
+
+    Raises:
+        JackSyntaxError: On unterminated comments or strings, invalid characters
+            and out of range integer constants.
+
+    Returns:
+        list: List of Token objects.
+    """
+    tokens = []
+    append = tokens.append
+    for match in TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        if kind is None:
+            continue
+
+        value = match.group(kind)
+        position = match.start(kind)
+        if kind == "identifier":
+            if value in KEYWORDS:
+                kind = "keyword"
+        elif kind == "integerConstant":
+            if int(value) > MAX_INTEGER:
+                line = line_number(source, position)
+                raise JackSyntaxError(f"{line}: integer constant {value} is out of range\n")
+        elif kind == "unterminated":
+            line = line_number(source, position)
+            what = "comment" if value == "/*" else "string constant"
+            raise JackSyntaxError(f"{line}: unterminated {what}\n")
+        elif kind == "invalid":
+            line = line_number(source, position)
+            raise JackSyntaxError(f"{line}: invalid character {value!r}\n")
+        append(Token(kind, value, position))
+    return tokens
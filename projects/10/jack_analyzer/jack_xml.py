@@ -0,0 +1,243 @@
+from jack_ast import PRIMITIVE_TYPES
+from jack_ast import IntegerConstant
+from jack_ast import KeywordConstant
+from jack_ast import ParenExpression
+from jack_ast import StringConstant
+from jack_ast import SubroutineCall
+from jack_ast import UnaryOp
+from jack_ast import VarRef
+
+XML_ESCAPES = str.maketrans({"<": "&lt;", ">": "&gt;", "&": "&amp;"})
+
+
+def token_line(kind, value):
+    """Returns the XML line for a single token.
+
+    Args:
+        kind (str): Token kind.
+        value (str): Token value.
+
+    Returns:
+        str: XML line without indentation.
+    """
+    return f"<{kind}> {value.translate(XML_ESCAPES)} </{kind}>"
+
+
+def tokens_to_xml(tokens):
+    """Generates the token listing (the *T.xml files).
+
+    Args:
+        tokens (list): Token objects from jack_tokenizer.tokenize.
+
+    Returns:
+        list: XML lines.
+    """
+    lines = ["<tokens>"]
+    lines.extend(token_line(token.kind, token.value) for token in tokens)
+    lines.append("</tokens>")
+    return lines
+
+
+class JackXMLWriter():
+    """Generates the parse tree XML for a class AST. Every token of the source
+    is reproduced, so the output can be compared with the reference files.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.indent = ""
+
+    def open(self, tag):
+        self.lines.append(f"{self.indent}<{tag}>")
+        self.indent = self.indent + "  "
+
+    def close(self, tag):
+        self.indent = self.indent[:-2]
+        self.lines.append(f"{self.indent}</{tag}>")
+
+    def token(self, kind, value):
+        self.lines.append(self.indent + token_line(kind, value))
+
+    def keyword(self, value):
+        self.token("keyword", value)
+
+    def symbol(self, value):
+        self.token("symbol", value)
+
+    def identifier(self, value):
+        self.token("identifier", value)
+
+    def type_name(self, value):
+        if value in PRIMITIVE_TYPES:
+            self.keyword(value)
+        else:
+            self.identifier(value)
+
+    def names(self, names):
+        for index, name in enumerate(names):
+            if index > 0:
+                self.symbol(",")
+            self.identifier(name)
+        self.symbol(";")
+
+    def write_class(self, node):
+        """Generates XML for a whole class.
+
+        Args:
+            node (ClassNode): Root of the AST.
+
+        Returns:
+            list: XML lines.
+        """
+        self.open("class")
+        self.keyword("class")
+        self.identifier(node.name)
+        self.symbol("{")
+        for class_var_dec in node.class_var_decs:
+            self.open("classVarDec")
+            self.keyword(class_var_dec.kind)
+            self.type_name(class_var_dec.type)
+            self.names(class_var_dec.names)
+            self.close("classVarDec")
+        for subroutine_dec in node.subroutine_decs:
+            self.write_subroutine_dec(subroutine_dec)
+        self.symbol("}")
+        self.close("class")
+        return self.lines
+
+    def write_subroutine_dec(self, node):
+        self.open("subroutineDec")
+        self.keyword(node.kind)
+        self.type_name(node.return_type)
+        self.identifier(node.name)
+        self.symbol("(")
+        self.open("parameterList")
+        for index, (param_type, param_name) in enumerate(node.parameters):
+            if index > 0:
+                self.symbol(",")
+            self.type_name(param_type)
+            self.identifier(param_name)
+        self.close("parameterList")
+        self.symbol(")")
+
+        self.open("subroutineBody")
+        self.symbol("{")
+        for var_dec in node.var_decs:
+            self.open("varDec")
+            self.keyword("var")
+            self.type_name(var_dec.type)
+            self.names(var_dec.names)
+            self.close("varDec")
+        self.write_statements(node.statements)
+        self.symbol("}")
+        self.close("subroutineBody")
+        self.close("subroutineDec")
+
+    def write_statements(self, statements):
+        self.open("statements")
+        for statement in statements:
+            name = type(statement).__name__
+            getattr(self, f"write_{name}")(statement)
+        self.close("statements")
+
+    def write_block(self, statements):
+        self.symbol("{")
+        self.write_statements(statements)
+        self.symbol("}")
+
+    def write_LetStatement(self, node):
+        self.open("letStatement")
+        self.keyword("let")
+        self.identifier(node.name)
+        if node.index is not None:
+            self.symbol("[")
+            self.write_expression(node.index)
+            self.symbol("]")
+        self.symbol("=")
+        self.write_expression(node.value)
+        self.symbol(";")
+        self.close("letStatement")
+
+    def write_IfStatement(self, node):
+        self.open("ifStatement")
+        self.keyword("if")
+        self.symbol("(")
+        self.write_expression(node.condition)
+        self.symbol(")")
+        self.write_block(node.statements)
+        if node.else_statements is not None:
+            self.keyword("else")
+            self.write_block(node.else_statements)
+        self.close("ifStatement")
+
+    def write_WhileStatement(self, node):
+        self.open("whileStatement")
+        self.keyword("while")
+        self.symbol("(")
+        self.write_expression(node.condition)
+        self.symbol(")")
+        self.write_block(node.statements)
+        self.close("whileStatement")
+
+    def write_DoStatement(self, node):
+        self.open("doStatement")
+        self.keyword("do")
+        self.write_subroutine_call(node.call)
+        self.symbol(";")
+        self.close("doStatement")
+
+    def write_ReturnStatement(self, node):
+        self.open("returnStatement")
+        self.keyword("return")
+        if node.value is not None:
+            self.write_expression(node.value)
+        self.symbol(";")
+        self.close("returnStatement")
+
+    def write_expression(self, node):
+        self.open("expression")
+        self.write_term(node.term)
+        for op, term in node.operations:
+            self.symbol(op)
+            self.write_term(term)
+        self.close("expression")
+
+    def write_term(self, node):
+        self.open("term")
+        node_type = type(node)
+        if node_type is IntegerConstant:
+            self.token("integerConstant", str(node.value))
+        elif node_type is StringConstant:
+            self.token("stringConstant", node.value)
+        elif node_type is KeywordConstant:
+            self.keyword(node.value)
+        elif node_type is VarRef:
+            self.identifier(node.name)
+            if node.index is not None:
+                self.symbol("[")
+                self.write_expression(node.index)
+                self.symbol("]")
+        elif node_type is SubroutineCall:
+            self.write_subroutine_call(node)
+        elif node_type is ParenExpression:
+            self.symbol("(")
+            self.write_expression(node.expression)
+            self.symbol(")")
+        elif node_type is UnaryOp:
+            self.symbol(node.op)
+            self.write_term(node.term)
+        self.close("term")
+
+    def write_subroutine_call(self, node):
+        if node.receiver is not None:
+            self.identifier(node.receiver)
+            self.symbol(".")
+        self.identifier(node.name)
+        self.symbol("(")
+        self.open("expressionList")
+        for index, argument in enumerate(node.arguments):
+            if index > 0:
+                self.symbol(",")
+            self.write_expression(argument)
+        self.close("expressionList")
+        self.symbol(")")
@@ -0,0 +1,65 @@
+import os
+import unittest
+from jack_analyzer import JackAnalyzer
+from jack_parser import JackParser
+from jack_tokenizer import JackSyntaxError
+from jack_tokenizer import tokenize
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PROGRAMS = ["ArrayTest", "ExpressionLessSquare", "Square"]
+
+
+def reference_lines(path):
+    with open(path, mode='r', encoding='UTF-8') as ref_file:
+        return [line.strip() for line in ref_file.read().splitlines()]
+
+
+class TestJackAnalyzer(unittest.TestCase):
+
+    def test_reference_outputs(self):
+        for program in PROGRAMS:
+            program_dir = os.path.join(PROJECT_DIR, program)
+            analyzer = JackAnalyzer(program_dir, None)
+            for path in analyzer.source_files():
+                token_xml, tree_xml = analyzer.analyze_file(path)
+                base = path[:-len(".jack")]
+                with self.subTest(path=path):
+                    self.assertEqual([line.strip() for line in token_xml], reference_lines(f"{base}T.xml"))
+                    self.assertEqual([line.strip() for line in tree_xml], reference_lines(f"{base}.xml"))
+
+    def test_tokenizer(self):
+        tokens = tokenize('let s = "a // b"; /* c\n d */ x[12]<=~y; // end')
+        self.assertEqual(
+            [(token.kind, token.value) for token in tokens],
+            [
+                ("keyword", "let"), ("identifier", "s"), ("symbol", "="),
+                ("stringConstant", "a // b"), ("symbol", ";"), ("identifier", "x"),
+                ("symbol", "["), ("integerConstant", "12"), ("symbol", "]"),
+                ("symbol", "<"), ("symbol", "="), ("symbol", "~"),
+                ("identifier", "y"), ("symbol", ";")
+            ]
+        )
+
+    def test_errors(self):
+        for source in ["class A { /* open", 'let s = "open\n";', "let x = 40000;", "let x = #;"]:
+            with self.assertRaises(JackSyntaxError):
+                tokenize(source)
+
+        with self.assertRaises(JackSyntaxError) as context:
+            JackParser("class A {\n function void f() {\n let x = ;\n }\n}").parse()
+        self.assertTrue(context.exception.message.startswith("3:"))
+
+        for body in ["let x = " + "(" * 5000 + "1" + ")" * 5000 + ";", "while (x) {" * 5000 + "}" * 5000]:
+            with self.assertRaises(JackSyntaxError) as context:
+                JackParser(f"class A {{\n function void f() {{\n {body}\n }}\n}}").parse()
+            self.assertEqual(context.exception.message, "3: expression nested too deeply\n")
+
+    def test_large_source(self):
+        body = "let x = (x + 1) * y[i] - Math.max(a, -b);\n" * 20000
+        source = f"class Big {{ function void f() {{ {body} return; }} }}"
+        tree = JackParser(source).parse()
+        self.assertEqual(len(tree.subroutine_decs[0].statements), 20001)
+
+
+if __name__ == '__main__':
+    unittest.main()
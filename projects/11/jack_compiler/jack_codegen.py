@@ -0,0 +1,269 @@
+import os
+import sys
+
+COMPILER_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_DIR = os.path.join(COMPILER_DIR, "..", "..", "10", "jack_analyzer")
+sys.path.insert(0, ANALYZER_DIR)
+
+from jack_ast import IntegerConstant
+from jack_ast import KeywordConstant
+from jack_ast import ParenExpression
+from jack_ast import StringConstant
+from jack_ast import SubroutineCall
+from jack_ast import UnaryOp
+from jack_ast import VarRef
+from jack_symbol_table import KIND_SEGMENTS
+from jack_symbol_table import JackSymbolTable
+
+BINARY_OP_COMMANDS = {
+    "+": "add",
+    "-": "sub",
+    "&": "and",
+    "|": "or",
+    "<": "lt",
+    ">": "gt",
+    "=": "eq",
+    "*": "call Math.multiply 2",
+    "/": "call Math.divide 2"
+}
+
+UNARY_OP_COMMANDS = {
+    "-": "neg",
+    "~": "not"
+}
+
+
+class JackCompileError(Exception):
+    """Exception class for semantic errors found during code generation.
+
+    Args:
+        Exception (class): Python base class for exception
+    """
+
+    def __init__(self, message):
+        """Constructor
+
+        Args:
+            message (str): error message.
+        """
+        self.message = message
+
+
+class JackCodeGenerator():
+    """Generates VM code for a single class AST.
+    Code generation only reads the class being compiled, calls into other
+    classes are emitted by name, so every class compiles independently.
+    """
+
+    def __init__(self):
+        self.class_name = None
+        self.symbols = JackSymbolTable()
+        self.label_count = 0
+        self.code = []
+
+    def get_label(self, prefix):
+        """Returns a label which is unique within the class.
+
+        Args:
+            prefix (str): Label prefix.
+
+        Returns:
+            str: Label
+        """
+        label = f"{prefix}{self.label_count}"
+        self.label_count = self.label_count + 1
+        return label
+
+    def compile_class(self, node):
+        """Compiles a class.
+
+        Args:
+            node (ClassNode): Root of the AST.
+
+        Returns:
+            list: VM commands.
+        """
+        self.class_name = node.name
+        for class_var_dec in node.class_var_decs:
+            for name in class_var_dec.names:
+                self.symbols.define(name, class_var_dec.type, class_var_dec.kind)
+        for subroutine_dec in node.subroutine_decs:
+            self.compile_subroutine(subroutine_dec)
+        return self.code
+
+    def compile_subroutine(self, node):
+        self.symbols.start_subroutine()
+        if node.kind == "method":
+            self.symbols.define("this", self.class_name, "argument")
+        for param_type, param_name in node.parameters:
+            self.symbols.define(param_name, param_type, "argument")
+        for var_dec in node.var_decs:
+            for name in var_dec.names:
+                self.symbols.define(name, var_dec.type, "var")
+
+        self.code.append(f"function {self.class_name}.{node.name} {self.symbols.var_count('var')}")
+        if node.kind == "constructor":
+            self.code.extend([
+                f"push constant {self.symbols.var_count('field')}",
+                "call Memory.alloc 1",
+                "pop pointer 0"
+            ])
+        elif node.kind == "method":
+            self.code.extend([
+                "push argument 0",
+                "pop pointer 0"
+            ])
+        self.compile_statements(node.statements)
+
+    def variable(self, name):
+        """Returns the VM segment and index of a variable.
+
+        Args:
+            name (str): Variable name.
+
+        Raises:
+            JackCompileError: If the variable is not defined.
+        """
+        entry = self.symbols.lookup(name)
+        if entry is None:
+            raise JackCompileError(f"{self.class_name}: undefined variable {name}\n")
+        var_type, kind, index = entry
+        return f"{KIND_SEGMENTS[kind]} {index}"
+
+    def compile_statements(self, statements):
+        for statement in statements:
+            getattr(self, f"compile_{type(statement).__name__}")(statement)
+
+    def compile_LetStatement(self, node):
+        if node.index is None:
+            self.compile_expression(node.value)
+            self.code.append(f"pop {self.variable(node.name)}")
+        else:
+            self.code.append(f"push {self.variable(node.name)}")
+            self.compile_expression(node.index)
+            self.code.append("add")
+            self.compile_expression(node.value)
+            self.code.extend([
+                "pop temp 0",
+                "pop pointer 1",
+                "push temp 0",
+                "pop that 0"
+            ])
+
+    def compile_IfStatement(self, node):
+        else_label = self.get_label("IF_ELSE")
+        end_label = self.get_label("IF_END")
+        self.compile_expression(node.condition)
+        self.code.extend([
+            "not",
+            f"if-goto {else_label}"
+        ])
+        self.compile_statements(node.statements)
+        if node.else_statements is None:
+            self.code.append(f"label {else_label}")
+        else:
+            self.code.extend([
+                f"goto {end_label}",
+                f"label {else_label}"
+            ])
+            self.compile_statements(node.else_statements)
+            self.code.append(f"label {end_label}")
+
+    def compile_WhileStatement(self, node):
+        loop_label = self.get_label("WHILE_EXP")
+        end_label = self.get_label("WHILE_END")
+        self.code.append(f"label {loop_label}")
+        self.compile_expression(node.condition)
+        self.code.extend([
+            "not",
+            f"if-goto {end_label}"
+        ])
+        self.compile_statements(node.statements)
+        self.code.extend([
+            f"goto {loop_label}",
+            f"label {end_label}"
+        ])
+
+    def compile_DoStatement(self, node):
+        self.compile_subroutine_call(node.call)
+        self.code.append("pop temp 0")
+
+    def compile_ReturnStatement(self, node):
+        if node.value is None:
+            self.code.append("push constant 0")
+        else:
+            self.compile_expression(node.value)
+        self.code.append("return")
+
+    def compile_expression(self, node):
+        self.compile_term(node.term)
+        for op, term in node.operations:
+            self.compile_term(term)
+            self.code.append(BINARY_OP_COMMANDS[op])
+
+    def compile_term(self, node):
+        node_type = type(node)
+        if node_type is IntegerConstant:
+            self.code.append(f"push constant {node.value}")
+        elif node_type is StringConstant:
+            self.code.extend([
+                f"push constant {len(node.value)}",
+                "call String.new 1"
+            ])
+            for char in node.value:
+                self.code.extend([
+                    f"push constant {ord(char)}",
+                    "call String.appendChar 2"
+                ])
+        elif node_type is KeywordConstant:
+            if node.value == "this":
+                self.code.append("push pointer 0")
+            elif node.value == "true":
+                self.code.extend([
+                    "push constant 0",
+                    "not"
+                ])
+            else:
+                self.code.append("push constant 0")
+        elif node_type is VarRef:
+            self.code.append(f"push {self.variable(node.name)}")
+            if node.index is not None:
+                self.compile_expression(node.index)
+                self.code.extend([
+                    "add",
+                    "pop pointer 1",
+                    "push that 0"
+                ])
+        elif node_type is SubroutineCall:
+            self.compile_subroutine_call(node)
+        elif node_type is ParenExpression:
+            self.compile_expression(node.expression)
+        elif node_type is UnaryOp:
+            self.compile_term(node.term)
+            self.code.append(UNARY_OP_COMMANDS[node.op])
+
+    def compile_subroutine_call(self, node):
+        """Compiles the three forms of subroutine call
+        1. foo()      method call on this
+        2. obj.foo()  method call on a variable
+        3. Cls.foo()  function or constructor call
+
+        Args:
+            node (SubroutineCall): Call node.
+        """
+        arg_count = len(node.arguments)
+        if node.receiver is None:
+            self.code.append("push pointer 0")
+            function_name = f"{self.class_name}.{node.name}"
+            arg_count = arg_count + 1
+        elif self.symbols.lookup(node.receiver) is not None:
+            var_type = self.symbols.lookup(node.receiver)[0]
+            self.code.append(f"push {self.variable(node.receiver)}")
+            function_name = f"{var_type}.{node.name}"
+            arg_count = arg_count + 1
+        else:
+            function_name = f"{node.receiver}.{node.name}"
+
+        for argument in node.arguments:
+            self.compile_expression(argument)
+        self.code.append(f"call {function_name} {arg_count}")
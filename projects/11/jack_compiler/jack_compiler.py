@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from jack_codegen import ANALYZER_DIR
+from jack_codegen import COMPILER_DIR
+from jack_codegen import JackCodeGenerator
+from jack_codegen import JackCompileError
+from jack_parser import JackParser
+from jack_tokenizer import JackSyntaxError
+
+CACHE_NAME = ".jack_compiler_cache.json"
+
+# Sources which determine the generated code. A class only depends on its own
+# source, so these together with the source hash decide whether it is stale.
+COMPILER_SOURCES = [
+    os.path.join(COMPILER_DIR, "jack_codegen.py"),
+    os.path.join(COMPILER_DIR, "jack_symbol_table.py"),
+    os.path.join(ANALYZER_DIR, "jack_ast.py"),
+    os.path.join(ANALYZER_DIR, "jack_parser.py"),
+    os.path.join(ANALYZER_DIR, "jack_tokenizer.py")
+]
+
+
+def file_hash(path):
+    """Returns the SHA-1 of a file's contents.
+
+    Args:
+        path (str): File path.
+    """
+    with open(path, mode='rb') as infile_p:
+        return hashlib.sha1(infile_p.read()).hexdigest()
+
+
+def compiler_fingerprint():
+    """Returns a hash of the compiler itself, so that changing the compiler
+    invalidates every cached class.
+    """
+    digest = hashlib.sha1()
+    for path in COMPILER_SOURCES:
+        digest.update(file_hash(path).encode("UTF-8"))
+    return digest.hexdigest()
+
+
+def compile_file(path):
+    """Compiles one .jack file and writes the .vm file next to it.
+    Runs in the worker processes, so it only takes and returns picklable values.
+
+    Args:
+        path (str): .jack file.
+
+    Returns:
+        str: Error message, None on success.
+    """
+    try:
+        with open(path, mode='r', encoding='UTF-8') as infile_p:
+            source = infile_p.read()
+        class_node = JackParser(source).parse()
+        code = JackCodeGenerator().compile_class(class_node)
+    except (JackSyntaxError, JackCompileError) as e:
+        return f"FATAL {path}:{e.message}"
+    except Exception as any_exception:
+        return f"Could not compile {path}\nException {any_exception}\n"
+
+    vm_path = os.path.splitext(path)[0] + ".vm"
+    try:
+        with open(vm_path, mode='w', encoding='UTF-8') as outfile_p:
+            for command in code:
+                outfile_p.write(f"{command}\n")
+    except Exception as any_exception:
+        return f"Could not open output file {vm_path}\nException {any_exception}\n"
+    return None
+
+
+class JackCompiler():
+    """Incremental, parallel compiler driver.
+    Classes whose source and compiler fingerprint match the cache, and whose
+    .vm file is still the one they were compiled to, are skipped. The rest are compiled in a process pool.
+    """
+
+    def __init__(self, inpath, jobs=None):
+        """Constructor for JackCompiler
+
+        Args:
+            inpath (str): A .jack file or a directory of .jack files.
+            jobs (int): Worker processes, defaults to the number of CPUs.
+        """
+        self.inpath = inpath
+        self.jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+        if os.path.isdir(inpath):
+            self.source_dir = inpath
+        else:
+            self.source_dir = os.path.dirname(inpath) or "."
+        self.cache_path = os.path.join(self.source_dir, CACHE_NAME)
+        self.cache = {}
+        self.compiled = []
+        self.error_found = False
+
+    def source_files(self):
+        """Returns the .jack files to be compiled.
+
+        Returns:
+            list: Paths of .jack files.
+        """
+        if os.path.isdir(self.inpath):
+            return sorted(
+                os.path.join(self.inpath, name)
+                for name in os.listdir(self.inpath) if name.endswith(".jack")
+            )
+        return [self.inpath]
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, mode='r', encoding='UTF-8') as cache_p:
+                self.cache = json.load(cache_p)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save_cache(self):
+        try:
+            with open(self.cache_path, mode='w', encoding='UTF-8') as cache_p:
+                json.dump(self.cache, cache_p, indent=1, sort_keys=True)
+        except OSError as any_exception:
+            sys.stderr.write(f"Could not write cache {self.cache_path}\n")
+            sys.stderr.write(f"Exception {any_exception}\n")
+
+    def run(self):
+        """Compiles every stale class.
+        """
+        self.load_cache()
+        fingerprint = compiler_fingerprint()
+
+        stale = []
+        for path in self.source_files():
+            key = os.path.basename(path)
+            entry = {"source": file_hash(path), "compiler": fingerprint}
+            vm_path = os.path.splitext(path)[0] + ".vm"
+            cached = self.cache.get(key)
+            # A missing or edited .vm file is compiled again.
+            if cached is None or not os.path.exists(vm_path) or cached != dict(entry, output=file_hash(vm_path)):
+                stale.append((path, key, entry))
+
+        paths = [path for path, key, entry in stale]
+        if len(paths) <= 1 or self.jobs <= 1:
+            results = [compile_file(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(paths))) as pool:
+                results = list(pool.map(compile_file, paths))
+
+        for (path, key, entry), error in zip(stale, results):
+            if error is None:
+                entry["output"] = file_hash(os.path.splitext(path)[0] + ".vm")
+                self.cache[key] = entry
+                self.compiled.append(path)
+            else:
+                self.error_found = True
+                self.cache.pop(key, None)
+                sys.stderr.write(error)
+        self.save_cache()
+
+
+def print_help():
+    """Prints help message.
+    """
+    help_message = '''
+    Jack Compiler
+    Compiles .jack files to .vm files, recompiling only changed classes
+    Usage
+    ./jack_compiler.py <input .jack file or directory> [worker count]
+
+    '''
+    sys.stdout.write(help_message)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and not sys.argv[2].isnumeric()):
+        print_help()
+    else:
+        jobs = int(sys.argv[2]) if len(sys.argv) == 3 else None
+        compiler = JackCompiler(sys.argv[1], jobs)
+        compiler.run()
+    sys.exit(0)
@@ -0,0 +1,60 @@
+CLASS_KINDS = {"static", "field"}
+
+# VM segment used for each kind of variable.
+KIND_SEGMENTS = {
+    "static": "static",
+    "field": "this",
+    "argument": "argument",
+    "var": "local"
+}
+
+
+class JackSymbolTable():
+    """Two level symbol table used by the code generator.
+    static and field variables live in the class scope, argument and var
+    variables in the subroutine scope, which is reset for every subroutine.
+    """
+
+    def __init__(self):
+        self.class_scope = {}
+        self.subroutine_scope = {}
+        self.counts = {kind: 0 for kind in KIND_SEGMENTS}
+
+    def start_subroutine(self):
+        """Starts a new subroutine scope.
+        """
+        self.subroutine_scope = {}
+        self.counts["argument"] = 0
+        self.counts["var"] = 0
+
+    def define(self, name, var_type, kind):
+        """Defines a new variable and assigns it the next index of its kind.
+
+        Args:
+            name (str): Variable name.
+            var_type (str): Variable type.
+            kind (str): static, field, argument or var.
+        """
+        scope = self.class_scope if kind in CLASS_KINDS else self.subroutine_scope
+        scope[name] = (var_type, kind, self.counts[kind])
+        self.counts[kind] = self.counts[kind] + 1
+
+    def lookup(self, name):
+        """Returns (type, kind, index) of a variable or None if it is not defined.
+        The subroutine scope shadows the class scope.
+
+        Args:
+            name (str): Variable name.
+        """
+        entry = self.subroutine_scope.get(name)
+        if entry is None:
+            entry = self.class_scope.get(name)
+        return entry
+
+    def var_count(self, kind):
+        """Returns the number of variables of a kind defined so far.
+
+        Args:
+            kind (str): static, field, argument or var.
+        """
+        return self.counts[kind]
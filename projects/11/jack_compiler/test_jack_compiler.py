@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+from jack_codegen import JackCodeGenerator
+from jack_compiler import JackCompiler
+from jack_parser import JackParser
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "09")
+
+
+def compile_source(source):
+    return JackCodeGenerator().compile_class(JackParser(source).parse())
+
+
+class TestJackCompiler(unittest.TestCase):
+
+    def test_codegen(self):
+        code = compile_source("""
+            class Point {
+                field int x, y;
+                static int count;
+                constructor Point new(int ax) {
+                    let x = ax;
+                    let count = count + 1;
+                    return this;
+                }
+                method int sum(Array a) {
+                    var int i;
+                    let a[i] = x * 2;
+                    do draw();
+                    return a[i] + Math.abs(-y);
+                }
+            }
+        """)
+        self.assertEqual(code[0:4], [
+            "function Point.new 0",
+            "push constant 2",
+            "call Memory.alloc 1",
+            "pop pointer 0"
+        ])
+        self.assertIn("pop static 0", code)
+        self.assertEqual(code[code.index("function Point.sum 1"):][1:3], ["push argument 0", "pop pointer 0"])
+        self.assertIn("call Math.multiply 2", code)
+        self.assertIn("call Point.draw 1", code)
+        self.assertIn("call Math.abs 1", code)
+        self.assertEqual(code[-1], "return")
+
+    def test_incremental_build(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for program in ("Square", "List"):
+                shutil.copytree(os.path.join(PROGRAMS_DIR, program), os.path.join(tmp_dir, program))
+            square_dir = os.path.join(tmp_dir, "Square")
+
+            compiler = JackCompiler(square_dir, jobs=2)
+            compiler.run()
+            self.assertFalse(compiler.error_found)
+            self.assertEqual(len(compiler.compiled), 3)
+            for name in ("Main", "Square", "SquareGame"):
+                self.assertTrue(os.path.exists(os.path.join(square_dir, f"{name}.vm")))
+
+            compiler = JackCompiler(square_dir, jobs=2)
+            compiler.run()
+            self.assertEqual(compiler.compiled, [])
+
+            with open(os.path.join(square_dir, "Main.jack"), mode='a', encoding='UTF-8') as jack_file:
+                jack_file.write("// edited\n")
+            compiler = JackCompiler(square_dir, jobs=2)
+            compiler.run()
+            self.assertEqual([os.path.basename(path) for path in compiler.compiled], ["Main.jack"])
+
+            vm_path = os.path.join(square_dir, "Square.vm")
+            with open(vm_path, mode='r', encoding='UTF-8') as vm_file:
+                code = vm_file.read()
+            with open(vm_path, mode='w', encoding='UTF-8') as vm_file:
+                vm_file.write("// edited\n")
+            compiler = JackCompiler(square_dir, jobs=2)
+            compiler.run()
+            self.assertEqual([os.path.basename(path) for path in compiler.compiled], ["Square.jack"])
+            with open(vm_path, mode='r', encoding='UTF-8') as vm_file:
+                self.assertEqual(vm_file.read(), code)
+
+            compiler = JackCompiler(os.path.join(tmp_dir, "List", "List.jack"))
+            compiler.run()
+            self.assertEqual(len(compiler.compiled), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
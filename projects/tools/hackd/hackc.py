@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+import os
+import socket
+import subprocess
+import sys
+
+from hackd_protocol import TOOLS
+from hackd_protocol import TOOL_OPTIONS
+from hackd_protocol import default_socket_path
+from hackd_protocol import decode_message
+from hackd_protocol import encode_message
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECTS_DIR = os.path.join(TOOLS_DIR, "..", "..")
+
+# Standalone scripts used when no daemon is listening.
+STANDALONE_SCRIPTS = {
+    "hasm": os.path.join(PROJECTS_DIR, "06", "hasm", "hasm.py"),
+    "vm2asm": os.path.join(PROJECTS_DIR, "07", "vm2asm", "vm2asm.py")
+}
+
+
+def request(socket_path, message):
+    """Sends one request to hackd and waits for the response.
+
+    Args:
+        socket_path (str): Daemon socket.
+        message (dict): Request.
+
+    Returns:
+        dict: Response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(encode_message(message))
+        with client.makefile("rb") as stream:
+            return decode_message(stream.readline())
+
+
+def run(tool, infile, outfile, socket_path, options=()):
+    """Runs tool on infile through the daemon, writing outfile the same way
+    hasm.py and vm2asm.py do. Falls back to the standalone script if the
+    daemon is not running.
+
+    Args:
+        tool (str): "hasm" or "vm2asm".
+        infile (str): Input file.
+        outfile (str): Output file.
+        socket_path (str): Daemon socket.
+        options (list): Flags of the tool, see TOOL_OPTIONS.
+
+    Returns:
+        int: Exit status.
+    """
+    unsupported = [option for option in options if option not in TOOL_OPTIONS[tool]]
+    if len(unsupported) != 0:
+        sys.stderr.write(f"{tool} does not support {' '.join(unsupported)}\n")
+        return 1
+
+    try:
+        with open(infile, mode='r', encoding='UTF-8') as infile_p:
+            source = infile_p.read()
+    except Exception as any_exception:
+        sys.stderr.write(f"Could not read input file {infile}\n")
+        sys.stderr.write(f"Exception {any_exception}\n")
+        return 1
+
+    try:
+        response = request(socket_path, {"op": tool, "name": infile, "source": source, "options": list(options)})
+    except (FileNotFoundError, ConnectionRefusedError):
+        return subprocess.run([sys.executable, STANDALONE_SCRIPTS[tool], infile, outfile, *options]).returncode
+
+    if not response.get("ok"):
+        sys.stderr.write(f"hackd: {response.get('message')}\n")
+        return 1
+
+    sys.stderr.write(response["stderr"])
+
+    # Write to output file only if no errors were found.
+    if response["error_found"] is False:
+        try:
+            with open(outfile, mode='w', encoding='UTF-8') as outfile_p:
+                for code in response["output"]:
+                    outfile_p.write(f"{code}\n")
+        except Exception as any_exception:
+            sys.stderr.write(f"Could not open output file {outfile}\n")
+            sys.stderr.write(f"Exception {any_exception}\n")
+            return 1
+    return 0
+
+
+def print_help():
+    """Prints help message.
+    """
+    help_message = '''
+    HACKC
+    Client for hackd, drop-in replacement for hasm.py and vm2asm.py
+    Usage
+    ./hackc.py hasm <input .asm file> <output .hack file> [--optimize-cfg] [--parallel]
+    ./hackc.py vm2asm <input .vm file> <out .asm file> [--link-os] [--track-sp]
+
+    '''
+    sys.stdout.write(help_message)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4 or sys.argv[1] not in TOOLS:
+        print_help()
+        sys.exit(0)
+    sys.exit(run(sys.argv[1], sys.argv[2], sys.argv[3], default_socket_path(), sys.argv[4:]))
@@ -0,0 +1,318 @@
+#!/usr/bin/python3
+
+import asyncio
+import contextlib
+import functools
+import hashlib
+import io
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECTS_DIR = os.path.join(TOOLS_DIR, "..", "..")
+sys.path.insert(0, os.path.join(PROJECTS_DIR, "06", "hasm"))
+sys.path.insert(0, os.path.join(PROJECTS_DIR, "07", "vm2asm"))
+
+from hasm import Assembler
+from vm2asm import VM2ASM
+from hackd_protocol import TOOLS
+from hackd_protocol import TOOL_OPTIONS
+from hackd_protocol import default_socket_path
+from hackd_protocol import decode_message
+from hackd_protocol import encode_message
+
+# Upper bound for a single request line, large enough for generated sources.
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def seeded_table():
+    """Returns the predefined symbols, seeded once per process.
+
+    Returns:
+        dict: Symbol table, to be copied before use.
+    """
+    template = Assembler(None, None)
+    template.seed_symbol_table()
+    return template.sym_table.table
+
+
+def assemble(name, source, options):
+    """Assembles HACK ASM source using the warm symbol table.
+
+    Args:
+        name (str): Input file name, used in error messages only.
+        source (str): Contents of the .asm file.
+        options (list): hasm.py flags.
+
+    Returns:
+        tuple: (list of machine code lines, error_found flag)
+    """
+    assembler = Assembler(name, None)
+    assembler.infile_p = io.StringIO(source)
+    if "--optimize-cfg" in options:
+        assembler.optimize_control_flow()
+    assembler.sym_table.table = dict(seeded_table())
+    assembler.build_symbol_table()
+    # --parallel only changes how hasm.py uses the CPUs, the daemon already
+    # serves requests in a process pool, so the output is the same.
+    assembler.parse()
+    return assembler.machine_code, assembler.error_found
+
+
+def translate(name, source, options):
+    """Translates VM source to HACK ASM.
+
+    Args:
+        name (str): Input file name, static labels are derived from it.
+        source (str): Contents of the .vm file.
+        options (list): vm2asm.py flags.
+
+    Returns:
+        tuple: (list of ASM lines, error_found flag)
+    """
+    translator = VM2ASM(
+        name, None, link_os="--link-os" in options, track_sp="--track-sp" in options
+    )
+    translator.infile_p = io.StringIO(source)
+    translator.setup_codegen()
+    translator.parse()
+    translator.link_os_library()
+    return translator.generated_code, translator.error_found
+
+
+def run_tool(tool, name, source, options):
+    """Runs a tool and builds the response.
+    Runs in the worker processes, so it only takes and returns picklable values.
+
+    Args:
+        tool (str): "hasm" or "vm2asm".
+        name (str): Base name of the input file.
+        source (str): Contents of the input file.
+        options (list): Flags of the tool.
+
+    Returns:
+        dict: Response with output lines, error flag and captured stderr.
+    """
+    # Both tools report errors on stderr, capture it for the client.
+    errors = io.StringIO()
+    with contextlib.redirect_stderr(errors):
+        if tool == "hasm":
+            output, error_found = assemble(name, source, options)
+        else:
+            output, error_found = translate(name, source, options)
+
+    return {
+        "ok": True,
+        "output": output,
+        "error_found": error_found,
+        "stderr": errors.getvalue()
+    }
+
+
+class HackDaemon():
+    """Resident translation server.
+    1. Keeps a pre-seeded symbol table so every request skips seeding.
+    2. Caches translation results keyed by tool, options, file name and
+       source hash.
+    3. Serves newline delimited JSON requests over a Unix domain socket.
+       Translations run in a process pool, so a large request does not
+       hold up other clients.
+    """
+
+    def __init__(self, socket_path, cache_size=CACHE_SIZE):
+        """Constructor for HackDaemon
+
+        Args:
+            socket_path (str): Path of the Unix domain socket to listen on.
+            cache_size (int): Number of translation results kept in memory.
+        """
+        self.socket_path = socket_path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.requests_served = 0
+        self.cache_hits = 0
+        self.executor = None
+        self.seeded_table = seeded_table()
+
+    def prepare(self, request):
+        """Answers a request from the cache or checks what has to be run.
+
+        Args:
+            request: Decoded request.
+
+        Returns:
+            tuple: (response, None) if the request is answered, otherwise
+                (cache key, run_tool arguments).
+        """
+        self.requests_served = self.requests_served + 1
+        if not isinstance(request, dict):
+            return ({"ok": False, "message": "Bad request, expected a JSON object"}, None)
+        op = request.get("op")
+        if op == "ping":
+            return ({"ok": True}, None)
+        elif op == "stats":
+            return ({
+                "ok": True,
+                "requests": self.requests_served,
+                "cache_hits": self.cache_hits,
+                "cache_entries": len(self.cache)
+            }, None)
+        elif op in TOOLS:
+            name = request.get("name")
+            source = request.get("source")
+            options = request.get("options", [])
+            if not isinstance(name, str) or not isinstance(source, str):
+                return ({"ok": False, "message": f"{op} needs name and source"}, None)
+            if (
+                not isinstance(options, list)
+                or not all(isinstance(option, str) for option in options)
+                or not set(options) <= TOOL_OPTIONS[op]
+            ):
+                return ({"ok": False, "message": f"Unsupported {op} options {options}"}, None)
+            name = os.path.basename(name)
+            options = sorted(options)
+            digest = hashlib.sha1(source.encode("UTF-8")).hexdigest()
+            key = (op, tuple(options), name, digest)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                self.cache_hits = self.cache_hits + 1
+                return (cached, None)
+            return (key, (op, name, source, options))
+        else:
+            return ({"ok": False, "message": f"Unknown operation {op}"}, None)
+
+    def store(self, key, response):
+        """Caches a response and returns it.
+        """
+        self.cache[key] = response
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return response
+
+    def handle_request(self, request):
+        """Dispatches a single decoded request, translating in this process.
+
+        Args:
+            request (dict): Decoded request.
+
+        Returns:
+            dict: Response.
+        """
+        response, job = self.prepare(request)
+        if job is None:
+            return response
+        return self.store(response, run_tool(*job))
+
+    async def respond(self, line):
+        """Answers one request line, translating in the process pool.
+
+        Args:
+            line (bytes): Encoded request.
+
+        Returns:
+            dict: Response.
+        """
+        try:
+            request = decode_message(line)
+        except ValueError as any_exception:
+            return {"ok": False, "message": f"Bad request {any_exception}"}
+        response, job = self.prepare(request)
+        if job is None:
+            return response
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, run_tool, *job)
+        except Exception as any_exception:
+            return {"ok": False, "message": f"{job[0]} failed {any_exception}"}
+        return self.store(response, result)
+
+    async def handle_client(self, reader, writer):
+        """Serves requests from one client until it closes the connection.
+
+        Args:
+            reader (asyncio.StreamReader): Client input stream.
+            writer (asyncio.StreamWriter): Client output stream.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(encode_message(await self.respond(line)))
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def socket_in_use(self):
+        """Checks whether a daemon is listening on the socket path.
+
+        Returns:
+            bool: True if a connection to the socket succeeds.
+        """
+        try:
+            unused, writer = await asyncio.open_unix_connection(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+        writer.close()
+        return True
+
+    async def serve(self):
+        """Listens on the socket until the task is cancelled.
+        A socket left behind by a daemon which is gone is replaced, one
+        still in use is not.
+
+        Raises:
+            OSError: Another daemon is listening on the socket path.
+        """
+        if os.path.exists(self.socket_path):
+            if await self.socket_in_use():
+                raise OSError(f"hackd is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        self.executor = ProcessPoolExecutor()
+        server = await asyncio.start_unix_server(
+            self.handle_client, path=self.socket_path, limit=MAX_REQUEST_SIZE
+        )
+        os.chmod(self.socket_path, 0o600)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def print_help():
+    """Prints help message.
+    """
+    help_message = '''
+    HACKD
+    Resident hasm/vm2asm translation daemon, use hackc.py as the client.
+    Usage
+    ./hackd.py [socket path]
+
+    '''
+    sys.stdout.write(help_message)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] in {"-h", "--help"}):
+        print_help()
+        sys.exit(0)
+
+    path = sys.argv[1] if len(sys.argv) == 2 else default_socket_path()
+    daemon = HackDaemon(path)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
+    except OSError as any_exception:
+        sys.stderr.write(f"{any_exception}\n")
+        sys.exit(1)
+    sys.exit(0)
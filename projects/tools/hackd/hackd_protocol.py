@@ -0,0 +1,45 @@
+import json
+import os
+
+TOOLS = {"hasm", "vm2asm"}
+
+# Command line flags of each tool which requests may pass in "options".
+TOOL_OPTIONS = {
+    "hasm": {"--optimize-cfg", "--parallel"},
+    "vm2asm": {"--link-os", "--track-sp"}
+}
+
+
+def default_socket_path():
+    """Returns the Unix socket path used by both hackd and hackc.
+    HACKD_SOCKET overrides the per-user default.
+
+    Returns:
+        str: Socket path.
+    """
+    default_path = f"/tmp/hackd-{os.getuid()}.sock"
+    return os.environ.get("HACKD_SOCKET", default_path)
+
+
+def encode_message(message):
+    """Encodes a message as a single newline terminated JSON line.
+
+    Args:
+        message (dict): Request or response.
+
+    Returns:
+        bytes: Encoded message.
+    """
+    return (json.dumps(message) + "\n").encode("UTF-8")
+
+
+def decode_message(line):
+    """Decodes a single JSON line received on the socket.
+
+    Args:
+        line (bytes): Encoded message.
+
+    Returns:
+        dict: Decoded message.
+    """
+    return json.loads(line.decode("UTF-8"))
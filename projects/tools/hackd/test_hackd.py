@@ -0,0 +1,138 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+from hackd import HackDaemon
+from hackd import PROJECTS_DIR
+from hackd_protocol import decode_message
+from hackd_protocol import encode_message
+
+
+def read_file(*path):
+    with open(os.path.join(PROJECTS_DIR, *path), mode='r', encoding='UTF-8') as file_p:
+        return file_p.read()
+
+
+class TestHackDaemon(unittest.TestCase):
+
+    def test_assemble_matches_reference(self):
+        daemon = HackDaemon(None)
+        response = daemon.handle_request({
+            "op": "hasm",
+            "name": "Max.asm",
+            "source": read_file("06", "max", "Max.asm")
+        })
+        self.assertTrue(response["ok"])
+        self.assertFalse(response["error_found"])
+        self.assertEqual(response["output"], read_file("06", "max", "Max.hack").split())
+
+    def test_cache_and_warm_table(self):
+        daemon = HackDaemon(None)
+        request = {"op": "hasm", "name": "a.asm", "source": "@x\n@y\n(END)\n@END\n"}
+        first = daemon.handle_request(request)
+        second = daemon.handle_request(request)
+
+        self.assertIs(first, second)
+        self.assertEqual(daemon.cache_hits, 1)
+        self.assertEqual(first["output"][0], f"{16:016b}")
+        # Variables of one request must not leak into the seeded table.
+        self.assertFalse("x" in daemon.seeded_table)
+
+    def test_translate_and_errors(self):
+        daemon = HackDaemon(None)
+        response = daemon.handle_request({"op": "vm2asm", "name": "t.vm", "source": "push constant 7\n"})
+        self.assertFalse(response["error_found"])
+        self.assertIn("@7", response["output"])
+
+        response = daemon.handle_request({"op": "hasm", "name": "b.asm", "source": "D=Q\n"})
+        self.assertTrue(response["error_found"])
+        self.assertIn("Unknown computation", response["stderr"])
+
+        self.assertFalse(daemon.handle_request({"op": "unknown"})["ok"])
+        self.assertFalse(daemon.handle_request([])["ok"])
+        self.assertFalse(daemon.handle_request("x")["ok"])
+
+    def test_options(self):
+        daemon = HackDaemon(None)
+        request = {"op": "vm2asm", "name": "t.vm", "source": "push constant 7\npush constant 8\nadd\n"}
+        plain = daemon.handle_request(request)
+        tracked = daemon.handle_request(dict(request, options=["--track-sp"]))
+        self.assertTrue(tracked["ok"])
+        self.assertNotEqual(tracked["output"], plain["output"])
+        self.assertEqual(daemon.cache_hits, 0)
+
+        response = daemon.handle_request(dict(request, options=["--optimize-cfg"]))
+        self.assertFalse(response["ok"])
+        self.assertIn("--optimize-cfg", response["message"])
+
+        for options in ([["x"]], [{}], "--track-sp", [7]):
+            self.assertFalse(daemon.handle_request(dict(request, options=options))["ok"])
+
+    def test_socket_round_trip(self):
+        async def round_trip(socket_path):
+            daemon = HackDaemon(socket_path)
+            server = asyncio.ensure_future(daemon.serve())
+            while not os.path.exists(socket_path):
+                await asyncio.sleep(0.01)
+
+            async def client():
+                reader, writer = await asyncio.open_unix_connection(socket_path)
+                writer.write(encode_message({"op": "hasm", "name": "a.asm", "source": "@5\n"}))
+                response = decode_message(await reader.readline())
+                writer.close()
+                return response
+
+            responses = await asyncio.gather(*[client() for _ in range(8)])
+
+            # Malformed requests get an error and the connection stays usable.
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(b"[]\n")
+            writer.write(encode_message({"op": "hasm", "name": "a.asm", "source": "@5\n", "options": [["x"]]}))
+            writer.write(encode_message({"op": "ping"}))
+            for _ in range(3):
+                responses.append(decode_message(await reader.readline()))
+            writer.close()
+
+            # A second daemon leaves the socket of the running one alone.
+            with self.assertRaises(OSError):
+                await HackDaemon(socket_path).serve()
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(encode_message({"op": "ping"}))
+            responses.append(decode_message(await reader.readline()))
+            writer.close()
+            server.cancel()
+            return responses
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            responses = asyncio.run(round_trip(os.path.join(tmp_dir, "hackd.sock")))
+        for response in responses[:8]:
+            self.assertEqual(response["output"], ["0000000000000101"])
+        self.assertFalse(responses[8]["ok"])
+        self.assertFalse(responses[9]["ok"])
+        self.assertIn("options", responses[9]["message"])
+        self.assertEqual(responses[10:], [{"ok": True}, {"ok": True}])
+
+    def test_stale_socket(self):
+        async def serve_once(socket_path):
+            daemon = HackDaemon(socket_path)
+            server = asyncio.ensure_future(daemon.serve())
+            while not await daemon.socket_in_use():
+                await asyncio.sleep(0.01)
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(encode_message({"op": "ping"}))
+            response = decode_message(await reader.readline())
+            writer.close()
+            server.cancel()
+            return response
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, "hackd.sock")
+            # A socket file nobody listens on, as left by a killed daemon.
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+                stale.bind(socket_path)
+            self.assertEqual(asyncio.run(serve_once(socket_path)), {"ok": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+
+import os
+import struct
+import sys
+import zlib
+from array import array
+from hackemu import HackEmulator
+from hackemu import SCREEN
+from hackemu import SCREEN_ROWS
+from hackemu import SCREEN_ROW_WORDS
+from hackemu import read_hack
+
+WIDTH = 512
+HEIGHT = SCREEN_ROWS
+ROW_BYTES = WIDTH // 8
+
+# The leftmost pixel of a screen word is its least significant bit, packed
+# 1 bpp formats put it in the most significant bit of a byte.
+REVERSED_BITS = bytes(int(f"{value:08b}"[::-1], 2) for value in range(256))
+INVERTED_BITS = bytes(value ^ 0xFF for value in range(256))
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_chunk(kind, data):
+    """Returns a PNG chunk with length and CRC."""
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class ScreenFramebuffer():
+    """Headless copy of the Hack screen as a packed 512x256 1 bpp bitmap.
+
+    The framebuffer registers itself as the screen watcher of an emulator,
+    so every write to the screen map marks its row dirty. update converts
+    only the dirty rows, row bytes use the PBM (P4) layout: most significant
+    bit first and 1 for a black pixel.
+    """
+
+    def __init__(self, emulator):
+        """Constructor for ScreenFramebuffer
+
+        Args:
+            emulator (HackEmulator): Emulator to watch.
+        """
+        self.emulator = emulator
+        self.buffer = bytearray(ROW_BYTES * HEIGHT)
+        self.view = memoryview(self.buffer)
+        emulator.screen_rows = set(range(SCREEN_ROWS))
+
+    def update(self):
+        """Converts the rows written since the last update.
+
+        Returns:
+            list: Changed row numbers in ascending order.
+        """
+        rows = sorted(self.emulator.screen_rows)
+        self.emulator.screen_rows.clear()
+        ram = self.emulator.ram
+        start = 0
+        while start < len(rows):
+            # Convert runs of adjacent rows in one go.
+            end = start + 1
+            while end < len(rows) and rows[end] == rows[end - 1] + 1:
+                end = end + 1
+            first_row = rows[start]
+            row_count = end - start
+            address = SCREEN + first_row * SCREEN_ROW_WORDS
+            words = array("H", ram[address:address + row_count * SCREEN_ROW_WORDS])
+            if sys.byteorder == "big":
+                words.byteswap()
+            offset = first_row * ROW_BYTES
+            self.view[offset:offset + row_count * ROW_BYTES] = words.tobytes().translate(REVERSED_BITS)
+            start = end
+        return rows
+
+    def pixel(self, x, y):
+        """Returns 1 for a black pixel.
+        """
+        return (self.buffer[y * ROW_BYTES + x // 8] >> (7 - x % 8)) & 1
+
+    def write_pbm(self, outfile_p):
+        """Writes the frame as binary PBM straight from the framebuffer.
+
+        Args:
+            outfile_p (file): File opened in binary mode.
+        """
+        outfile_p.write(f"P4\n{WIDTH} {HEIGHT}\n".encode("ascii"))
+        outfile_p.write(self.view)
+
+    def write_png(self, outfile_p):
+        """Writes the frame as a 1 bit grayscale PNG.
+
+        Args:
+            outfile_p (file): File opened in binary mode.
+        """
+        # PNG grayscale uses 0 for black.
+        pixels = self.buffer.translate(INVERTED_BITS)
+        raw = bytearray()
+        for offset in range(0, len(pixels), ROW_BYTES):
+            raw.append(0)
+            raw.extend(pixels[offset:offset + ROW_BYTES])
+        outfile_p.write(PNG_SIGNATURE)
+        outfile_p.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", WIDTH, HEIGHT, 1, 0, 0, 0, 0)))
+        outfile_p.write(png_chunk(b"IDAT", zlib.compress(bytes(raw))))
+        outfile_p.write(png_chunk(b"IEND", b""))
+
+
+class FrameRecorder():
+    """Writes a numbered frame sequence of a running program. Frames in
+    which nothing was drawn are skipped.
+    """
+
+    def __init__(self, framebuffer, outdir, image_format="pbm"):
+        """Constructor for FrameRecorder
+
+        Args:
+            framebuffer (ScreenFramebuffer): Framebuffer to export.
+            outdir (str): Output directory.
+            image_format (str): "pbm" or "png".
+        """
+        if image_format not in ("pbm", "png"):
+            raise ValueError(f"Unknown image format {image_format}")
+        self.framebuffer = framebuffer
+        self.outdir = outdir
+        self.image_format = image_format
+        self.frames_written = 0
+
+    def capture(self):
+        """Updates the framebuffer and writes a frame if anything changed.
+
+        Returns:
+            str: Path of the written frame, None if skipped.
+        """
+        if len(self.framebuffer.update()) == 0:
+            return None
+        path = os.path.join(self.outdir, f"frame_{self.frames_written:06d}.{self.image_format}")
+        with open(path, mode='wb') as frame_p:
+            if self.image_format == "pbm":
+                self.framebuffer.write_pbm(frame_p)
+            else:
+                self.framebuffer.write_png(frame_p)
+        self.frames_written = self.frames_written + 1
+        return path
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Screen Recorder
+    Runs a .hack program headless and writes a frame every <steps> instructions
+    Usage:
+        hack_screen.py <program .hack file> <output dir> <frames> <steps> [pbm|png]
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (5, 6) or not sys.argv[3].isnumeric() or not sys.argv[4].isnumeric():
+        print_help()
+    else:
+        emulator = HackEmulator(read_hack(sys.argv[1]))
+        os.makedirs(sys.argv[2], exist_ok=True)
+        recorder = FrameRecorder(ScreenFramebuffer(emulator), sys.argv[2], *sys.argv[5:])
+        for _ in range(int(sys.argv[3])):
+            emulator.run(int(sys.argv[4]))
+            recorder.capture()
+            if emulator.halted:
+                break
+        print(f"{recorder.frames_written} frames written")
+    sys.exit(0)
@@ -0,0 +1,85 @@
+import struct
+import zlib
+from array import array
+
+RAM_SIZE = 32768
+
+# RAM is shared between snapshots in pages of 2^PAGE_BITS words.
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_COUNT = RAM_SIZE // PAGE_SIZE
+
+PACK_MAGIC = b"HSNP"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHHHHQ?I")
+
+
+class Snapshot():
+    """Immutable copy of the full machine state.
+
+    RAM, which includes the memory-mapped screen and keyboard, is held as a
+    tuple of page tuples. A snapshot only copies the pages written since the
+    previous snapshot or restore and shares every other page with it, so a
+    chain of snapshots costs memory proportional to what changed.
+    """
+
+    __slots__ = ("pc", "a", "d", "cycle", "halted", "pages", "key_events")
+
+    def __init__(self, pc, a, d, cycle, halted, pages, key_events):
+        """Constructor for Snapshot
+
+        Args:
+            pc (int): Program counter.
+            a (int): A register.
+            d (int): D register.
+            cycle (int): Instructions executed since reset.
+            halted (bool): The program reached its final loop.
+            pages (tuple): PAGE_COUNT tuples of PAGE_SIZE words.
+            key_events (int): Length of the recorded keyboard log.
+        """
+        self.pc = pc
+        self.a = a
+        self.d = d
+        self.cycle = cycle
+        self.halted = halted
+        self.pages = pages
+        self.key_events = key_events
+
+    def ram(self):
+        """Returns RAM as a flat list of words.
+        """
+        words = []
+        for page in self.pages:
+            words.extend(page)
+        return words
+
+    def pack(self):
+        """Serializes the snapshot into a compressed byte string.
+
+        Returns:
+            bytes: Packed snapshot.
+        """
+        header = PACK_HEADER.pack(
+            PACK_MAGIC, PACK_VERSION, self.pc, self.a, self.d, self.cycle, self.halted, self.key_events
+        )
+        return header + zlib.compress(array("H", self.ram()).tobytes())
+
+    @staticmethod
+    def unpack(data):
+        """Reads a snapshot written by pack.
+
+        Args:
+            data (bytes): Packed snapshot.
+
+        Returns:
+            Snapshot: Unpacked snapshot.
+        """
+        magic, version, pc, a, d, cycle, halted, key_events = PACK_HEADER.unpack_from(data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("Not a packed snapshot")
+        words = array("H")
+        words.frombytes(zlib.decompress(data[PACK_HEADER.size:]))
+        pages = tuple(
+            tuple(words[index:index + PAGE_SIZE]) for index in range(0, RAM_SIZE, PAGE_SIZE)
+        )
+        return Snapshot(pc, a, d, cycle, halted, pages, key_events)
@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+
+import bisect
+import queue
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from hackemu import ROM_SIZE
+from hackemu import HackEmulator
+from hackemu import decode
+from hackemu import read_hack
+
+TRACE_MAGIC = b"HTRC"
+TRACE_VERSION = 1
+# magic, version, block steps, length of the compressed program
+TRACE_HEADER = struct.Struct("<4sHII")
+TRACE_TRAILER = struct.Struct("<QI4s")
+# first step, cycle, pc, a, d, file offset, compressed length, steps
+TRACE_BLOCK = struct.Struct("<QQHHHQII")
+
+# Steps per block, each block starts with the full registers and is
+# compressed on its own, so it is also the granularity of seeking.
+DEFAULT_BLOCK_STEPS = 65536
+
+# Blocks waiting for the writer thread before execute has to wait.
+MAX_PENDING_BLOCKS = 8
+
+
+def pack_words(words):
+    """Returns 16 bit words as little endian bytes.
+    """
+    words = array("H", words)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words.tobytes()
+
+
+def unpack_words(data):
+    """Reads words packed by pack_words.
+    """
+    words = array("H")
+    words.frombytes(data)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+def recording(instruction, record):
+    """Returns a decoded C-Instruction whose operation also passes its
+    result to record.
+    """
+    operation = instruction[2]
+
+    def traced_operation(x, y):
+        out = operation(x, y)
+        record(out)
+        return out
+
+    return instruction[:2] + (traced_operation,) + instruction[3:]
+
+
+class TraceWriter():
+    """Records the execution of an emulator into a trace file.
+
+    Only what cannot be derived from the program is recorded: the
+    emulator runs decoded, a copy of its program whose C-Instructions append
+    their result to buffer, which
+    together with the registers at the start of a block gives the address,
+    A, D and RAM write of every step. A-Instructions cost nothing. Full
+    blocks of block_steps steps are compressed and written by a background
+    thread while the emulator carries on. A block also ends when the
+    emulator is reset or restored, so every block runs straight from its
+    registers.
+
+    The file is a TRACE_HEADER and the compressed program, the compressed
+    blocks, an index with a TRACE_BLOCK entry per block and a TRACE_TRAILER
+    pointing at the index. Writes from outside the program, such as
+    keyboard input, are not recorded, their effect shows in the results.
+    """
+
+    def __init__(self, emulator, path, block_steps=DEFAULT_BLOCK_STEPS, level=6):
+        """Constructor for TraceWriter
+
+        Args:
+            emulator (HackEmulator): Emulator to record.
+            path (str): Trace file.
+            block_steps (int): Steps per block.
+            level (int): zlib compression level.
+        """
+        self.emulator = emulator
+        self.block_steps = block_steps
+        self.level = level
+        self.buffer = []
+        record = self.buffer.append
+        self.decoded = [
+            recording(instruction, record) if instruction[0] else instruction
+            for instruction in emulator.decoded
+        ]
+        self.steps = 0
+        self.total_steps = 0
+        self.start = None
+        self.index = []
+        self.error = None
+        program = zlib.compress(pack_words(emulator.rom), level)
+        self.outfile_p = open(path, mode='wb')
+        self.outfile_p.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, block_steps, len(program)))
+        self.outfile_p.write(program)
+        self.pending = queue.Queue(MAX_PENDING_BLOCKS)
+        self.thread = threading.Thread(target=self.write_blocks, daemon=True)
+        self.thread.start()
+        emulator.trace = self
+
+    def begin(self):
+        """Called by the emulator before it runs, notes the registers at
+        the start of a block.
+
+        Returns:
+            int: Steps left in the current block.
+        """
+        if self.start is None:
+            emulator = self.emulator
+            self.start = (emulator.cycle, emulator.pc, emulator.a, emulator.d)
+        return self.block_steps - self.steps
+
+    def commit(self, steps):
+        """Called by the emulator after it ran steps instructions.
+        """
+        self.steps = self.steps + steps
+        if self.steps >= self.block_steps:
+            self.end_block()
+
+    def end_block(self):
+        """Hands the current block to the writer thread.
+        """
+        if self.steps != 0:
+            self.pending.put((self.total_steps, self.start, self.steps, self.buffer[:]))
+            self.total_steps = self.total_steps + self.steps
+            self.buffer.clear()
+            self.steps = 0
+        self.start = None
+
+    def write_blocks(self):
+        """Writer thread, compresses and writes blocks until it gets None.
+        """
+        offset = self.outfile_p.tell()
+        while True:
+            block = self.pending.get()
+            if block is None:
+                return
+            if self.error is not None:
+                continue
+            first_step, (cycle, pc, a, d), steps, data = block
+            try:
+                data = zlib.compress(pack_words(data), self.level)
+                self.outfile_p.write(data)
+            except Exception as any_exception:
+                self.error = any_exception
+                continue
+            self.index.append((first_step, cycle, pc, a, d, offset, len(data), steps))
+            offset = offset + len(data)
+
+    def close(self):
+        """Writes the remaining steps and the index, and detaches from the
+        emulator.
+        """
+        self.end_block()
+        self.pending.put(None)
+        self.thread.join()
+        if self.emulator.trace is self:
+            self.emulator.trace = None
+        try:
+            if self.error is not None:
+                raise self.error
+            index_offset = self.outfile_p.tell()
+            for entry in self.index:
+                self.outfile_p.write(TRACE_BLOCK.pack(*entry))
+            self.outfile_p.write(TRACE_TRAILER.pack(index_offset, len(self.index), TRACE_MAGIC))
+        finally:
+            self.outfile_p.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TraceReader():
+    """Reads a trace written by TraceWriter.
+
+    Steps are numbered from 0 in the order they were recorded and come out
+    as (step, pc, a, d, address, value) tuples: the address of the executed
+    instruction, A and D after it, and the RAM write it made, address and
+    value are None if it wrote nothing. Only the blocks covering the
+    requested steps are decompressed.
+    """
+
+    def __init__(self, path):
+        """Constructor for TraceReader
+
+        Args:
+            path (str): Trace file.
+        """
+        self.infile_p = open(path, mode='rb')
+        magic, version, self.block_steps, length = TRACE_HEADER.unpack(self.infile_p.read(TRACE_HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise ValueError("Not a trace file")
+        self.rom = list(unpack_words(zlib.decompress(self.infile_p.read(length))))
+        self.decoded = [decode(word) for word in self.rom]
+        self.decoded.extend([decode(0)] * (ROM_SIZE - len(self.rom)))
+        self.infile_p.seek(-TRACE_TRAILER.size, 2)
+        index_offset, count, magic = TRACE_TRAILER.unpack(self.infile_p.read(TRACE_TRAILER.size))
+        if magic != TRACE_MAGIC:
+            raise ValueError("Trace file is incomplete")
+        self.infile_p.seek(index_offset)
+        data = self.infile_p.read(count * TRACE_BLOCK.size)
+        self.blocks = list(TRACE_BLOCK.iter_unpack(data))
+        self.first_steps = [entry[0] for entry in self.blocks]
+
+    def __len__(self):
+        if len(self.blocks) == 0:
+            return 0
+        return self.blocks[-1][0] + self.blocks[-1][7]
+
+    def cycle(self, step):
+        """Returns the emulator cycle a step was executed at.
+        """
+        entry = self.blocks[bisect.bisect_right(self.first_steps, step) - 1]
+        return entry[1] + step - entry[0]
+
+    def steps(self, start=0, stop=None):
+        """Yields the steps from start up to stop.
+
+        Args:
+            start (int): First step.
+            stop (int): End step, defaults to the end of the trace.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        block = max(bisect.bisect_right(self.first_steps, start) - 1, 0)
+        while block < len(self.blocks) and self.blocks[block][0] < stop:
+            yield from self.decode_block(block, start, stop)
+            block = block + 1
+
+    def decode_block(self, block, start, stop):
+        """Yields the steps of a block that lie in start to stop, running
+        the program over the recorded results like HackEmulator.execute.
+        """
+        step, unused, pc, a, d, offset, length, steps = self.blocks[block]
+        self.infile_p.seek(offset)
+        results = unpack_words(zlib.decompress(self.infile_p.read(length)))
+        decoded = self.decoded
+        stop = min(stop, step + steps)
+        position = 0
+        while step < stop:
+            instruction = decoded[pc]
+            if not instruction[0]:
+                a = instruction[1]
+                if step >= start:
+                    yield (step, pc, a, d, None, None)
+                pc = pc + 1
+                step = step + 1
+                continue
+
+            unused, reads_m, operation, writes_m, writes_d, writes_a, jump, may_halt = instruction
+            out = results[position]
+            position = position + 1
+            target = a
+            if writes_d:
+                d = out
+            if writes_a:
+                a = out
+            if step >= start:
+                yield (step, pc, a, d, target, out) if writes_m else (step, pc, a, d, None, None)
+
+            if jump is not None and jump[0 if out & 0x8000 else (1 if out == 0 else 2)]:
+                # The emulator stays on the jump of its final loop.
+                if not (may_halt and target == pc - 1 and decoded[target] == (False, target)):
+                    pc = target
+            else:
+                pc = pc + 1
+            step = step + 1
+
+    def close(self):
+        self.infile_p.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Trace Recorder
+    Runs a .hack program and records every step, or prints steps of a trace
+    Usage:
+        hack_trace.py record <program .hack file> <max steps> <trace file>
+        hack_trace.py show <trace file> <first step> <count>
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == "record" and sys.argv[3].isnumeric():
+        emulator = HackEmulator(read_hack(sys.argv[2]))
+        with TraceWriter(emulator, sys.argv[4]):
+            executed = emulator.run(int(sys.argv[3]))
+        print(f"{executed} steps recorded")
+    elif len(sys.argv) == 5 and sys.argv[1] == "show" and sys.argv[3].isnumeric() and sys.argv[4].isnumeric():
+        with TraceReader(sys.argv[2]) as reader:
+            first_step = int(sys.argv[3])
+            for step, pc, a, d, address, value in reader.steps(first_step, first_step + int(sys.argv[4])):
+                line = f"{step:10} PC={pc:5} A={a:5} D={d:5}"
+                if address is not None:
+                    line = f"{line} RAM[{address}]={value}"
+                print(line)
+    else:
+        print_help()
+    sys.exit(0)
@@ -0,0 +1,392 @@
+#!/usr/bin/python3
+
+import bisect
+import sys
+from hack_snapshot import PAGE_BITS
+from hack_snapshot import PAGE_COUNT
+from hack_snapshot import PAGE_SIZE
+from hack_snapshot import RAM_SIZE
+from hack_snapshot import Snapshot
+from keyboard_log import KeyboardLog
+
+ROM_SIZE = 32768
+SCREEN = 16384
+KBD = 24576
+
+# The screen map holds 256 rows of 32 words, 16 pixels per word.
+SCREEN_ROWS = 256
+SCREEN_ROW_WORDS = 32
+
+
+def alu(control, x, y):
+    """Hack ALU on 16 bit unsigned values.
+
+    Args:
+        control (int): zx nx zy ny f no bits.
+        x (int): D register.
+        y (int): A register or RAM[A].
+
+    Returns:
+        int: 16 bit result.
+    """
+    if control & 0b100000:
+        x = 0
+    if control & 0b010000:
+        x = ~x & 0xFFFF
+    if control & 0b001000:
+        y = 0
+    if control & 0b000100:
+        y = ~y & 0xFFFF
+    out = (x + y) & 0xFFFF if control & 0b000010 else x & y
+    if control & 0b000001:
+        out = ~out & 0xFFFF
+    return out
+
+
+# Direct implementations of the documented computations, keyed by the
+# zx nx zy ny f no bits. Other bit patterns fall back to alu.
+ALU_OPERATIONS = {
+    0b101010: lambda x, y: 0,
+    0b111111: lambda x, y: 1,
+    0b111010: lambda x, y: 0xFFFF,
+    0b001100: lambda x, y: x,
+    0b110000: lambda x, y: y,
+    0b001101: lambda x, y: x ^ 0xFFFF,
+    0b110001: lambda x, y: y ^ 0xFFFF,
+    0b001111: lambda x, y: -x & 0xFFFF,
+    0b110011: lambda x, y: -y & 0xFFFF,
+    0b011111: lambda x, y: (x + 1) & 0xFFFF,
+    0b110111: lambda x, y: (y + 1) & 0xFFFF,
+    0b001110: lambda x, y: (x - 1) & 0xFFFF,
+    0b110010: lambda x, y: (y - 1) & 0xFFFF,
+    0b000010: lambda x, y: (x + y) & 0xFFFF,
+    0b010011: lambda x, y: (x - y) & 0xFFFF,
+    0b000111: lambda x, y: (y - x) & 0xFFFF,
+    0b000000: lambda x, y: x & y,
+    0b010101: lambda x, y: x | y
+}
+
+# Whether a jump is taken for a negative, zero and positive result, indexed
+# by the jump bits.
+JUMP_TABLE = [
+    (bool(jump & 0b100), bool(jump & 0b010), bool(jump & 0b001)) for jump in range(8)
+]
+
+
+def decode(word):
+    """Decodes a machine instruction for the emulator loop.
+
+    Args:
+        word (int): 16 bit instruction.
+
+    Returns:
+        tuple: (False, value) for an A-Instruction, otherwise
+            (True, reads M, operation, writes M, writes D, writes A, jump,
+            may halt).
+    """
+    if word & 0x8000 == 0:
+        return (False, word)
+    control = (word >> 6) & 0b111111
+    operation = ALU_OPERATIONS.get(control)
+    if operation is None:
+        operation = lambda x, y, control=control: alu(control, x, y)
+    dest = (word >> 3) & 0b111
+    jump = word & 0b111
+    return (
+        True,
+        bool(word & 0x1000),
+        operation,
+        bool(dest & 0b001),
+        bool(dest & 0b010),
+        bool(dest & 0b100),
+        JUMP_TABLE[jump] if jump != 0 else None,
+        jump == 0b111 and dest == 0
+    )
+
+
+def read_hack(path):
+    """Reads a .hack file.
+
+    Args:
+        path (str): .hack file.
+
+    Returns:
+        list: Instructions as ints.
+    """
+    with open(path, mode='r', encoding='UTF-8') as hack_p:
+        return [int(line, 2) for line in hack_p.read().split()]
+
+
+class HackEmulator():
+    """Instruction level emulator of the Hack computer.
+
+    The emulator stops early once the program reaches an `@L / 0;JMP` loop
+    onto itself, the usual way Hack programs end. The complete machine state
+    can be saved with snapshot and put back with restore, see Snapshot.
+    Keyboard input given with press is recorded in keyboard_log, and a log
+    passed to replay is fed back at the recorded cycles.
+
+    screen_rows is None unless a screen watcher such as ScreenFramebuffer
+    sets it to a set, which then collects the rows of every screen write.
+    Likewise trace is None unless a TraceWriter attaches itself, execute
+    then runs the decoded program of the trace, which records every
+    instruction.
+
+    A RAM access with A outside RAM, or a jump outside ROM, is a fault: the
+    emulator halts before the faulting instruction and fault describes it.
+    fault is None otherwise.
+    """
+
+    def __init__(self, program):
+        """Constructor for HackEmulator
+
+        Args:
+            program (list): Instructions as ints or binary strings.
+        """
+        self.rom = [int(word, 2) if isinstance(word, str) else word for word in program]
+        # Unused ROM reads as 0, an A-Instruction, like on the real machine.
+        self.decoded = [decode(word) for word in self.rom]
+        self.decoded.extend([decode(0)] * (ROM_SIZE - len(self.rom)))
+        self.keyboard_log = KeyboardLog()
+        self.replay_events = []
+        self.replay_index = 0
+        self.screen_rows = None
+        self.trace = None
+        self.reset()
+
+    def reset(self):
+        """Clears registers and RAM and forgets keyboard input.
+        """
+        self.pc = 0
+        self.a = 0
+        self.d = 0
+        self.cycle = 0
+        self.halted = False
+        self.fault = None
+        self.ram = [0] * RAM_SIZE
+        empty_page = (0,) * PAGE_SIZE
+        self.base_pages = (empty_page,) * PAGE_COUNT
+        self.dirty_pages = set()
+        self.keyboard_log = KeyboardLog()
+        self.replay_events = []
+        self.replay_index = 0
+        if self.screen_rows is not None:
+            self.screen_rows.update(range(SCREEN_ROWS))
+        if self.trace is not None:
+            self.trace.end_block()
+
+    def write(self, address, value):
+        """Sets a RAM word from outside the program, for example an input.
+
+        Args:
+            address (int): RAM address.
+            value (int): 16 bit value.
+        """
+        self.ram[address] = value & 0xFFFF
+        self.dirty_pages.add(address >> PAGE_BITS)
+        if self.screen_rows is not None and SCREEN <= address < KBD:
+            self.screen_rows.add((address - SCREEN) // SCREEN_ROW_WORDS)
+
+    def press(self, key):
+        """Sets the keyboard register at the current cycle and records it.
+
+        Args:
+            key (int): Key code, 0 releases the keyboard.
+        """
+        self.keyboard_log.record(self.cycle, key)
+        self.write(KBD, key)
+
+    def replay(self, log):
+        """Schedules the events of a recorded log from the current cycle on.
+
+        Args:
+            log (KeyboardLog): Recorded input.
+        """
+        self.replay_events = list(log.events)
+        self.replay_index = bisect.bisect_left(self.replay_events, (self.cycle, -1))
+
+    def snapshot(self):
+        """Returns a snapshot of the current state.
+
+        Returns:
+            Snapshot: Snapshot sharing unchanged pages with the previous one.
+        """
+        pages = list(self.base_pages)
+        ram = self.ram
+        for page in self.dirty_pages:
+            start = page << PAGE_BITS
+            pages[page] = tuple(ram[start:start + PAGE_SIZE])
+        self.base_pages = tuple(pages)
+        self.dirty_pages = set()
+        return Snapshot(
+            self.pc, self.a, self.d, self.cycle, self.halted, self.base_pages, len(self.keyboard_log.events)
+        )
+
+    def restore(self, snapshot):
+        """Puts the machine back into a snapshotted state. Only pages that
+        were written since, or differ from the snapshot, are copied.
+        Keyboard input recorded after the snapshot is dropped.
+
+        Args:
+            snapshot (Snapshot): Snapshot of this program.
+        """
+        ram = self.ram
+        dirty_pages = self.dirty_pages
+        for page, (current, saved) in enumerate(zip(self.base_pages, snapshot.pages)):
+            if current is not saved or page in dirty_pages:
+                start = page << PAGE_BITS
+                ram[start:start + PAGE_SIZE] = saved
+                if self.screen_rows is not None and SCREEN <= start < KBD:
+                    first_row = (start - SCREEN) // SCREEN_ROW_WORDS
+                    self.screen_rows.update(range(first_row, first_row + PAGE_SIZE // SCREEN_ROW_WORDS))
+        self.base_pages = snapshot.pages
+        self.dirty_pages = set()
+        self.pc = snapshot.pc
+        self.a = snapshot.a
+        self.d = snapshot.d
+        self.cycle = snapshot.cycle
+        self.halted = snapshot.halted
+        self.fault = None
+        self.keyboard_log.truncate(snapshot.key_events)
+        self.replay_index = bisect.bisect_left(self.replay_events, (self.cycle, -1))
+        if self.trace is not None:
+            self.trace.end_block()
+
+    def run(self, max_steps):
+        """Runs up to max_steps instructions, applying replayed keyboard
+        events on the way.
+
+        Args:
+            max_steps (int): Instruction budget.
+
+        Returns:
+            int: Instructions executed.
+        """
+        executed = 0
+        while executed < max_steps and not self.halted:
+            steps = max_steps - executed
+            if self.replay_index < len(self.replay_events):
+                cycle, key = self.replay_events[self.replay_index]
+                if cycle <= self.cycle:
+                    self.write(KBD, key)
+                    self.replay_index = self.replay_index + 1
+                    continue
+                steps = min(steps, cycle - self.cycle)
+            executed = executed + self.execute(steps)
+        return executed
+
+    def execute(self, steps):
+        """Runs up to steps instructions, recording them into the trace if
+        one is attached.
+
+        Args:
+            steps (int): Instruction budget.
+
+        Returns:
+            int: Instructions executed.
+        """
+        trace = self.trace
+        if trace is None:
+            return self.execute_block(steps, self.decoded)
+
+        # Trace blocks end on exact step counts, so run up to the end of the
+        # current block at a time.
+        executed = 0
+        while executed < steps and not self.halted:
+            count = self.execute_block(min(steps - executed, trace.begin()), trace.decoded)
+            trace.commit(count)
+            executed = executed + count
+        return executed
+
+    def execute_block(self, steps, decoded):
+        """Inner loop, runs up to steps instructions.
+
+        Args:
+            steps (int): Instruction budget.
+            decoded (list): The decoded program, or the copy of a trace
+                whose operations also record their results.
+
+        Returns:
+            int: Instructions executed.
+        """
+        ram = self.ram
+        dirty_pages = self.dirty_pages
+        screen_rows = self.screen_rows
+        pc = self.pc
+        a = self.a
+        d = self.d
+        executed = 0
+        try:
+            while executed < steps:
+                instruction = decoded[pc]
+                executed = executed + 1
+                if not instruction[0]:
+                    a = instruction[1]
+                    pc = pc + 1
+                    continue
+
+                unused, reads_m, operation, writes_m, writes_d, writes_a, jump, may_halt = instruction
+                out = operation(d, ram[a] if reads_m else a)
+                target = a
+                if writes_m:
+                    ram[a] = out
+                    dirty_pages.add(a >> PAGE_BITS)
+                    if screen_rows is not None and SCREEN <= a < KBD:
+                        screen_rows.add((a - SCREEN) // SCREEN_ROW_WORDS)
+                if writes_d:
+                    d = out
+                if writes_a:
+                    a = out
+
+                if jump is not None and jump[0 if out & 0x8000 else (1 if out == 0 else 2)]:
+                    if may_halt and target == pc - 1 and decoded[target] == (False, target):
+                        self.halted = True
+                        break
+                    pc = target
+                else:
+                    pc = pc + 1
+        except IndexError:
+            # Only RAM accesses with A outside RAM and jumps outside ROM
+            # index out of range. A faulting write has already passed its
+            # result to a trace, past the last step of the block, where
+            # TraceReader never reads it.
+            if pc >= ROM_SIZE:
+                self.fault = f"Jump to {pc} outside ROM"
+            else:
+                executed = executed - 1
+                self.fault = f"RAM access at {a} outside RAM, PC={pc}"
+            self.halted = True
+
+        self.pc = pc
+        self.a = a
+        self.d = d
+        self.cycle = self.cycle + executed
+        return executed
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HACK Emulator
+    Runs a .hack program until it halts or the step budget is used up
+    Usage:
+        hackemu.py <program .hack file> <max steps> [keyboard log]
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4) or not sys.argv[2].isnumeric():
+        print_help()
+    else:
+        emulator = HackEmulator(read_hack(sys.argv[1]))
+        if len(sys.argv) == 4:
+            with open(sys.argv[3], mode='r', encoding='UTF-8') as log_p:
+                emulator.replay(KeyboardLog.read(log_p))
+        executed = emulator.run(int(sys.argv[2]))
+        state = "halted" if emulator.halted else "running"
+        if emulator.fault is not None:
+            state = f"FATAL {emulator.fault}"
+        print(f"{executed} steps, {state}, PC={emulator.pc} A={emulator.a} D={emulator.d}")
+        print(" ".join(str(word) for word in emulator.ram[0:16]))
+    sys.exit(0)
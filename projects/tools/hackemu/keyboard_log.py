@@ -0,0 +1,66 @@
+LOG_HEADER = "HKEYS 1"
+
+
+class KeyboardLog():
+    """Keyboard input as (cycle, key) events.
+
+    An event sets the keyboard register right before the instruction of
+    that cycle executes, key 0 releases the keyboard. Feeding a recorded
+    log back into an emulator started from the same state reproduces the
+    run bit for bit.
+
+    On disk a log is a LOG_HEADER line followed by one `cycle key` line per
+    event.
+    """
+
+    def __init__(self, events=None):
+        """Constructor for KeyboardLog
+
+        Args:
+            events (list): (cycle, key) pairs in cycle order.
+        """
+        self.events = list(events) if events is not None else []
+
+    def record(self, cycle, key):
+        """Appends an event.
+
+        Args:
+            cycle (int): Cycle the key changes at.
+            key (int): Key code, 0 for no key.
+        """
+        if len(self.events) != 0 and cycle < self.events[-1][0]:
+            raise ValueError(f"Keyboard event at cycle {cycle} is out of order")
+        self.events.append((cycle, key))
+
+    def truncate(self, length):
+        """Drops every event after the first length ones.
+        """
+        del self.events[length:]
+
+    def write(self, outfile_p):
+        """Writes the log to an open text file.
+        """
+        outfile_p.write(f"{LOG_HEADER}\n")
+        for cycle, key in self.events:
+            outfile_p.write(f"{cycle} {key}\n")
+
+    @staticmethod
+    def read(infile_p):
+        """Reads a log written by write.
+
+        Args:
+            infile_p (file): Open text file.
+
+        Returns:
+            KeyboardLog: Log.
+        """
+        lines = infile_p.read().splitlines()
+        if len(lines) == 0 or lines[0] != LOG_HEADER:
+            raise ValueError("Not a keyboard log")
+        log = KeyboardLog()
+        for line in lines[1:]:
+            if len(line.strip()) == 0:
+                continue
+            cycle, key = line.split()
+            log.record(int(cycle), int(key))
+        return log
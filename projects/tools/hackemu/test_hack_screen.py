@@ -0,0 +1,93 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from hack_screen import FrameRecorder
+from hack_screen import ROW_BYTES
+from hack_screen import ScreenFramebuffer
+from hackemu import HackEmulator
+from hackemu import SCREEN
+from hackemu import read_hack
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def rect_emulator(height):
+    emulator = HackEmulator(read_hack(os.path.join(PROJECTS_DIR, "06", "rect", "Rect.hack")))
+    emulator.write(0, height)
+    return emulator
+
+
+class TestScreenFramebuffer(unittest.TestCase):
+
+    def test_dirty_rows(self):
+        emulator = rect_emulator(4)
+        framebuffer = ScreenFramebuffer(emulator)
+        self.assertEqual(len(framebuffer.update()), 256)
+
+        emulator.run(1000)
+        self.assertTrue(emulator.halted)
+        self.assertEqual(framebuffer.update(), [0, 1, 2, 3])
+        self.assertEqual(framebuffer.update(), [])
+        for y in range(6):
+            self.assertEqual([framebuffer.pixel(x, y) for x in range(15, 18)], [1, 0, 0] if y < 4 else [0, 0, 0])
+
+        # Pixels of one word are stored left to right.
+        emulator.write(SCREEN + 32 * 10 + 1, 0b101)
+        self.assertEqual(framebuffer.update(), [10])
+        self.assertEqual([framebuffer.pixel(x, 10) for x in range(15, 20)], [0, 1, 0, 1, 0])
+
+        # A restore redraws the rows of every page it puts back.
+        snapshot = emulator.snapshot()
+        emulator.write(SCREEN + 32 * 200, 1)
+        framebuffer.update()
+        emulator.restore(snapshot)
+        self.assertIn(200, framebuffer.update())
+        self.assertEqual(framebuffer.pixel(0, 200), 0)
+
+    def test_export(self):
+        emulator = rect_emulator(3)
+        framebuffer = ScreenFramebuffer(emulator)
+        emulator.run(1000)
+        framebuffer.update()
+
+        pbm = io.BytesIO()
+        framebuffer.write_pbm(pbm)
+        header = b"P4\n512 256\n"
+        self.assertEqual(pbm.getvalue()[:len(header)], header)
+        pixels = pbm.getvalue()[len(header):]
+        self.assertEqual(len(pixels), 512 * 256 // 8)
+        self.assertEqual(pixels[0:3], b"\xff\xff\x00")
+        self.assertEqual(pixels[3 * ROW_BYTES:3 * ROW_BYTES + 2], b"\x00\x00")
+
+        png = io.BytesIO()
+        framebuffer.write_png(png)
+        data = png.getvalue()
+        self.assertEqual(data[:8], b"\x89PNG\r\n\x1a\n")
+        width, height, depth, color = struct.unpack(">IIBB", data[16:26])
+        self.assertEqual((width, height, depth, color), (512, 256, 1, 0))
+        length = struct.unpack(">I", data[33:37])[0]
+        self.assertEqual(data[37:41], b"IDAT")
+        raw = zlib.decompress(data[41:41 + length])
+        self.assertEqual(len(raw), 256 * (ROW_BYTES + 1))
+        self.assertEqual(raw[0:4], b"\x00\x00\x00\xff")
+
+    def test_frame_recorder(self):
+        emulator = HackEmulator(read_hack(os.path.join(PROJECTS_DIR, "06", "rect", "Rect.hack")))
+        emulator.write(0, 100)
+        with tempfile.TemporaryDirectory() as outdir:
+            recorder = FrameRecorder(ScreenFramebuffer(emulator), outdir, "png")
+            paths = []
+            for _ in range(12):
+                paths.append(recorder.capture())
+                emulator.run(300)
+            self.assertIsNotNone(paths[0])
+            self.assertIsNotNone(paths[1])
+            self.assertEqual(paths[-1], None)
+            self.assertEqual(sorted(os.listdir(outdir)), [os.path.basename(path) for path in paths if path])
+
+
+if __name__ == '__main__':
+    unittest.main()
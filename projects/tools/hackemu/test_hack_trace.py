@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from hack_trace import TraceReader
+from hack_trace import TraceWriter
+from hackemu import HackEmulator
+from hackemu import read_hack
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+PONG = os.path.join(PROJECTS_DIR, "06", "original_hack_files", "Pong.hack")
+
+LEFT_ARROW = 130
+
+
+def reference_steps(emulator, count, first_step=0):
+    """Single steps an emulator and returns what a trace should show.
+    """
+    steps = []
+    for step in range(first_step, first_step + count):
+        pc = emulator.pc
+        address = emulator.a
+        instruction = emulator.decoded[pc]
+        emulator.execute(1)
+        if instruction[0] and instruction[3]:
+            steps.append((step, pc, emulator.a, emulator.d, address, emulator.ram[address]))
+        else:
+            steps.append((step, pc, emulator.a, emulator.d, None, None))
+    return steps
+
+
+class TestHackTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_path = os.path.join(tempfile.mkdtemp(), "pong.trc")
+
+    def tearDown(self):
+        os.remove(self.trace_path)
+        os.rmdir(os.path.dirname(self.trace_path))
+
+    def test_trace_matches_execution(self):
+        expected = HackEmulator(read_hack(PONG))
+        steps = reference_steps(expected, 15000)
+        expected.press(LEFT_ARROW)
+        steps.extend(reference_steps(expected, 15000, 15000))
+
+        emulator = HackEmulator(read_hack(PONG))
+        with TraceWriter(emulator, self.trace_path, block_steps=1000):
+            emulator.run(12345)
+            emulator.run(2655)
+            emulator.press(LEFT_ARROW)
+            emulator.run(15000)
+
+        with TraceReader(self.trace_path) as reader:
+            self.assertEqual(len(reader), 30000)
+            self.assertEqual(len(reader.blocks), 30)
+            self.assertEqual(list(reader.steps()), steps)
+            # Seeking decodes only the blocks around the slice.
+            self.assertEqual(list(reader.steps(14990, 15020)), steps[14990:15020])
+            self.assertEqual(list(reader.steps(29999)), steps[29999:])
+            self.assertEqual(list(reader.steps(30000, 30100)), [])
+        self.assertLess(os.path.getsize(self.trace_path), 30000)
+
+    def test_restore_and_halt(self):
+        emulator = HackEmulator(read_hack(PONG))
+        emulator.run(5000)
+        snapshot = emulator.snapshot()
+        with TraceWriter(emulator, self.trace_path, block_steps=4096) as writer:
+            emulator.run(3000)
+            emulator.restore(snapshot)
+            emulator.run(3000)
+            self.assertIs(emulator.trace, writer)
+        self.assertIsNone(emulator.trace)
+
+        emulator.restore(snapshot)
+        steps = reference_steps(emulator, 3000)
+        with TraceReader(self.trace_path) as reader:
+            self.assertEqual(len(reader.blocks), 2)
+            self.assertEqual(reader.cycle(2999), 7999)
+            self.assertEqual(reader.cycle(3000), 5000)
+            self.assertEqual(list(reader.steps(0, 3000)), steps)
+            self.assertEqual([step[1:] for step in reader.steps(3000)], [step[1:] for step in steps])
+
+        emulator = HackEmulator(read_hack(os.path.join(PROJECTS_DIR, "06", "max", "Max.hack")))
+        emulator.write(0, 3)
+        emulator.write(1, 9)
+        with TraceWriter(emulator, self.trace_path):
+            executed = emulator.run(1000)
+        with TraceReader(self.trace_path) as reader:
+            steps = list(reader.steps())
+        self.assertEqual(len(steps), executed)
+        self.assertEqual(steps[-1][1], emulator.pc)
+        self.assertIn((2, 9), [(step[4], step[5]) for step in steps])
+
+
+if __name__ == '__main__':
+    unittest.main()
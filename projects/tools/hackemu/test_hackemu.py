@@ -0,0 +1,124 @@
+import io
+import os
+import random
+import unittest
+from hack_snapshot import Snapshot
+from hackemu import ALU_OPERATIONS
+from hackemu import HackEmulator
+from hackemu import KBD
+from hackemu import SCREEN
+from hackemu import alu
+from hackemu import read_hack
+from keyboard_log import KeyboardLog
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+PONG = os.path.join(PROJECTS_DIR, "06", "original_hack_files", "Pong.hack")
+
+LEFT_ARROW = 130
+RIGHT_ARROW = 132
+
+# Pong has drawn its first frame by then.
+PONG_WARM_UP = 5200000
+
+
+class TestHackEmulator(unittest.TestCase):
+
+    def test_alu_operations(self):
+        rng = random.Random(5)
+        for control, operation in ALU_OPERATIONS.items():
+            for _ in range(50):
+                x = rng.randrange(0x10000)
+                y = rng.randrange(0x10000)
+                self.assertEqual(operation(x, y), alu(control, x, y), bin(control))
+
+    def test_programs(self):
+        emulator = HackEmulator(read_hack(os.path.join(PROJECTS_DIR, "06", "add", "Add.hack")))
+        emulator.run(100)
+        self.assertEqual(emulator.ram[0], 5)
+
+        emulator = HackEmulator(read_hack(os.path.join(PROJECTS_DIR, "06", "max", "Max.hack")))
+        emulator.write(0, 3)
+        emulator.write(1, 9)
+        self.assertLess(emulator.run(1000), 1000)
+        self.assertTrue(emulator.halted)
+        self.assertEqual(emulator.ram[2], 9)
+        self.assertIsNone(emulator.fault)
+
+    def test_faults(self):
+        # @32767, A=A+1, then M=1, D=M or 0;JMP with A past the end of RAM.
+        for last, executed, pc, fault in (
+            ("1110111111001000", 2, 2, "RAM access at 32768 outside RAM, PC=2"),
+            ("1111110000010000", 2, 2, "RAM access at 32768 outside RAM, PC=2"),
+            ("1110101010000111", 3, 32768, "Jump to 32768 outside ROM")
+        ):
+            emulator = HackEmulator(["0111111111111111", "1110110111100000", last])
+            self.assertEqual(emulator.run(100), executed)
+            self.assertTrue(emulator.halted)
+            self.assertEqual((emulator.pc, emulator.a, emulator.cycle), (pc, 32768, executed))
+            self.assertEqual(emulator.fault, fault)
+            emulator.reset()
+            self.assertIsNone(emulator.fault)
+
+    def test_snapshot_restore(self):
+        emulator = HackEmulator(read_hack(PONG))
+        emulator.run(PONG_WARM_UP)
+        warm = emulator.snapshot()
+        warm_ram = list(emulator.ram)
+
+        emulator.run(50000)
+        emulator.press(LEFT_ARROW)
+        emulator.run(250000)
+        emulator.press(0)
+        emulator.run(200000)
+        first_run = emulator.snapshot()
+        # Only pages written since the warm snapshot are new objects.
+        shared = sum(1 for old, new in zip(warm.pages, first_run.pages) if old is new)
+        self.assertGreater(shared, len(warm.pages) // 2)
+
+        emulator.restore(warm)
+        self.assertEqual(emulator.ram, warm_ram)
+        self.assertEqual(emulator.cycle, PONG_WARM_UP)
+        self.assertEqual(len(emulator.keyboard_log.events), 0)
+
+        # A different scenario forked from the same checkpoint.
+        emulator.press(RIGHT_ARROW)
+        emulator.run(500000)
+        self.assertNotEqual(emulator.ram[SCREEN:KBD], first_run.ram()[SCREEN:KBD])
+
+        # Replaying the recorded log reproduces the first run exactly.
+        log = KeyboardLog([(PONG_WARM_UP + 50000, LEFT_ARROW), (PONG_WARM_UP + 300000, 0)])
+        buffer = io.StringIO()
+        log.write(buffer)
+        buffer.seek(0)
+        emulator.restore(warm)
+        emulator.replay(KeyboardLog.read(buffer))
+        emulator.run(500000)
+        self.assertEqual(emulator.ram, first_run.ram())
+        self.assertEqual((emulator.pc, emulator.a, emulator.d), (first_run.pc, first_run.a, first_run.d))
+
+    def test_pack(self):
+        emulator = HackEmulator(read_hack(PONG))
+        emulator.run(100000)
+        emulator.press(LEFT_ARROW)
+        snapshot = emulator.snapshot()
+        data = snapshot.pack()
+        self.assertLess(len(data), 32768 * 2 // 10)
+
+        unpacked = Snapshot.unpack(data)
+        self.assertEqual(unpacked.ram(), snapshot.ram())
+        self.assertEqual(unpacked.ram()[KBD], LEFT_ARROW)
+        self.assertEqual(
+            (unpacked.pc, unpacked.a, unpacked.d, unpacked.cycle, unpacked.key_events),
+            (snapshot.pc, snapshot.a, snapshot.d, snapshot.cycle, 1)
+        )
+
+        other = HackEmulator(read_hack(PONG))
+        other.restore(unpacked)
+        other.run(1000)
+        emulator.run(1000)
+        self.assertEqual(other.ram, emulator.ram)
+
+
+if __name__ == '__main__':
+    unittest.main()
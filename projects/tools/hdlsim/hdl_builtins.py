@@ -0,0 +1,101 @@
+from hdl_parser import ChipDefinition
+from hdl_parser import HDLError
+
+
+class MemoryChip():
+    """Builtin chip holding 2^address_width words.
+
+    out shows the word at address. With an in pin, a word is written when
+    load is set at the tick and the new value shows from the tock on, like
+    a register. Registers are memories without an address.
+    """
+
+    def __init__(self, name, address_width, writable=True, word_width=16):
+        """Constructor for MemoryChip
+
+        Args:
+            name (str): Chip name.
+            address_width (int): Address pin width, 0 for a single word.
+            writable (bool): The chip has in and load pins.
+            word_width (int): Width of in and out.
+        """
+        self.name = name
+        self.address_width = address_width
+        self.writable = writable
+        self.size = 1 << address_width
+        self.inputs = {}
+        if writable:
+            self.inputs["in"] = word_width
+            self.inputs["load"] = 1
+        if address_width != 0:
+            self.inputs["address"] = address_width
+        self.outputs = {"out": word_width}
+        # Only the address reaches out within a time step.
+        self.comb_inputs = {"address"} if address_width != 0 else set()
+
+    def definition(self):
+        """Returns the pin declarations as a ChipDefinition.
+        """
+        definition = ChipDefinition(self.name)
+        definition.inputs = dict(self.inputs)
+        definition.outputs = dict(self.outputs)
+        definition.builtin = self.name
+        return definition
+
+    def new_memory(self):
+        return [0] * self.size
+
+    def evaluate(self, memory, inputs):
+        """Returns the outputs for the given input values.
+        """
+        return {"out": memory[inputs.get("address", 0)]}
+
+    def tick(self, memory, inputs):
+        """Samples the inputs at the rising clock edge.
+
+        Returns:
+            tuple: (address, value) to be written at the tock, or None.
+        """
+        if self.writable and inputs["load"]:
+            return (inputs.get("address", 0), inputs["in"])
+        return None
+
+    def tock(self, memory, pending):
+        """Commits a write sampled by tick.
+        """
+        if pending is not None:
+            address, value = pending
+            memory[address] = value
+
+    def load(self, memory, path):
+        """Fills the memory from a .hack file, the rest is cleared.
+        """
+        with open(path, mode='r', encoding='UTF-8') as hack_p:
+            words = [int(line, 2) for line in hack_p.read().split()]
+        if len(words) > self.size:
+            raise HDLError(f"{path}: Program does not fit into {self.name}")
+        memory[:] = words + [0] * (self.size - len(words))
+
+
+# The course's builtin chips which are not implemented in these projects, or
+# are too large to simulate gate by gate at the level they are used. DFF is
+# handled by the simulator itself.
+BUILTIN_CHIPS = {
+    "ARegister": MemoryChip("ARegister", 0),
+    "DRegister": MemoryChip("DRegister", 0),
+    "RAM16K": MemoryChip("RAM16K", 14),
+    "Screen": MemoryChip("Screen", 13),
+    "ROM32K": MemoryChip("ROM32K", 15, writable=False),
+    "Keyboard": MemoryChip("Keyboard", 0, writable=False),
+}
+
+
+def dff_definition():
+    """Returns the pin declarations of the DFF primitive.
+    """
+    definition = ChipDefinition("DFF")
+    definition.inputs = {"in": 1}
+    definition.outputs = {"out": 1}
+    definition.builtin = "DFF"
+    definition.clocked = ["in"]
+    return definition
@@ -0,0 +1,508 @@
+from hdl_builtins import BUILTIN_CHIPS
+from hdl_netlist import NetBuilder
+from hdl_netlist import TRUE_NET
+from hdl_parser import HDLError
+
+# Operation kinds of a compiled chip.
+NAND = 0
+CALL = 1
+
+# A chip is evaluated in phases. Its outputs are grouped by the inputs they
+# depend on within a time step, and each output group is computed by its own
+# phase, fewest inputs first. A last update phase computes the rest, such as
+# the inputs of DFFs. Parts whose outputs do not depend on all of their
+# inputs, like registers or a CPU's pc, can therefore sit in feedback loops.
+
+
+def read_lane(values, nets, lane):
+    """Assembles the value of a pin for one lane.
+
+    Args:
+        values (list): Net values.
+        nets (list): Nets of the pin, least significant bit first.
+        lane (int): Lane.
+
+    Returns:
+        int: Value.
+    """
+    value = 0
+    for bit, net in enumerate(nets):
+        value = value | (((values[net] >> lane) & 1) << bit)
+    return value
+
+
+class Batch():
+    """Parts of one chip type that are evaluated together. Part j of the
+    batch occupies lanes j * K to j * K + K - 1 of the child, where K is the
+    number of lanes of the parent.
+    """
+
+    def __init__(self, child, sites):
+        """Constructor for Batch
+
+        Args:
+            child (ChipTemplate or BuiltinTemplate): Chip type.
+            sites (list): Part pins of each part, as maps of pin name to
+                parent nets.
+        """
+        self.child = child
+        self.size = len(sites)
+        self.inputs = [
+            (child_net, [part_pins[pin][bit] for part_pins in sites])
+            for pin, nets in child.inputs.items() for bit, child_net in enumerate(nets)
+        ]
+        # Outputs moved back to the parent after each output phase.
+        self.group_outputs = [
+            [
+                (child_net, [part_pins[pin][bit] for part_pins in sites])
+                for pin in pins for bit, child_net in enumerate(child.outputs[pin])
+            ]
+            for unused_nets, pins in child.output_groups
+        ]
+
+
+class BuiltinTemplate():
+    """Pin layout of a builtin chip, seen by its parents like a ChipTemplate.
+    """
+
+    def __init__(self, chip):
+        """Constructor for BuiltinTemplate
+
+        Args:
+            chip (MemoryChip): Builtin chip.
+        """
+        self.chip = chip
+        self.name = chip.name
+        self.net_count = 0
+        self.inputs = {pin: self.new_nets(width) for pin, width in chip.inputs.items()}
+        self.outputs = {pin: self.new_nets(width) for pin, width in chip.outputs.items()}
+        comb_input_nets = {net for pin in chip.comb_inputs for net in self.inputs[pin]}
+        self.output_groups = [(comb_input_nets, list(self.outputs))]
+        self.has_update = any(pin not in chip.comb_inputs for pin in chip.inputs)
+        self.phase_count = 2
+
+    def new_nets(self, width):
+        start = self.net_count
+        self.net_count = self.net_count + width
+        return list(range(start, self.net_count))
+
+    def instantiate(self, lanes):
+        return BuiltinInstance(self, lanes)
+
+
+class ChipTemplate(NetBuilder):
+    """A chip compiled for hierarchical, bit-sliced simulation.
+
+    Unlike Netlist the chip is not flattened. Its own Nand gates and DFFs
+    become operations on its local nets, and its other parts are evaluated
+    by calls into their own templates. Parts of the same type at the same
+    depth of the chip's logic are batched into one call whose lanes hold
+    all of them, so the 16 Bits of a Register, the 8 Registers of a RAM8 and
+    so on down to the 262144 DFFs of a RAM16K each cost a handful of int
+    operations per evaluation.
+    """
+
+    def __init__(self, compiler, definition):
+        """Constructor for ChipTemplate
+
+        Args:
+            compiler (CircuitCompiler): Compiler of the parts.
+            definition (ChipDefinition): Chip.
+        """
+        super().__init__(compiler.library, definition.name)
+        self.definition = definition
+        inputs = {pin: self.new_nets(width) for pin, width in definition.inputs.items()}
+        outputs = {pin: self.new_nets(width) for pin, width in definition.outputs.items()}
+        gates = []
+        dffs = []
+        sites = []
+        for part, part_definition, part_pins in self.wire_parts(definition, {**inputs, **outputs}):
+            if part_definition is None:
+                gates.append((part_pins["a"][0], part_pins["b"][0], part_pins["out"][0]))
+            elif part_definition.builtin == "DFF" and part_definition.path is None:
+                dffs.append((part_pins["in"][0], part_pins["out"][0]))
+            else:
+                sites.append((part.name, compiler.template(part_definition), part_pins))
+
+        # Renumber the remaining nets densely, keeping the constants.
+        numbers = {}
+
+        def number(net):
+            root = self.find(net)
+            if root <= TRUE_NET:
+                return root
+            if root not in numbers:
+                numbers[root] = len(numbers) + TRUE_NET + 1
+            return numbers[root]
+
+        self.inputs = {pin: [number(net) for net in nets] for pin, nets in inputs.items()}
+        self.outputs = {pin: [number(net) for net in nets] for pin, nets in outputs.items()}
+        gates = [(number(a), number(b), number(out)) for a, b, out in gates]
+        self.dffs = [(number(net_in), number(net_out)) for net_in, net_out in dffs]
+        sites = [
+            (name, child, {pin: [number(net) for net in nets] for pin, nets in part_pins.items()})
+            for name, child, part_pins in sites
+        ]
+        self.net_count = len(numbers) + TRUE_NET + 1
+        self.schedule(gates, sites)
+
+    def schedule(self, gates, sites):
+        """Orders the gates and part calls, splits them into phases and
+        batches the parts.
+
+        Args:
+            gates (list): (a, b, out) Nand gates.
+            sites (list): (part name, template, part pins) of the other parts.
+        """
+        # Nodes are ("gate", index), ("output", site, group) and ("update",
+        # site), each with the nets it reads, the nets it writes and the
+        # nodes it has to follow.
+        nodes = []
+        for index, (a, b, out) in enumerate(gates):
+            nodes.append((("gate", index), [a, b], [out], []))
+        site_nodes = []
+        for index, (unused_name, child, part_pins) in enumerate(sites):
+            parent_nets = {
+                child_net: parent_net
+                for pin, nets in child.inputs.items() for child_net, parent_net in zip(nets, part_pins[pin])
+            }
+            node_numbers = []
+            for group, (comb_input_nets, pins) in enumerate(child.output_groups):
+                reads = [parent_nets[child_net] for child_net in sorted(comb_input_nets)]
+                writes = [net for pin in pins for net in part_pins[pin]]
+                nodes.append((("output", index, group), reads, writes, node_numbers[-1:]))
+                node_numbers.append(len(nodes) - 1)
+            if child.has_update:
+                nodes.append((("update", index), list(parent_nets.values()), [], node_numbers[-1:]))
+                node_numbers.append(len(nodes) - 1)
+            site_nodes.append(node_numbers)
+
+        dff_outputs = {net_out for unused_in, net_out in self.dffs}
+        sources = {net for nets in self.inputs.values() for net in nets} | dff_outputs
+        producers = {}
+        for node, (unused_key, unused_reads, writes, unused_after) in enumerate(nodes):
+            for net in writes:
+                if net in producers or net in sources or net <= TRUE_NET:
+                    raise HDLError(f"{self.name}: A signal has more than one driver")
+                producers[net] = node
+
+        def dependencies(node):
+            unused_key, reads, unused_writes, after = nodes[node]
+            return [producers[net] for net in reads if net in producers] + after
+
+        # Longest path from the sources, with a combinational loop check.
+        levels = [None] * len(nodes)
+        on_stack = [False] * len(nodes)
+        for start in range(len(nodes)):
+            if levels[start] is not None:
+                continue
+            stack = [(start, iter(dependencies(start)))]
+            on_stack[start] = True
+            while len(stack) != 0:
+                node, pending = stack[-1]
+                dependency = next(pending, None)
+                if dependency is None:
+                    stack.pop()
+                    on_stack[node] = False
+                    levels[node] = 1 + max((levels[other] for other in dependencies(node)), default=-1)
+                elif on_stack[dependency]:
+                    raise HDLError(f"{self.name}: Combinational loop")
+                elif levels[dependency] is None:
+                    on_stack[dependency] = True
+                    stack.append((dependency, iter(dependencies(dependency))))
+
+        # The cone of an output pin is everything it depends on.
+        cones = {}
+        for pin, nets in self.outputs.items():
+            cone = set()
+            comb_input_nets = set()
+            pending = list(nets)
+            pending_nodes = []
+            while len(pending) != 0 or len(pending_nodes) != 0:
+                if len(pending_nodes) != 0:
+                    node = pending_nodes.pop()
+                    if node not in cone:
+                        cone.add(node)
+                        pending.extend(nodes[node][1])
+                        pending_nodes.extend(nodes[node][3])
+                    continue
+                net = pending.pop()
+                if net in producers:
+                    pending_nodes.append(producers[net])
+                elif net in sources and net not in dff_outputs:
+                    comb_input_nets.add(net)
+            cones[pin] = (cone, comb_input_nets)
+
+        # Pins with the same inputs share a phase, and each node runs in the
+        # first phase that needs it.
+        shared = {}
+        for pin, (unused_cone, comb_input_nets) in cones.items():
+            shared.setdefault(frozenset(comb_input_nets), []).append(pin)
+        self.output_groups = sorted(
+            ((set(comb_input_nets), pins) for comb_input_nets, pins in shared.items()),
+            key=lambda group: len(group[0])
+        )
+        update_phase = len(self.output_groups)
+        phases = [update_phase] * len(nodes)
+        for group, (unused_nets, pins) in reversed(list(enumerate(self.output_groups))):
+            for pin in pins:
+                for node in cones[pin][0]:
+                    phases[node] = group
+
+        # Parts of one type are batched when all of their nodes fall on the
+        # same levels and into the same phases, which keeps the order acyclic.
+        batched = {}
+        for index, (unused_name, child, unused_pins) in enumerate(sites):
+            key = (id(child),) + tuple((levels[node], phases[node]) for node in site_nodes[index])
+            batched.setdefault(key, []).append(index)
+
+        self.batches = []
+        self.sites = [None] * len(sites)
+        timed_ops = []
+        for members in batched.values():
+            child = sites[members[0]][1]
+            batch_index = len(self.batches)
+            self.batches.append(Batch(child, [sites[index][2] for index in members]))
+            for position, index in enumerate(members):
+                self.sites[index] = (sites[index][0], batch_index, position)
+            for node in site_nodes[members[0]]:
+                key = nodes[node][0]
+                child_phase = key[2] if key[0] == "output" else len(child.output_groups)
+                timed_ops.append((phases[node], levels[node], (CALL, batch_index, child_phase)))
+        for node, (key, unused_reads, unused_writes, unused_after) in enumerate(nodes):
+            if key[0] == "gate":
+                a, b, out = gates[key[1]]
+                timed_ops.append((phases[node], levels[node], (NAND, a, b, out)))
+        timed_ops.sort(key=lambda timed_op: (timed_op[0], timed_op[1]))
+
+        self.phase_count = update_phase + 1
+        self.phases = [[] for unused in range(self.phase_count)]
+        for phase, unused_level, op in timed_ops:
+            self.phases[phase].append(op)
+        comb_input_nets = set()
+        for group_nets, unused_pins in self.output_groups:
+            comb_input_nets.update(group_nets)
+        self.has_update = len(self.phases[update_phase]) != 0 or any(
+            net not in comb_input_nets for nets in self.inputs.values() for net in nets
+        )
+
+    def instantiate(self, lanes):
+        return ChipInstance(self, lanes)
+
+
+class CircuitCompiler():
+    """Compiles and caches the templates of a chip and its parts.
+    """
+
+    def __init__(self, library):
+        """Constructor for CircuitCompiler
+
+        Args:
+            library (ChipLibrary): Library to load parts from.
+        """
+        self.library = library
+        self.templates = {}
+
+    def template(self, definition):
+        """Returns the template of a chip.
+
+        Args:
+            definition (ChipDefinition): Chip.
+
+        Returns:
+            ChipTemplate or BuiltinTemplate: Template.
+        """
+        key = definition.path if definition.path is not None else definition.name
+        if key not in self.templates:
+            if definition.path is None and definition.name in BUILTIN_CHIPS:
+                self.templates[key] = BuiltinTemplate(BUILTIN_CHIPS[definition.name])
+            elif definition.builtin is not None and len(definition.parts) == 0:
+                raise HDLError(f"{definition.name}: Builtin chip {definition.builtin} is not supported")
+            else:
+                self.templates[key] = ChipTemplate(self, definition)
+        return self.templates[key]
+
+
+class ChipInstance():
+    """State and net values of a batch of chips sharing a template.
+    """
+
+    def __init__(self, template, lanes):
+        """Constructor for ChipInstance
+
+        Args:
+            template (ChipTemplate): Chip type.
+            lanes (int): Number of chips.
+        """
+        self.template = template
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1
+        self.values = [0] * template.net_count
+        self.values[TRUE_NET] = self.mask
+        self.state = [0] * len(template.dffs)
+        self.sampled = [0] * len(template.dffs)
+        self.children = [batch.child.instantiate(lanes * batch.size) for batch in template.batches]
+
+    def evaluate(self):
+        """Runs all phases.
+        """
+        for phase in range(self.template.phase_count):
+            self.run_phase(phase)
+
+    def run_phase(self, phase):
+        """Runs the operations of one phase.
+        """
+        values = self.values
+        mask = self.mask
+        if phase == 0:
+            for (unused_in, net_out), state in zip(self.template.dffs, self.state):
+                values[net_out] = state
+        for op in self.template.phases[phase]:
+            if op[0] == NAND:
+                values[op[3]] = mask ^ (values[op[1]] & values[op[2]])
+            else:
+                self.call(op[1], op[2])
+
+    def call(self, batch_index, phase):
+        """Evaluates a batch of parts, moving pin values across.
+        """
+        batch = self.template.batches[batch_index]
+        child = self.children[batch_index]
+        values = self.values
+        child_values = child.values
+        lanes = self.lanes
+        for child_net, parent_nets in batch.inputs:
+            value = 0
+            shift = 0
+            for net in parent_nets:
+                value = value | (values[net] << shift)
+                shift = shift + lanes
+            child_values[child_net] = value
+        child.run_phase(phase)
+        if phase < len(batch.group_outputs):
+            mask = self.mask
+            for child_net, parent_nets in batch.group_outputs[phase]:
+                value = child_values[child_net]
+                shift = 0
+                for net in parent_nets:
+                    values[net] = (value >> shift) & mask
+                    shift = shift + lanes
+
+    def tick(self):
+        """Samples the DFF inputs, at the rising clock edge.
+        """
+        values = self.values
+        self.sampled = [values[net_in] for net_in, unused_out in self.template.dffs]
+        for child in self.children:
+            child.tick()
+
+    def tock(self):
+        """Commits the sampled values, at the falling clock edge.
+        """
+        self.state = self.sampled
+        for child in self.children:
+            child.tock()
+
+    def find_part(self, name, lane=0):
+        """Finds the first part of a chip type, nearest parts first.
+
+        Args:
+            name (str): Chip name of the part.
+            lane (int): Lane of this chip.
+
+        Returns:
+            tuple: (instance, lane) of the part, None if there is none.
+        """
+        pending = [(self, lane)]
+        while len(pending) != 0:
+            next_pending = []
+            for instance, instance_lane in pending:
+                if not isinstance(instance, ChipInstance):
+                    continue
+                for part_name, batch_index, position in instance.template.sites:
+                    child = instance.children[batch_index]
+                    child_lane = position * instance.lanes + instance_lane
+                    if part_name == name:
+                        return (child, child_lane)
+                    next_pending.append((child, child_lane))
+            pending = next_pending
+        return None
+
+    def read_word(self, lane, index):
+        """Returns what `Part[index]` shows for a part built from HDL, the
+        value of its out pin.
+        """
+        if "out" not in self.template.outputs:
+            raise HDLError(f"{self.template.name} has no out pin")
+        return read_lane(self.values, self.template.outputs["out"], lane)
+
+    def write_word(self, lane, index, value):
+        raise HDLError(f"{self.template.name} is not a builtin chip")
+
+
+class BuiltinInstance():
+    """State of a batch of builtin chips, one memory per lane.
+    """
+
+    def __init__(self, template, lanes):
+        """Constructor for BuiltinInstance
+
+        Args:
+            template (BuiltinTemplate): Chip type.
+            lanes (int): Number of chips.
+        """
+        self.template = template
+        self.lanes = lanes
+        self.values = [0] * template.net_count
+        self.memories = [template.chip.new_memory() for unused in range(lanes)]
+        self.pending = [None] * lanes
+
+    def pin_values(self, lane):
+        return {pin: read_lane(self.values, nets, lane) for pin, nets in self.template.inputs.items()}
+
+    def evaluate(self):
+        self.run_phase(0)
+
+    def run_phase(self, phase):
+        """Computes the outputs in the output phase.
+        """
+        if phase != 0:
+            return
+        chip = self.template.chip
+        outputs = [chip.evaluate(memory, self.pin_values(lane)) for lane, memory in enumerate(self.memories)]
+        for pin, nets in self.template.outputs.items():
+            for bit, net in enumerate(nets):
+                value = 0
+                for lane, lane_outputs in enumerate(outputs):
+                    value = value | (((lane_outputs[pin] >> bit) & 1) << lane)
+                self.values[net] = value
+
+    def tick(self):
+        chip = self.template.chip
+        self.pending = [chip.tick(memory, self.pin_values(lane)) for lane, memory in enumerate(self.memories)]
+
+    def tock(self):
+        chip = self.template.chip
+        for memory, pending in zip(self.memories, self.pending):
+            chip.tock(memory, pending)
+        self.pending = [None] * self.lanes
+
+    def read_word(self, lane, index):
+        """Returns a word, a write sampled at the tick already shows.
+        """
+        memory = self.memories[lane]
+        if not 0 <= index < len(memory):
+            raise HDLError(f"{self.template.name}[{index}] is out of range")
+        pending = self.pending[lane]
+        if pending is not None and pending[0] == index:
+            return pending[1]
+        return memory[index]
+
+    def write_word(self, lane, index, value):
+        memory = self.memories[lane]
+        if not 0 <= index < len(memory):
+            raise HDLError(f"{self.template.name}[{index}] is out of range")
+        memory[index] = value & 0xFFFF
+
+    def load(self, lane, path):
+        self.template.chip.load(self.memories[lane], path)
@@ -0,0 +1,380 @@
+import os
+from hdl_builtins import BUILTIN_CHIPS
+from hdl_builtins import dff_definition
+from hdl_parser import HDLError
+from hdl_parser import parse_hdl_file
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+# Directories searched for parts after the directory of the chip itself,
+# the chips of later projects are built from the earlier ones.
+DEFAULT_SEARCH_PATH = [
+    os.path.join(PROJECTS_DIR, "01"),
+    os.path.join(PROJECTS_DIR, "02"),
+    os.path.join(PROJECTS_DIR, "03", "a"),
+    os.path.join(PROJECTS_DIR, "03", "b"),
+]
+
+PRIMITIVE_CHIPS = {"Nand"}
+
+# Net 0 is constant false and net 1 is constant true.
+FALSE_NET = 0
+TRUE_NET = 1
+
+
+def pack_lanes(values, width):
+    """Transposes per vector values into one lane per bit. Bit k of lane i
+    is bit i of values[k].
+
+    Args:
+        values (list): Values of one pin, one per test vector.
+        width (int): Pin width.
+
+    Returns:
+        list: width ints.
+    """
+    if len(values) == 0:
+        return [0] * width
+    mask = (1 << width) - 1
+    columns = zip(*[format(value & mask, f"0{width}b") for value in values])
+    # Columns come most significant bit first, and the first vector has to
+    # end up in the least significant bit of the lane.
+    lanes = [int("".join(column)[::-1], 2) for column in columns]
+    lanes.reverse()
+    return lanes
+
+
+def unpack_lanes(lanes, count):
+    """Inverse of pack_lanes.
+
+    Args:
+        lanes (list): One int per bit, least significant bit first.
+        count (int): Number of test vectors.
+
+    Returns:
+        list: count values.
+    """
+    columns = [format(lane, f"0{count}b")[::-1] for lane in reversed(lanes)]
+    return [int("".join(bits), 2) for bits in zip(*columns)]
+
+
+class ChipLibrary():
+    """Finds, parses and caches .hdl files.
+    """
+
+    def __init__(self, search_path=None):
+        """Constructor for ChipLibrary
+
+        Args:
+            search_path (list): Directories with .hdl files, in lookup order.
+        """
+        self.search_path = list(search_path) if search_path is not None else list(DEFAULT_SEARCH_PATH)
+        self.definitions = {}
+
+    def find(self, name, local_dir=None):
+        """Returns the path of name.hdl, None for a builtin chip.
+
+        Like the course simulator, a chip in the directory of the chip using
+        it wins over a builtin one, and builtin chips win over the search
+        path.
+
+        Args:
+            name (str): Chip name.
+            local_dir (str): Directory searched first.
+        """
+        if local_dir is not None:
+            path = os.path.join(local_dir, f"{name}.hdl")
+            if os.path.exists(path):
+                return os.path.normpath(path)
+        if name == "DFF" or name in BUILTIN_CHIPS:
+            return None
+        for directory in self.search_path:
+            path = os.path.join(directory, f"{name}.hdl")
+            if os.path.exists(path):
+                return os.path.normpath(path)
+        raise HDLError(f"Chip {name} not found")
+
+    def load(self, name, local_dir=None):
+        """Returns the parsed definition of a chip.
+
+        Args:
+            name (str): Chip name.
+            local_dir (str): Directory searched first.
+
+        Returns:
+            ChipDefinition: Chip, builtin chips have no path.
+        """
+        path = self.find(name, local_dir)
+        if path is None:
+            if name not in self.definitions:
+                self.definitions[name] = dff_definition() if name == "DFF" else BUILTIN_CHIPS[name].definition()
+            return self.definitions[name]
+        if path not in self.definitions:
+            definition = parse_hdl_file(path)
+            if definition.name != name:
+                raise HDLError(f"{path}: File defines chip {definition.name}")
+            self.definitions[path] = definition
+        return self.definitions[path]
+
+    def dependencies(self, name, local_dir=None):
+        """Returns everything a chip is built from.
+
+        Args:
+            name (str): Chip name.
+            local_dir (str): Directory searched first.
+
+        Returns:
+            tuple: (set of .hdl paths including the chip's own, set of
+                builtin chip names).
+        """
+        paths = set()
+        builtins = set()
+        pending = [(name, local_dir)]
+        while len(pending) != 0:
+            name, local_dir = pending.pop()
+            if name in PRIMITIVE_CHIPS:
+                continue
+            definition = self.load(name, local_dir)
+            if definition.path is None:
+                builtins.add(name)
+                continue
+            if definition.path in paths:
+                continue
+            paths.add(definition.path)
+            for part_name in definition.referenced_chips():
+                pending.append((part_name, os.path.dirname(definition.path)))
+        return (paths, builtins)
+
+
+class NetBuilder():
+    """Union-find over the nets of a chip under construction, with the
+    wiring rules of HDL parts.
+    """
+
+    def __init__(self, library, name):
+        """Constructor for NetBuilder
+
+        Args:
+            library (ChipLibrary): Library to load parts from.
+            name (str): Chip name, used in error messages.
+        """
+        self.library = library
+        self.name = name
+        self.parents = [FALSE_NET, TRUE_NET]
+
+    def new_nets(self, width):
+        """Allocates width unconnected nets.
+        """
+        start = len(self.parents)
+        self.parents.extend(range(start, start + width))
+        return list(range(start, start + width))
+
+    def find(self, net):
+        """Returns the representative of the set net belongs to.
+        """
+        parents = self.parents
+        root = net
+        while parents[root] != root:
+            root = parents[root]
+        while parents[net] != root:
+            parents[net], net = root, parents[net]
+        return root
+
+    def union(self, first, second):
+        """Connects two nets. Constants always stay representatives.
+        """
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return
+        if second <= TRUE_NET:
+            first, second = second, first
+        if first <= TRUE_NET and second <= TRUE_NET:
+            raise HDLError(f"{self.name}: true is connected to false")
+        self.parents[second] = first
+
+    @staticmethod
+    def select(nets, bit_range, definition, pin):
+        """Returns the nets of pin[lo..hi], or of the whole pin.
+        """
+        if bit_range is None:
+            return nets
+        low, high = bit_range
+        if low > high or high >= len(nets):
+            raise HDLError(f"{definition.path}: Bad sub bus {pin}[{low}..{high}]")
+        return nets[low:high + 1]
+
+    def wire_parts(self, definition, pins):
+        """Allocates the pins of every part of a chip and connects them to the
+        chip's pins and internal signals.
+
+        Args:
+            definition (ChipDefinition): Chip.
+            pins (dict): Pin name to list of nets, least significant bit first.
+
+        Returns:
+            list: (part, part definition or None for Nand, part pins) tuples.
+        """
+        local_dir = os.path.dirname(definition.path) if definition.path is not None else None
+        internal = {}
+        wired = []
+        for part in definition.parts:
+            if part.name in PRIMITIVE_CHIPS:
+                part_inputs = {"a": 1, "b": 1}
+                part_outputs = {"out": 1}
+                part_definition = None
+            else:
+                part_definition = self.library.load(part.name, local_dir)
+                part_inputs = part_definition.inputs
+                part_outputs = part_definition.outputs
+            part_pins = {pin: self.new_nets(width) for pin, width in {**part_inputs, **part_outputs}.items()}
+            connected = {pin: [False] * width for pin, width in part_inputs.items()}
+
+            for connection in part.connections:
+                if connection.pin not in part_pins:
+                    raise HDLError(f"{definition.path}: {part.name} has no pin {connection.pin}")
+                pin_nets = self.select(part_pins[connection.pin], connection.pin_range, definition, connection.pin)
+                if connection.signal in ("true", "false"):
+                    if connection.signal_range is not None:
+                        raise HDLError(f"{definition.path}: Sub bus of constant {connection.signal}")
+                    constant = TRUE_NET if connection.signal == "true" else FALSE_NET
+                    signal_nets = [constant] * len(pin_nets)
+                elif connection.signal in pins:
+                    signal_nets = self.select(
+                        pins[connection.signal], connection.signal_range, definition, connection.signal
+                    )
+                else:
+                    if connection.signal_range is not None:
+                        raise HDLError(
+                            f"{definition.path}: Sub bus of internal pin {connection.signal} is not allowed"
+                        )
+                    if connection.signal not in internal:
+                        internal[connection.signal] = self.new_nets(len(pin_nets))
+                    signal_nets = internal[connection.signal]
+                if len(signal_nets) != len(pin_nets):
+                    raise HDLError(
+                        f"{definition.path}: Width of {part.name}.{connection.pin} does not match {connection.signal}"
+                    )
+                for pin_net, signal_net in zip(pin_nets, signal_nets):
+                    self.union(pin_net, signal_net)
+                if connection.pin in connected:
+                    low = connection.pin_range[0] if connection.pin_range is not None else 0
+                    for index in range(low, low + len(pin_nets)):
+                        connected[connection.pin][index] = True
+
+            # Unconnected inputs read as false.
+            for pin, bits in connected.items():
+                for index, is_connected in enumerate(bits):
+                    if not is_connected:
+                        self.union(part_pins[pin][index], FALSE_NET)
+            wired.append((part, part_definition, part_pins))
+        return wired
+
+
+class Netlist(NetBuilder):
+    """A chip flattened down to Nand gates.
+
+    Every pin bit of every part becomes a net, nets connected through
+    signals are merged with a union-find, and what remains is a list of
+    (a, b, out) Nand gates in evaluation order.
+
+    evaluate works bit-sliced: a net holds one Python int whose bit k is
+    the value of the net for test vector k, so every gate is evaluated once
+    for all vectors together.
+    """
+
+    def __init__(self, library, definition):
+        """Constructor for Netlist
+
+        Args:
+            library (ChipLibrary): Library to load parts from.
+            definition (ChipDefinition): Top level chip.
+        """
+        super().__init__(library, definition.name)
+        self.raw_gates = []
+        self.inputs = {pin: self.new_nets(width) for pin, width in definition.inputs.items()}
+        self.outputs = {pin: self.new_nets(width) for pin, width in definition.outputs.items()}
+        self.flatten(definition, {**self.inputs, **self.outputs})
+        self.inputs = {pin: [self.find(net) for net in nets] for pin, nets in self.inputs.items()}
+        self.outputs = {pin: [self.find(net) for net in nets] for pin, nets in self.outputs.items()}
+        self.gates = self.sort_gates()
+        self.net_count = len(self.parents)
+
+    def flatten(self, definition, pins):
+        """Adds the gates of a chip whose pins are already allocated.
+
+        Args:
+            definition (ChipDefinition): Chip.
+            pins (dict): Pin name to list of nets, least significant bit first.
+        """
+        if definition.builtin is not None and len(definition.parts) == 0:
+            raise HDLError(f"{self.name}: Builtin chip {definition.builtin} needs the sequential simulator")
+        for unused_part, part_definition, part_pins in self.wire_parts(definition, pins):
+            if part_definition is None:
+                self.raw_gates.append((part_pins["a"][0], part_pins["b"][0], part_pins["out"][0]))
+            else:
+                self.flatten(part_definition, part_pins)
+
+    def sort_gates(self):
+        """Resolves gate nets and orders gates so that every gate comes after
+        the gates driving its inputs.
+
+        Returns:
+            list: (a, b, out) gates.
+        """
+        gates = [(self.find(a), self.find(b), self.find(out)) for a, b, out in self.raw_gates]
+        input_nets = {net for nets in self.inputs.values() for net in nets}
+        drivers = {}
+        for index, (unused_a, unused_b, out) in enumerate(gates):
+            if out in drivers or out in input_nets or out <= TRUE_NET:
+                raise HDLError(f"{self.name}: A signal has more than one driver")
+            drivers[out] = index
+
+        ordered = []
+        # 0 unvisited, 1 on the stack, 2 done.
+        state = [0] * len(gates)
+        for start in range(len(gates)):
+            if state[start] != 0:
+                continue
+            stack = [(start, 0)]
+            state[start] = 1
+            while len(stack) != 0:
+                index, position = stack.pop()
+                gate = gates[index]
+                if position < 2:
+                    stack.append((index, position + 1))
+                    source = drivers.get(gate[position])
+                    if source is not None:
+                        if state[source] == 1:
+                            raise HDLError(f"{self.name}: Combinational loop")
+                        if state[source] == 0:
+                            state[source] = 1
+                            stack.append((source, 0))
+                else:
+                    state[index] = 2
+                    ordered.append(gate)
+        return ordered
+
+    def evaluate(self, inputs, count):
+        """Evaluates the chip for count test vectors at once.
+
+        Args:
+            inputs (dict): Input pin to list of count values. Missing pins
+                read as 0.
+            count (int): Number of test vectors.
+
+        Returns:
+            dict: Output pin to list of count values.
+        """
+        mask = (1 << count) - 1
+        values = [0] * self.net_count
+        values[TRUE_NET] = mask
+        for pin, nets in self.inputs.items():
+            if pin in inputs:
+                for net, lane in zip(nets, pack_lanes(inputs[pin], len(nets))):
+                    values[net] = lane
+        for a, b, out in self.gates:
+            values[out] = mask ^ (values[a] & values[b])
+        return {
+            pin: unpack_lanes([values[net] for net in nets], count) for pin, nets in self.outputs.items()
+        }
@@ -0,0 +1,216 @@
+import re
+
+TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+  | (?P<number>[0-9]+)
+  | (?P<range>\.\.)
+  | (?P<symbol>[{}()\[\];,=:])
+""", re.VERBOSE | re.DOTALL)
+
+CONSTANT_SIGNALS = {"true", "false"}
+
+
+class HDLError(Exception):
+    """Exception class for errors in HDL files and test scripts.
+    """
+
+    def __init__(self, message):
+        """Constructor
+
+        Args:
+            message (str): error message.
+        """
+        super().__init__(message)
+        self.message = message
+
+
+class Connection():
+    """One `pin[lo..hi]=signal[lo..hi]` assignment of a part. Ranges are
+    (lo, hi) tuples, None when the whole pin or signal is meant.
+    """
+
+    def __init__(self, pin, pin_range, signal, signal_range):
+        self.pin = pin
+        self.pin_range = pin_range
+        self.signal = signal
+        self.signal_range = signal_range
+
+
+class Part():
+    """A chip used inside another chip.
+    """
+
+    def __init__(self, name, connections):
+        self.name = name
+        self.connections = connections
+
+
+class ChipDefinition():
+    """Parsed contents of a .hdl file.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.path = None
+        self.inputs = {}
+        self.outputs = {}
+        self.parts = []
+        self.builtin = None
+        self.clocked = []
+
+    def width(self, pin):
+        """Returns the width of an input or output pin, None if unknown.
+        """
+        if pin in self.inputs:
+            return self.inputs[pin]
+        return self.outputs.get(pin)
+
+    def referenced_chips(self):
+        """Returns the names of the chips used as parts.
+        """
+        return {part.name for part in self.parts}
+
+
+class HDLParser():
+    """Recursive descent parser for the HDL of the course.
+
+        CHIP Name { IN pins; OUT pins; PARTS: Part(a=b, ...); ... }
+        CHIP Name { IN pins; OUT pins; BUILTIN Name; CLOCKED pins; }
+    """
+
+    def __init__(self, source, path=None):
+        """Constructor for HDLParser
+
+        Args:
+            source (str): Contents of the .hdl file.
+            path (str): File path, used in error messages.
+        """
+        self.path = path
+        self.tokens = []
+        position = 0
+        while position < len(source):
+            match = TOKEN_RE.match(source, position)
+            if match is None:
+                raise HDLError(f"{path}: Unexpected character {source[position]!r}")
+            if match.lastgroup != "skip":
+                self.tokens.append(match.group(match.lastgroup))
+            position = match.end()
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def advance(self):
+        token = self.peek()
+        if token is None:
+            raise HDLError(f"{self.path}: Unexpected end of file")
+        self.position = self.position + 1
+        return token
+
+    def expect(self, expected):
+        token = self.advance()
+        if token != expected:
+            raise HDLError(f"{self.path}: Expected {expected} but found {token}")
+        return token
+
+    def parse(self):
+        """Parses the whole file.
+
+        Returns:
+            ChipDefinition: Chip.
+        """
+        self.expect("CHIP")
+        chip = ChipDefinition(self.advance())
+        chip.path = self.path
+        self.expect("{")
+        while self.peek() != "}":
+            keyword = self.advance()
+            if keyword == "IN":
+                chip.inputs.update(self.parse_pin_declarations())
+            elif keyword == "OUT":
+                chip.outputs.update(self.parse_pin_declarations())
+            elif keyword == "PARTS":
+                self.expect(":")
+                while self.peek() not in ("}", "BUILTIN", "CLOCKED"):
+                    chip.parts.append(self.parse_part())
+            elif keyword == "BUILTIN":
+                chip.builtin = self.advance()
+                self.expect(";")
+            elif keyword == "CLOCKED":
+                chip.clocked = list(self.parse_pin_declarations())
+            else:
+                raise HDLError(f"{self.path}: Unexpected {keyword} in chip {chip.name}")
+        self.expect("}")
+        return chip
+
+    def parse_pin_declarations(self):
+        """Parses `a, b[16], c;`.
+
+        Returns:
+            dict: Pin name to width.
+        """
+        pins = {}
+        while True:
+            name = self.advance()
+            width = 1
+            if self.peek() == "[":
+                self.advance()
+                width = int(self.advance())
+                self.expect("]")
+            pins[name] = width
+            separator = self.advance()
+            if separator == ";":
+                return pins
+            if separator != ",":
+                raise HDLError(f"{self.path}: Expected , or ; but found {separator}")
+
+    def parse_range(self):
+        """Parses an optional `[i]` or `[lo..hi]` suffix.
+        """
+        if self.peek() != "[":
+            return None
+        self.advance()
+        low = int(self.advance())
+        high = low
+        if self.peek() == "..":
+            self.advance()
+            high = int(self.advance())
+        self.expect("]")
+        return (low, high)
+
+    def parse_part(self):
+        """Parses `Name(pin=signal, ...);`.
+        """
+        name = self.advance()
+        self.expect("(")
+        connections = []
+        while True:
+            pin = self.advance()
+            pin_range = self.parse_range()
+            self.expect("=")
+            signal = self.advance()
+            signal_range = self.parse_range()
+            connections.append(Connection(pin, pin_range, signal, signal_range))
+            separator = self.advance()
+            if separator == ")":
+                break
+            if separator != ",":
+                raise HDLError(f"{self.path}: Expected , or ) but found {separator}")
+        self.expect(";")
+        return Part(name, connections)
+
+
+def parse_hdl_file(path):
+    """Reads and parses a .hdl file.
+
+    Args:
+        path (str): .hdl file.
+
+    Returns:
+        ChipDefinition: Chip.
+    """
+    with open(path, mode='r', encoding='UTF-8') as hdl_p:
+        return HDLParser(hdl_p.read(), path).parse()
@@ -0,0 +1,285 @@
+#!/usr/bin/python3
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from hdl_netlist import ChipLibrary
+from hdl_netlist import PROJECTS_DIR
+from hdl_parser import HDLError
+from hdlsim import compare_output
+from hdlsim import run_script
+from tst_script import read_test_script
+
+SIMULATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_NAME = ".hdl_regression_cache.json"
+
+# Project directories with chips, in the order later projects build on them.
+PROJECT_DIRS = ["01", "02", os.path.join("03", "a"), os.path.join("03", "b"), "05"]
+
+# Sources which determine the simulation results. Together with the files a
+# test reads they decide whether a cached pass is stale.
+SIMULATOR_SOURCES = [
+    os.path.join(SIMULATOR_DIR, "hdl_builtins.py"),
+    os.path.join(SIMULATOR_DIR, "hdl_circuit.py"),
+    os.path.join(SIMULATOR_DIR, "hdl_netlist.py"),
+    os.path.join(SIMULATOR_DIR, "hdl_parser.py"),
+    os.path.join(SIMULATOR_DIR, "hdlsim.py"),
+    os.path.join(SIMULATOR_DIR, "tst_script.py")
+]
+
+
+def file_hash(path):
+    """Returns the SHA-1 of a file's contents.
+
+    Args:
+        path (str): File path.
+    """
+    with open(path, mode='rb') as infile_p:
+        return hashlib.sha1(infile_p.read()).hexdigest()
+
+
+def simulator_fingerprint():
+    """Returns a hash of the simulator itself, so that changing the simulator
+    invalidates every cached result.
+    """
+    digest = hashlib.sha1()
+    for path in SIMULATOR_SOURCES:
+        digest.update(file_hash(path).encode("UTF-8"))
+    return digest.hexdigest()
+
+
+def run_test(script_path, cmp_path, search_path):
+    """Runs one test script and compares its output.
+    Runs in the worker processes, so it only takes and returns picklable values.
+
+    Args:
+        script_path (str): .tst file.
+        cmp_path (str): .cmp file.
+        search_path (list): Directories to load parts from.
+
+    Returns:
+        str: Error message, None if the test passed.
+    """
+    try:
+        output = run_script(script_path, ChipLibrary(search_path))
+    except HDLError as e:
+        return e.message
+    except Exception as any_exception:
+        return f"Could not run {script_path}\nException {any_exception}"
+    failed_line = compare_output(output, cmp_path)
+    if failed_line != 0:
+        return f"Comparison failure at line {failed_line}"
+    return None
+
+
+class RegressionTest():
+    """A chip with its test script and compare file.
+    """
+
+    def __init__(self, name, script_path, chip_name, cmp_path):
+        """Constructor for RegressionTest
+
+        Args:
+            name (str): Script path relative to the projects directory.
+            script_path (str): .tst file.
+            chip_name (str): Chip loaded by the script.
+            cmp_path (str): .cmp file the script compares to.
+        """
+        self.name = name
+        self.script_path = script_path
+        self.chip_name = chip_name
+        self.cmp_path = cmp_path
+        self.status = None
+        self.message = None
+
+
+class RegressionRunner():
+    """Runs every chip test of the projects, in parallel and incrementally.
+
+    A passed test is cached under a hash of its script, its compare file,
+    the simulator and every .hdl file the chip is built from, so editing
+    03/a/Bit.hdl reruns Bit and everything containing it, such as Register,
+    RAM8 to RAM16K and PC, while cached passes are skipped. Failures are
+    never cached.
+    """
+
+    def __init__(self, projects_dir=PROJECTS_DIR, project_dirs=None, jobs=None, cache_path=None):
+        """Constructor for RegressionRunner
+
+        Args:
+            projects_dir (str): Directory containing the project directories.
+            project_dirs (list): Project directories to test, relative to
+                projects_dir, in the order they build on each other.
+            jobs (int): Worker processes, defaults to the number of CPUs.
+            cache_path (str): Cache file, defaults to CACHE_NAME in
+                projects_dir.
+        """
+        self.projects_dir = projects_dir
+        project_dirs = project_dirs if project_dirs is not None else PROJECT_DIRS
+        self.search_path = [os.path.join(projects_dir, directory) for directory in project_dirs]
+        self.jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+        self.cache_path = cache_path if cache_path is not None else os.path.join(projects_dir, CACHE_NAME)
+        self.cache = {}
+        self.tests = []
+
+    def discover(self):
+        """Finds every test script with a compare-to command.
+
+        Returns:
+            list: RegressionTest objects in project order.
+        """
+        tests = []
+        for directory in self.search_path:
+            if not os.path.isdir(directory):
+                continue
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith(".tst"):
+                    continue
+                script_path = os.path.join(directory, file_name)
+                script = read_test_script(script_path)
+                chip_name = None
+                cmp_name = None
+                for command in script.commands:
+                    if command.name == "load" and chip_name is None:
+                        chip_name = command.args[0].removesuffix(".hdl")
+                    elif command.name == "compare-to":
+                        cmp_name = command.args[0]
+                if chip_name is None or cmp_name is None:
+                    continue
+                name = os.path.relpath(script_path, self.projects_dir)
+                tests.append(RegressionTest(name, script_path, chip_name, os.path.join(directory, cmp_name)))
+        return tests
+
+    def test_key(self, test, library):
+        """Returns the cache key of a test, None if it cannot run unattended.
+
+        Args:
+            test (RegressionTest): Test.
+            library (ChipLibrary): Library to resolve the chip with.
+        """
+        script = read_test_script(test.script_path)
+        directory = os.path.dirname(test.script_path)
+        paths, builtins = library.dependencies(test.chip_name, directory)
+        if "Keyboard" in builtins and script.uses("while"):
+            # The script waits for a key to be held down.
+            return None
+        inputs = set(paths) | {test.script_path, test.cmp_path}
+        for command in script.commands:
+            # `ROM32K load Program.hack` reads a program.
+            if command.name != "set" and len(command.args) == 2 and command.args[0] == "load":
+                inputs.add(os.path.join(directory, command.args[1]))
+
+        digest = hashlib.sha1(simulator_fingerprint().encode("UTF-8"))
+        for path in sorted(inputs):
+            digest.update(os.path.relpath(path, self.projects_dir).encode("UTF-8"))
+            digest.update(file_hash(path).encode("UTF-8"))
+        for name in sorted(builtins):
+            digest.update(name.encode("UTF-8"))
+        return digest.hexdigest()
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, mode='r', encoding='UTF-8') as cache_p:
+                self.cache = json.load(cache_p)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save_cache(self):
+        try:
+            with open(self.cache_path, mode='w', encoding='UTF-8') as cache_p:
+                json.dump(self.cache, cache_p, indent=1, sort_keys=True)
+        except OSError as any_exception:
+            sys.stderr.write(f"Could not write cache {self.cache_path}\n")
+            sys.stderr.write(f"Exception {any_exception}\n")
+
+    def run(self):
+        """Runs every stale test. Sets status to "passed", "cached",
+        "failed" or "skipped" on each test.
+
+        Returns:
+            list: RegressionTest objects.
+        """
+        self.load_cache()
+        self.tests = self.discover()
+        library = ChipLibrary(self.search_path)
+
+        stale = []
+        for test in self.tests:
+            try:
+                key = self.test_key(test, library)
+            except HDLError as e:
+                test.status = "failed"
+                test.message = e.message
+                self.cache.pop(test.name, None)
+                continue
+            except OSError as any_exception:
+                # A missing .cmp file or program.
+                test.status = "failed"
+                test.message = f"Could not read test files\nException {any_exception}"
+                self.cache.pop(test.name, None)
+                continue
+            if key is None:
+                test.status = "skipped"
+                test.message = "Needs keyboard input"
+            elif self.cache.get(test.name) == key:
+                test.status = "cached"
+            else:
+                stale.append((test, key))
+
+        args = (
+            [test.script_path for test, key in stale],
+            [test.cmp_path for test, key in stale],
+            [self.search_path] * len(stale)
+        )
+        if len(stale) <= 1 or self.jobs <= 1:
+            results = list(map(run_test, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(stale))) as pool:
+                results = list(pool.map(run_test, *args))
+
+        for (test, key), error in zip(stale, results):
+            if error is None:
+                test.status = "passed"
+                self.cache[test.name] = key
+            else:
+                test.status = "failed"
+                test.message = error
+                self.cache.pop(test.name, None)
+        self.save_cache()
+        return self.tests
+
+
+def print_help():
+    """Prints help message.
+    """
+    help_message = '''
+    HDL Regression Runner
+    Runs the chip tests of projects 01 to 05, rerunning only tests whose chips changed
+    Usage
+    ./hdl_regression.py [worker count]
+
+    '''
+    sys.stdout.write(help_message)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and not sys.argv[1].isnumeric()):
+        print_help()
+    else:
+        jobs = int(sys.argv[1]) if len(sys.argv) == 2 else None
+        tests = RegressionRunner(jobs=jobs).run()
+        for test in tests:
+            line = f"{test.status:8} {test.name}"
+            if test.message is not None:
+                line = f"{line}: {test.message}"
+            print(line)
+        counts = {
+            status: sum(test.status == status for test in tests) for status in ("passed", "cached", "failed", "skipped")
+        }
+        print(", ".join(f"{count} {status}" for status, count in counts.items()))
+        if counts["failed"] != 0:
+            sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,351 @@
+#!/usr/bin/python3
+
+import os
+import sys
+from hdl_circuit import CircuitCompiler
+from hdl_circuit import read_lane
+from hdl_netlist import ChipLibrary
+from hdl_netlist import Netlist
+from hdl_parser import HDLError
+from tst_script import OutputColumn
+from tst_script import parse_value
+from tst_script import read_test_script
+
+# while loops of a script give up after this many iterations.
+MAX_LOOP_ITERATIONS = 100000
+
+COMPARISONS = {
+    "=": lambda x, y: x == y,
+    "<>": lambda x, y: x != y,
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "<=": lambda x, y: x <= y,
+    ">=": lambda x, y: x >= y,
+}
+
+
+def compare_output(lines, cmp_path):
+    """Compares output lines with a .cmp file, ignoring surrounding white
+    space on each line. A * in the .cmp file matches any character.
+
+    Args:
+        lines (list): Output lines.
+        cmp_path (str): .cmp file.
+
+    Returns:
+        int: 1 based number of the first differing line, 0 if they match.
+    """
+    with open(cmp_path, mode='r', encoding='UTF-8') as cmp_p:
+        expected = [line.strip() for line in cmp_p.read().splitlines() if len(line.strip()) != 0]
+    for number, (line, expected_line) in enumerate(zip(lines, expected), start=1):
+        line = line.strip()
+        if len(line) != len(expected_line) or any(
+            expected != "*" and actual != expected for actual, expected in zip(line, expected_line)
+        ):
+            return number
+    if len(lines) != len(expected):
+        return min(len(lines), len(expected)) + 1
+    return 0
+
+
+class BitSlicedRunner():
+    """Runs the test script of a combinational chip with one netlist pass.
+
+    The script is executed without evaluating anything: every eval records
+    the current inputs as a test vector and every output remembers which
+    vector it shows. All vectors are then evaluated together by
+    Netlist.evaluate and the rows are formatted afterwards.
+    """
+
+    def __init__(self, library=None):
+        """Constructor for BitSlicedRunner
+
+        Args:
+            library (ChipLibrary): Library to load chips from.
+        """
+        self.library = library if library is not None else ChipLibrary()
+        self.netlists = {}
+
+    def netlist(self, name, local_dir=None):
+        """Returns the flattened netlist of a chip, built once per chip.
+        """
+        definition = self.library.load(name, local_dir)
+        if definition.path not in self.netlists:
+            self.netlists[definition.path] = Netlist(self.library, definition)
+        return self.netlists[definition.path]
+
+    def run(self, script_path):
+        """Runs a .tst script.
+
+        Args:
+            script_path (str): .tst file.
+
+        Returns:
+            list: Output lines, header first.
+        """
+        script = read_test_script(script_path)
+        if script.is_sequential():
+            raise HDLError(f"{script_path}: Sequential scripts are not supported")
+        local_dir = os.path.dirname(os.path.abspath(script_path))
+        netlist = None
+        columns = []
+        current = {}
+        vectors = []
+        rows = []
+        for command in script.commands:
+            if command.name == "load":
+                netlist = self.netlist(command.args[0].removesuffix(".hdl"), local_dir)
+            elif command.name == "output-list":
+                columns = [OutputColumn(spec) for spec in command.args]
+            elif command.name == "set":
+                if netlist is None or command.args[0] not in netlist.inputs:
+                    raise HDLError(f"{script_path}: Cannot set {command.args[0]}")
+                current[command.args[0]] = parse_value(command.args[1])
+            elif command.name == "eval":
+                vectors.append(dict(current))
+            elif command.name == "output":
+                rows.append((dict(current), len(vectors) - 1))
+            elif command.name in ("output-file", "compare-to", "echo", "clear-echo"):
+                pass
+            else:
+                raise HDLError(f"{script_path}: Command {command.name} is not supported")
+        if netlist is None:
+            raise HDLError(f"{script_path}: No chip loaded")
+
+        count = len(vectors)
+        inputs = {pin: [vector.get(pin, 0) for vector in vectors] for pin in netlist.inputs}
+        outputs = netlist.evaluate(inputs, count) if count != 0 else {}
+
+        widths = {pin: len(nets) for pin, nets in {**netlist.inputs, **netlist.outputs}.items()}
+        lines = ["|" + "|".join(column.header() for column in columns) + "|"]
+        for row_inputs, vector in rows:
+            cells = []
+            for column in columns:
+                if column.pin in netlist.inputs:
+                    value = row_inputs.get(column.pin, 0)
+                elif column.pin in netlist.outputs:
+                    value = outputs[column.pin][vector] if vector >= 0 else 0
+                else:
+                    raise HDLError(f"{script_path}: Unknown output pin {column.name}")
+                if column.index is not None:
+                    value = (value >> column.index) & 1
+                cells.append(column.format_value(value, widths[column.pin]))
+            lines.append("|" + "|".join(cells) + "|")
+        return lines
+
+
+class SequentialRunner():
+    """Runs test scripts step by step, including clocked chips.
+
+    The chip is simulated with a CircuitCompiler template, a single lane
+    wide. Output columns may name a part of the chip, `RAM16K[3]` shows
+    word 3 of the first RAM16K inside the chip and `PC[]` the out pin of
+    the first PC. Such parts are also the target of `set RAM16K[3] 7` and
+    `ROM32K load Program.hack`.
+    """
+
+    def __init__(self, library=None):
+        """Constructor for SequentialRunner
+
+        Args:
+            library (ChipLibrary): Library to load chips from.
+        """
+        self.library = library if library is not None else ChipLibrary()
+        self.compiler = CircuitCompiler(self.library)
+
+    def run(self, script_path):
+        """Runs a .tst script.
+
+        Args:
+            script_path (str): .tst file.
+
+        Returns:
+            list: Output lines, header first.
+        """
+        script = read_test_script(script_path)
+        self.script_path = script_path
+        self.local_dir = os.path.dirname(os.path.abspath(script_path))
+        self.template = None
+        self.instance = None
+        self.columns = []
+        self.inputs = {}
+        self.time = 0
+        self.time_text = "0"
+        self.lines = []
+        self.execute(script.commands)
+        return self.lines
+
+    def execute(self, commands):
+        """Runs a list of commands.
+        """
+        for command in commands:
+            name = command.name
+            args = command.args
+            if name == "load":
+                definition = self.library.load(args[0].removesuffix(".hdl"), self.local_dir)
+                self.template = self.compiler.template(definition)
+                self.instance = self.template.instantiate(1)
+            elif name == "output-list":
+                self.columns = [OutputColumn(spec) for spec in args]
+                self.lines.append("|" + "|".join(column.header() for column in self.columns) + "|")
+            elif name == "set":
+                self.set_value(args[0], parse_value(args[1]))
+            elif name == "eval":
+                self.evaluate()
+            elif name == "tick":
+                self.evaluate()
+                self.chip().tick()
+                self.time_text = f"{self.time}+"
+            elif name == "tock":
+                self.chip().tock()
+                self.evaluate()
+                self.time = self.time + 1
+                self.time_text = f"{self.time}"
+            elif name == "output":
+                self.output()
+            elif name == "repeat":
+                if len(args) != 1 or not args[0].isnumeric():
+                    raise HDLError(f"{self.script_path}: repeat needs a count")
+                for unused in range(int(args[0])):
+                    self.execute(command.body)
+            elif name == "while":
+                iterations = 0
+                while self.condition(args):
+                    iterations = iterations + 1
+                    if iterations > MAX_LOOP_ITERATIONS:
+                        raise HDLError(f"{self.script_path}: while {' '.join(args)} did not end")
+                    self.execute(command.body)
+            elif name in ("output-file", "compare-to", "echo", "clear-echo"):
+                pass
+            elif len(args) == 2 and args[0] == "load":
+                instance, lane = self.part(name)
+                instance.load(lane, os.path.join(self.local_dir, args[1]))
+            else:
+                raise HDLError(f"{self.script_path}: Command {name} is not supported")
+
+    def chip(self):
+        if self.instance is None:
+            raise HDLError(f"{self.script_path}: No chip loaded")
+        return self.instance
+
+    def evaluate(self):
+        """Applies the inputs and evaluates the chip.
+        """
+        instance = self.chip()
+        for pin, value in self.inputs.items():
+            for bit, net in enumerate(self.template.inputs[pin]):
+                instance.values[net] = (value >> bit) & 1
+        instance.evaluate()
+
+    def part(self, name):
+        """Returns (instance, lane) of the first part of chip type name.
+        """
+        found = self.chip().find_part(name) if hasattr(self.chip(), "find_part") else None
+        if found is None:
+            raise HDLError(f"{self.script_path}: Unknown pin or part {name}")
+        return found
+
+    @staticmethod
+    def split_name(name):
+        """Splits `RAM16K[3]` into ("RAM16K", 3) and `PC[]` into ("PC", None).
+        """
+        if not name.endswith("]"):
+            return (name, None)
+        base, index = name[:-1].split("[", 1)
+        return (base, int(index) if len(index) != 0 else None)
+
+    def set_value(self, name, value):
+        """Sets an input pin, or a word of a builtin part.
+        """
+        self.chip()
+        if name in self.template.inputs:
+            self.inputs[name] = value & ((1 << len(self.template.inputs[name])) - 1)
+            return
+        base, index = self.split_name(name)
+        instance, lane = self.part(base)
+        instance.write_word(lane, index if index is not None else 0, value)
+
+    def read_value(self, name):
+        """Returns the value of a pin or part, and its width.
+        """
+        template = self.template
+        base, index = self.split_name(name)
+        if base in template.inputs or base in template.outputs:
+            if base in template.inputs:
+                value = self.inputs.get(base, 0)
+                width = len(template.inputs[base])
+            else:
+                nets = template.outputs[base]
+                value = read_lane(self.chip().values, nets, 0)
+                width = len(nets)
+            if index is not None:
+                return ((value >> index) & 1, 1)
+            return (value, width)
+        instance, lane = self.part(base)
+        return (instance.read_word(lane, index if index is not None else 0), 16)
+
+    def condition(self, args):
+        """Evaluates a while condition such as `out <> 75`.
+        """
+        if len(args) != 3 or args[1] not in COMPARISONS:
+            raise HDLError(f"{self.script_path}: Bad condition {' '.join(args)}")
+        value, width = self.read_value(args[0])
+        if width == 16 and value & 0x8000:
+            value = value - 0x10000
+        return COMPARISONS[args[1]](value, parse_value(args[2]))
+
+    def output(self):
+        """Appends a row for the current state.
+        """
+        cells = []
+        for column in self.columns:
+            if column.name == "time":
+                cells.append(column.format_value(self.time_text))
+            else:
+                value, width = self.read_value(column.name)
+                cells.append(column.format_value(value, width))
+        self.lines.append("|" + "|".join(cells) + "|")
+
+
+def run_script(script_path, library=None):
+    """Runs a .tst script, bit-sliced when it does not use the clock.
+
+    Args:
+        script_path (str): .tst file.
+        library (ChipLibrary): Library to load chips from.
+
+    Returns:
+        list: Output lines, header first.
+    """
+    if read_test_script(script_path).is_sequential():
+        return SequentialRunner(library).run(script_path)
+    return BitSlicedRunner(library).run(script_path)
+
+
+def print_help():
+    """Prints help message.
+    """
+    usage = '''
+    HDL Simulator
+    Runs a .tst script and compares its output to the .cmp file
+    Usage:
+        hdlsim.py <.tst file>
+    '''
+    print(usage)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print_help()
+    else:
+        try:
+            output = run_script(sys.argv[1])
+        except HDLError as error:
+            print(error.message)
+            sys.exit(1)
+        failed_line = compare_output(output, sys.argv[1].removesuffix(".tst") + ".cmp")
+        if failed_line != 0:
+            print(f"Comparison failure at line {failed_line}")
+            sys.exit(1)
+        print("End of script - Comparison ended successfully")
+    sys.exit(0)
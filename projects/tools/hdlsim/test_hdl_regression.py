@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+from hdl_regression import RegressionRunner
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+PROJECT_DIRS = ["01", "02", os.path.join("03", "a"), os.path.join("03", "b")]
+
+
+class TestRegressionRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.projects_dir = tempfile.mkdtemp()
+        for directory in PROJECT_DIRS:
+            shutil.copytree(os.path.join(PROJECTS_DIR, directory), os.path.join(self.projects_dir, directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.projects_dir)
+
+    def run_tests(self):
+        runner = RegressionRunner(self.projects_dir, PROJECT_DIRS, jobs=2)
+        return {test.name: test.status for test in runner.run()}
+
+    def test_incremental(self):
+        statuses = self.run_tests()
+        self.assertEqual(len(statuses), 29)
+        self.assertEqual(set(statuses.values()), {"passed"})
+        self.assertEqual(set(self.run_tests().values()), {"cached"})
+
+        with open(os.path.join(self.projects_dir, "03", "a", "Bit.hdl"), mode='a', encoding='UTF-8') as hdl_p:
+            hdl_p.write("// Edited\n")
+        statuses = self.run_tests()
+        rerun = {os.path.basename(name) for name, status in statuses.items() if status == "passed"}
+        self.assertEqual(rerun, {
+            "Bit.tst", "Register.tst", "PC.tst", "RAM8.tst", "RAM64.tst", "RAM512.tst", "RAM4K.tst", "RAM16K.tst"
+        })
+        self.assertEqual(statuses[os.path.join("02", "ALU.tst")], "cached")
+
+    def test_failures_are_not_cached(self):
+        hdl_path = os.path.join(self.projects_dir, "01", "Xor.hdl")
+        with open(hdl_path, mode='r', encoding='UTF-8') as hdl_p:
+            source = hdl_p.read()
+        with open(hdl_path, mode='w', encoding='UTF-8') as hdl_p:
+            hdl_p.write(source.replace("Or(", "And("))
+        statuses = self.run_tests()
+        self.assertEqual(statuses[os.path.join("01", "Xor.tst")], "failed")
+        self.assertEqual(self.run_tests()[os.path.join("01", "Xor.tst")], "failed")
+
+
+    def test_missing_cmp_file(self):
+        os.remove(os.path.join(self.projects_dir, "01", "Xor.cmp"))
+        runner = RegressionRunner(self.projects_dir, PROJECT_DIRS, jobs=2)
+        tests = {test.name: test for test in runner.run()}
+        xor = tests[os.path.join("01", "Xor.tst")]
+        self.assertEqual(xor.status, "failed")
+        self.assertIn("Xor.cmp", xor.message)
+        self.assertEqual(tests[os.path.join("01", "And.tst")].status, "passed")
+        self.assertEqual(self.run_tests()[os.path.join("01", "And.tst")], "cached")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import time
+import unittest
+from hdl_netlist import ChipLibrary
+from hdl_netlist import Netlist
+from hdl_netlist import pack_lanes
+from hdl_netlist import unpack_lanes
+from hdl_parser import HDLError
+from hdl_parser import HDLParser
+from hdl_circuit import CircuitCompiler
+from hdlsim import BitSlicedRunner
+from hdlsim import SequentialRunner
+from hdlsim import compare_output
+from hdlsim import run_script
+from tst_script import OutputColumn
+
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def build(name):
+    library = ChipLibrary()
+    return Netlist(library, library.load(name))
+
+
+class TestNetlist(unittest.TestCase):
+
+    def test_lanes(self):
+        values = [0, 1, 0xFFFF, 0x8000, 12345]
+        lanes = pack_lanes(values, 16)
+        self.assertEqual(lanes[0], 0b10110)
+        self.assertEqual(lanes[15], 0b01100)
+        self.assertEqual(unpack_lanes(lanes, len(values)), values)
+
+    def test_exhaustive_inc16(self):
+        netlist = build("Inc16")
+        values = list(range(1 << 16))
+        start = time.perf_counter()
+        outputs = netlist.evaluate({"in": values}, len(values))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(outputs["out"], [(value + 1) & 0xFFFF for value in values])
+        self.assertLess(elapsed, 10)
+
+    def test_alu_against_model(self):
+        netlist = build("ALU")
+        vectors = [
+            (x, y, control) for x in (0, 1, 17, 0x7FFF, 0x8000, 0xFFFF) for y in (0, 3, 0xFFFE) for control in range(64)
+        ]
+        inputs = {"x": [x for x, y, control in vectors], "y": [y for x, y, control in vectors]}
+        for bit, pin in enumerate(("no", "f", "ny", "zy", "nx", "zx")):
+            inputs[pin] = [(control >> bit) & 1 for x, y, control in vectors]
+        outputs = netlist.evaluate(inputs, len(vectors))
+        for index, (x, y, control) in enumerate(vectors):
+            x = 0 if control & 0b100000 else x
+            x = x ^ 0xFFFF if control & 0b010000 else x
+            y = 0 if control & 0b001000 else y
+            y = y ^ 0xFFFF if control & 0b000100 else y
+            out = (x + y) & 0xFFFF if control & 0b000010 else x & y
+            out = out ^ 0xFFFF if control & 0b000001 else out
+            self.assertEqual(outputs["out"][index], out)
+            self.assertEqual(outputs["zr"][index], int(out == 0))
+            self.assertEqual(outputs["ng"][index], out >> 15)
+
+    def test_combinational_loop(self):
+        source = "CHIP Loop { IN a; OUT out; PARTS: Nand(a=a, b=x, out=y); Not(in=y, out=x, out=out); }"
+        library = ChipLibrary()
+        with self.assertRaises(HDLError):
+            Netlist(library, HDLParser(source).parse())
+
+
+class TestBitSlicedRunner(unittest.TestCase):
+
+    def test_project_scripts(self):
+        runner = BitSlicedRunner()
+        for project in ("01", "02"):
+            directory = os.path.join(PROJECTS_DIR, project)
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith(".tst"):
+                    continue
+                with self.subTest(script=file_name):
+                    script_path = os.path.join(directory, file_name)
+                    output = runner.run(script_path)
+                    self.assertEqual(compare_output(output, script_path.removesuffix(".tst") + ".cmp"), 0)
+
+    def test_mismatch(self):
+        output = BitSlicedRunner().run(os.path.join(PROJECTS_DIR, "01", "Xor.tst"))
+        output[3] = output[3].replace("1", "0")
+        with tempfile.NamedTemporaryFile(mode='w', suffix=".cmp", delete=False) as cmp_p:
+            cmp_p.write("\n".join(BitSlicedRunner().run(os.path.join(PROJECTS_DIR, "01", "Xor.tst"))))
+        try:
+            self.assertEqual(compare_output(output, cmp_p.name), 4)
+        finally:
+            os.remove(cmp_p.name)
+
+    def test_output_columns(self):
+        self.assertEqual(OutputColumn("a%B1.16.1").header(), "        a         ")
+        self.assertEqual(OutputColumn("DRegister[]%D1.6.1").header(), "DRegiste")
+        self.assertEqual(OutputColumn("out%D1.6.1").format_value(0xFFFF), "     -1 ")
+        self.assertEqual(OutputColumn("time%S1.4.1").format_value("0+"), " 0+   ")
+        self.assertEqual(OutputColumn("outM%D1.6.0").format_value(None), "*******")
+
+
+class TestSequentialRunner(unittest.TestCase):
+
+    def test_project_scripts(self):
+        for project in (os.path.join("03", "a"), os.path.join("03", "b"), "05"):
+            directory = os.path.join(PROJECTS_DIR, project)
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith(".tst") or file_name in ("Memory.tst", "CPU-JMP.tst"):
+                    continue
+                with self.subTest(script=file_name):
+                    script_path = os.path.join(directory, file_name)
+                    output = run_script(script_path)
+                    self.assertEqual(compare_output(output, script_path.removesuffix(".tst") + ".cmp"), 0)
+
+    def test_batched_memory(self):
+        library = ChipLibrary()
+        template = CircuitCompiler(library).template(library.load("RAM16K", os.path.join(PROJECTS_DIR, "03", "b")))
+        # Each level evaluates all of its memory parts in one batch.
+        current = template
+        for name, size in (("RAM4K", 4), ("RAM512", 8), ("RAM64", 8), ("RAM8", 8), ("Register", 8), ("Bit", 16)):
+            batches = [batch for batch in current.batches if batch.child.name == name]
+            self.assertEqual([batch.size for batch in batches], [size])
+            current = batches[0].child
+
+        instance = template.instantiate(1)
+
+        def step(address, value, load):
+            for bit, net in enumerate(template.inputs["in"]):
+                instance.values[net] = (value >> bit) & 1
+            for bit, net in enumerate(template.inputs["address"]):
+                instance.values[net] = (address >> bit) & 1
+            instance.values[template.inputs["load"][0]] = load
+            instance.evaluate()
+            instance.tick()
+            instance.tock()
+            instance.evaluate()
+            return sum(instance.values[net] << bit for bit, net in enumerate(template.outputs["out"]))
+
+        for address in (0, 1, 4095, 4096, 16383):
+            step(address, address ^ 0x5A5A, 1)
+        for address in (0, 1, 4095, 4096, 16383):
+            self.assertEqual(step(address, 0, 0), address ^ 0x5A5A)
+        self.assertEqual(step(2, 0, 0), 0)
+
+    def test_sequential_feedback(self):
+        directory = os.path.join(PROJECTS_DIR, "03", "a")
+        with tempfile.NamedTemporaryFile(mode='w', suffix=".tst", dir=directory, delete=False) as tst_p:
+            tst_p.write("""
+                load PC.hdl,
+                output-list time%S1.4.1 out%D1.6.1;
+                set inc 1,
+                repeat 3 { tick, tock, output; }
+                set inc 0, set in -5, set load 1,
+                tick, output; tock, output;
+                while out < 0 { set load 0, set inc 1, tick, tock, }
+                output;
+            """)
+        try:
+            output = SequentialRunner().run(tst_p.name)
+        finally:
+            os.remove(tst_p.name)
+        self.assertEqual(output, [
+            "| time |  out   |",
+            "| 1    |      1 |",
+            "| 2    |      2 |",
+            "| 3    |      3 |",
+            "| 3+   |      3 |",
+            "| 4    |     -5 |",
+            "| 9    |      0 |",
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
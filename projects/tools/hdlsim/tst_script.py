@@ -0,0 +1,181 @@
+import re
+from hdl_parser import HDLError
+
+SCRIPT_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"[^"]*")
+  | (?P<symbol>[,;{}])
+  | (?P<word>[^\s,;{}"]+)
+""", re.VERBOSE | re.DOTALL)
+
+OUTPUT_SPEC_RE = re.compile(r"^(?P<name>[^%]+)%(?P<format>[BDXS])(?P<left>\d+)\.(?P<width>\d+)\.(?P<right>\d+)$")
+
+
+def parse_value(text):
+    """Parses a value given to set, `%B101`, `%X1F`, `%D-3` or `-3`.
+
+    Returns:
+        int: Value, possibly negative.
+    """
+    try:
+        if text.startswith("%B"):
+            return int(text[2:], 2)
+        if text.startswith("%X"):
+            return int(text[2:], 16)
+        if text.startswith("%D"):
+            return int(text[2:])
+        return int(text)
+    except ValueError as error:
+        raise HDLError(f"Bad value {text}") from error
+
+
+class Command():
+    """One script command. For repeat and while, body holds the commands of
+    the block.
+    """
+
+    def __init__(self, name, args, body=None):
+        self.name = name
+        self.args = args
+        self.body = body
+
+
+class OutputColumn():
+    """One `name%F left.width.right` entry of an output-list.
+    """
+
+    def __init__(self, spec):
+        """Constructor for OutputColumn
+
+        Args:
+            spec (str): Output list entry.
+        """
+        match = OUTPUT_SPEC_RE.match(spec)
+        if match is None:
+            raise HDLError(f"Bad output-list entry {spec}")
+        self.name = match.group("name")
+        self.format = match.group("format")
+        self.left = int(match.group("left"))
+        self.width = int(match.group("width"))
+        self.right = int(match.group("right"))
+        # DRegister[] names the register inside a part, DRegister[3] a bit.
+        self.pin = self.name
+        self.index = None
+        if self.name.endswith("]"):
+            self.pin, index = self.name[:-1].split("[", 1)
+            self.index = int(index) if len(index) != 0 else None
+
+    def header(self):
+        """Returns the column title, centered and cut to the column width.
+        """
+        total = self.left + self.width + self.right
+        title = self.name[:total]
+        padding = total - len(title)
+        return " " * (padding // 2) + title + " " * (padding - padding // 2)
+
+    def format_value(self, value, pin_width=16):
+        """Formats a value for this column.
+
+        Args:
+            value (int or str): Value, None when it is undefined, a str for
+                %S columns.
+            pin_width (int): Width of the pin, %D shows 16 bit pins signed.
+
+        Returns:
+            str: Cell text.
+        """
+        if value is None:
+            return "*" * (self.left + self.width + self.right)
+        if self.format == "S":
+            text = str(value)[:self.width].ljust(self.width)
+        elif self.format == "B":
+            text = format(value & ((1 << self.width) - 1), f"0{self.width}b")
+        elif self.format == "X":
+            text = format(value & ((1 << (4 * self.width)) - 1), f"0{self.width}X")
+        else:
+            if pin_width == 16 and value & 0x8000:
+                value = value - 0x10000
+            text = str(value).rjust(self.width)
+        return " " * self.left + text + " " * self.right
+
+
+class TestScript():
+    """Parsed .tst file.
+    """
+
+    def __init__(self, source, path=None):
+        """Constructor for TestScript
+
+        Args:
+            source (str): Contents of the .tst file.
+            path (str): File path, used in error messages.
+        """
+        self.path = path
+        self.tokens = []
+        position = 0
+        while position < len(source):
+            match = SCRIPT_TOKEN_RE.match(source, position)
+            if match.lastgroup != "skip":
+                self.tokens.append(match.group(match.lastgroup))
+            position = match.end()
+        self.position = 0
+        self.commands = self.parse_block(top_level=True)
+
+    def parse_block(self, top_level=False):
+        """Parses commands up to the closing brace of a block.
+
+        Returns:
+            list: Commands.
+        """
+        commands = []
+        words = []
+        while self.position < len(self.tokens):
+            token = self.tokens[self.position]
+            self.position = self.position + 1
+            if token in (",", ";"):
+                if len(words) != 0:
+                    commands.append(Command(words[0], words[1:]))
+                words = []
+            elif token == "{":
+                if len(words) == 0 or words[0] not in ("repeat", "while"):
+                    raise HDLError(f"{self.path}: Unexpected {{")
+                commands.append(Command(words[0], words[1:], self.parse_block()))
+                words = []
+            elif token == "}":
+                if top_level:
+                    raise HDLError(f"{self.path}: Unexpected }}")
+                if len(words) != 0:
+                    commands.append(Command(words[0], words[1:]))
+                return commands
+            else:
+                words.append(token)
+        if not top_level:
+            raise HDLError(f"{self.path}: Missing }}")
+        if len(words) != 0:
+            commands.append(Command(words[0], words[1:]))
+        return commands
+
+    def uses(self, *names):
+        """Returns True if the script contains one of the commands, also
+        inside loops.
+        """
+        pending = list(self.commands)
+        while len(pending) != 0:
+            command = pending.pop()
+            if command.name in names:
+                return True
+            if command.body is not None:
+                pending.extend(command.body)
+        return False
+
+    def is_sequential(self):
+        """Returns True if the script advances a clock.
+        """
+        return self.uses("tick", "tock")
+
+
+def read_test_script(path):
+    """Reads and parses a .tst file.
+    """
+    with open(path, mode='r', encoding='UTF-8') as tst_p:
+        return TestScript(tst_p.read(), path)